@@ -0,0 +1,91 @@
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+
+class ChunkScheduler(object):
+    """
+    This class runs the queries of many chunks concurrently while keeping the export in order.
+    At most max_workers chunks are fetched at the same time, and at most max_workers_per_network for a given network
+    so that one network does not take all the slots. Results are exported in the order of the tasks, at most
+    2 * max_workers results are pending at any time which bounds the memory used.
+    """
+
+    def __init__(self, max_workers=1, max_workers_per_network=None):
+        """
+        Parameters
+        ----------
+        max_workers : int
+            The maximum number of chunks fetched concurrently default is 1
+        max_workers_per_network : int
+            The maximum number of chunks of the same network fetched concurrently, default None is max_workers
+        """
+        self.max_workers = max_workers
+        self.max_workers_per_network = max_workers if max_workers_per_network is None else max_workers_per_network
+        self.dict_semaphore = {}
+        self._lock = threading.Lock()
+
+    def get_semaphore(self, network):
+        """return the semaphore limiting the concurrent chunks of a network"""
+        with self._lock:
+            if network not in self.dict_semaphore:
+                self.dict_semaphore[network] = threading.Semaphore(self.max_workers_per_network)
+            return self.dict_semaphore[network]
+
+    def fetch(self, fetch_function, task):
+        with self.get_semaphore(task[0]):
+            return fetch_function(task)
+
+    def run(self, tasks, fetch_function, export_function):
+        """
+        Fetch all the tasks and export their results in the order of the tasks
+
+        Parameters
+        ----------
+        tasks : iterable
+            An iterable of tuples, the first element of each tuple is the network of the task. It is consumed lazily
+            as the pool frees up
+        fetch_function : callable
+            A function taking a task and returning its result, it is run in the pool
+        export_function : callable
+            A function taking a task and its result, it is run in the calling thread in the order of the tasks
+        """
+        tasks = iter(tasks)
+        pending = deque()
+        max_pending = 2 * self.max_workers
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            for task in tasks:
+                pending.append((task, pool.submit(self.fetch, fetch_function, task)))
+                if len(pending) >= max_pending:
+                    break
+            while pending:
+                task, future = pending.popleft()
+                result = future.result()
+                next_task = next(tasks, None)
+                if next_task is not None:
+                    pending.append((next_task, pool.submit(self.fetch, fetch_function, next_task)))
+                export_function(task, result)
+
+    @staticmethod
+    def interleave(dict_tasks):
+        """
+        Interleave the tasks of several networks so the networks are fetched at the same time
+
+        Parameters
+        ----------
+        dict_tasks : dict
+            The iterable of tasks of each network, they are consumed lazily
+
+        Returns
+        -------
+        tasks : generator
+            The tasks in round robin order of the networks
+        """
+        list_iter = [iter(network_tasks) for network_tasks in dict_tasks.values()]
+        while list_iter:
+            for network_iter in list(list_iter):
+                task = next(network_iter, None)
+                if task is None:
+                    list_iter.remove(network_iter)
+                else:
+                    yield task
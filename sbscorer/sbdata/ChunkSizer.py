@@ -0,0 +1,158 @@
+import json
+import os
+import threading
+
+
+class ChunkSizer(object):
+    """
+    This class chooses the number of addresses of the next query of a network.
+    It tracks the rows returned per address and the query time per address of each network and sizes the chunks to
+    reach target_rows and time_budget_seconds. A chunk that fails or hits the max rows lowers the max size of the
+    network, the successful chunks raise it back slowly. A chunk only raises it if no chunk of the network failed while
+    it was in flight, and if it was sized under the current max size.
+    The statistics can be saved to a json file to be reused by the next extraction.
+    """
+
+    def __init__(self, path=None, initial_size=100, min_size=1, max_size=10000, target_rows=250000,
+                 time_budget_seconds=120, alpha=0.3):
+        """
+        Parameters
+        ----------
+        path : str
+            The json file where the statistics are saved, if it exists the statistics are loaded default None
+        initial_size : int
+            The chunk size of a network without statistics default is 100
+        min_size : int
+            The minimum chunk size default is 1
+        max_size : int
+            The maximum chunk size default is 10000
+        target_rows : int
+            The number of rows a chunk should return default is 250000
+        time_budget_seconds : float
+            The time a chunk query should take default is 120 seconds
+        alpha : float
+            The weight of the last chunk in the moving averages default is 0.3
+        """
+        self.path = path
+        self.initial_size = initial_size
+        self.min_size = min_size
+        self.max_size = max_size
+        self.target_rows = target_rows
+        self.time_budget_seconds = time_budget_seconds
+        self.alpha = alpha
+        self.dict_stats = {}
+        self._lock = threading.Lock()
+        if self.path is not None and os.path.exists(self.path):
+            self.load()
+
+    def get_stats(self, network):
+        """return the statistics of a network, they are created if needed, the caller should hold the lock"""
+        if network not in self.dict_stats:
+            self.dict_stats[network] = {"rows_per_address": None,
+                                        "seconds_per_address": None,
+                                        "max_size": self.max_size,
+                                        "n_queries": 0,
+                                        "n_failures": 0,
+                                        "generation": 0}
+        return self.dict_stats[network]
+
+    def get_generation(self, network):
+        """
+        Get the generation of the max size of a network, it is incremented each time a failure lowers the max size.
+        It is read before a query and given to update.
+
+        Parameters
+        ----------
+        network : str
+            The network of the query
+
+        Returns
+        -------
+        generation : int
+            The generation of the max size
+        """
+        with self._lock:
+            return self.get_stats(network).get("generation", 0)
+
+    def get_chunk_size(self, network):
+        """
+        Get the number of addresses of the next query
+
+        Parameters
+        ----------
+        network : str
+            The network of the query
+
+        Returns
+        -------
+        size : int
+            The number of addresses
+        """
+        with self._lock:
+            stats = self.get_stats(network)
+            size = self.initial_size
+            if stats["rows_per_address"]:
+                size = self.target_rows / stats["rows_per_address"]
+            if stats["seconds_per_address"]:
+                size = min(size, self.time_budget_seconds / stats["seconds_per_address"])
+            return int(max(self.min_size, min(size, stats["max_size"])))
+
+    def update(self, network, n_address, n_rows, elapsed_seconds, failed=False, generation=None):
+        """
+        Record the result of a query
+
+        Parameters
+        ----------
+        network : str
+            The network of the query
+        n_address : int
+            The number of addresses of the query
+        n_rows : int
+            The number of rows returned
+        elapsed_seconds : float
+            The duration of the query
+        failed : bool
+            If the query failed or hit the max rows, the chunk will be split
+        generation : int
+            The generation given by get_generation before the query. If a failure lowered the max size since, the
+            chunk does not raise it. Default None the generation is not checked
+        """
+        with self._lock:
+            stats = self.get_stats(network)
+            stats["n_queries"] += 1
+            if failed:
+                stats["n_failures"] += 1
+                stats["max_size"] = max(self.min_size, n_address // 2)
+                stats["generation"] = stats.get("generation", 0) + 1
+                return
+            stats["rows_per_address"] = self.get_average(stats["rows_per_address"], n_rows / n_address)
+            stats["seconds_per_address"] = self.get_average(stats["seconds_per_address"],
+                                                            elapsed_seconds / n_address)
+            # the chunks sized before a failure, still in flight when it lowered the max size, do not raise it back
+            if generation is not None and generation != stats.get("generation", 0):
+                return
+            if n_address == stats["max_size"]:
+                stats["max_size"] = min(self.max_size, int(stats["max_size"] * 1.25) + 1)
+
+    def get_average(self, average, value):
+        """exponential moving average"""
+        if average is None:
+            return value
+        return (1 - self.alpha) * average + self.alpha * value
+
+    def load(self):
+        with open(self.path) as f:
+            self.dict_stats = json.load(f)
+
+    def save(self):
+        """save the statistics to path"""
+        if self.path is None:
+            return
+        with self._lock:
+            directory = os.path.dirname(self.path)
+            if directory and not os.path.exists(directory):
+                os.makedirs(directory)
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(self.dict_stats, f, indent=2)
+            os.replace(tmp_path, self.path)
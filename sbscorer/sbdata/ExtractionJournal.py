@@ -0,0 +1,117 @@
+import hashlib
+import json
+import os
+from datetime import datetime, timezone
+
+import numpy as np
+
+JOURNAL_DIR = "_journal"
+
+
+def get_address_hash(array_address):
+    """return the sha1 of the list of addresses, it identifies the extraction of a journal"""
+    sha1 = hashlib.sha1()
+    for address in array_address:
+        sha1.update(str(address).lower().encode())
+        sha1.update(b",")
+    return sha1.hexdigest()
+
+
+class ExtractionJournal(object):
+    """
+    This class is the checkpoint journal of the extraction of a network.
+    A json line is appended to extract_dir/_journal/network.jsonl as soon as a chunk is exported, with the address
+    range, the number of rows, the query_id and the files written, or the error of a failed chunk.
+    The first line identifies the list of addresses, so an extraction can be resumed by skipping the chunks that are
+    done and retrying the failed ones.
+    """
+
+    def __init__(self, extract_dir, network):
+        """
+        Parameters
+        ----------
+        extract_dir : str
+            The directory of the extraction
+        network : str
+            The network of the journal
+        """
+        self.network = network
+        self.path_to_journal = os.path.join(extract_dir, JOURNAL_DIR, f"{network}.jsonl")
+
+    def exists(self):
+        """return True if the journal has been written"""
+        return os.path.exists(self.path_to_journal)
+
+    def read(self):
+        """
+        Read the entries of the journal, a line truncated by a crash is ignored
+
+        Returns
+        -------
+        list_entry : list
+            The list of entries, the first one is the header
+        """
+        list_entry = []
+        with open(self.path_to_journal) as f:
+            for line in f:
+                try:
+                    list_entry.append(json.loads(line))
+                except json.JSONDecodeError:
+                    print(f"Ignoring truncated line of {self.path_to_journal}")
+        return list_entry
+
+    def start(self, array_address, resume=False):
+        """
+        Start the journal of an extraction
+
+        Parameters
+        ----------
+        array_address : array
+            The array of addresses of the extraction
+        resume : bool
+            If True the existing journal is kept and the chunks it records as done are returned, else the journal is
+            created from scratch. Default is False
+
+        Returns
+        -------
+        done_mask : np.ndarray
+            The boolean mask of the addresses whose chunk is done
+        """
+        address_hash = get_address_hash(array_address)
+        done_mask = np.zeros(len(array_address), dtype=bool)
+        if resume and self.exists():
+            list_entry = self.read()
+            if not list_entry or list_entry[0].get("address_hash") != address_hash:
+                raise ValueError(f"The journal {self.path_to_journal} was written for another list of addresses")
+            for entry in list_entry[1:]:
+                if entry["status"] == "done":
+                    done_mask[entry["start_index"]:entry["end_index"]] = True
+            print(f"Resuming {self.network}: {done_mask.sum()} / {len(array_address)} addresses done")
+            return done_mask
+        directory = os.path.dirname(self.path_to_journal)
+        if not os.path.exists(directory):
+            os.makedirs(directory)
+        with open(self.path_to_journal, "w") as f:
+            f.write(json.dumps({"network": self.network, "n_address": len(array_address),
+                                "address_hash": address_hash, "created_at": self.get_now()}) + "\n")
+        return done_mask
+
+    def write(self, entry):
+        """append an entry and flush it to disk, so it survives a crash of the node"""
+        entry = dict(entry, network=self.network, created_at=self.get_now())
+        with open(self.path_to_journal, "a") as f:
+            f.write(json.dumps(entry) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def write_done(self, start_index, end_index, n_rows, query_id, files):
+        self.write({"status": "done", "start_index": int(start_index), "end_index": int(end_index),
+                    "n_rows": int(n_rows), "query_id": query_id, "files": files})
+
+    def write_failed(self, start_index, end_index, error):
+        self.write({"status": "failed", "start_index": int(start_index), "end_index": int(end_index),
+                    "error": str(error)})
+
+    @staticmethod
+    def get_now():
+        return datetime.now(timezone.utc).isoformat()
@@ -0,0 +1,120 @@
+import json
+import os
+import threading
+import time
+
+
+class ExtractionMetrics(object):
+    """
+    This class records the metrics of each chunk of an extraction in a json lines file.
+    An entry is written when a chunk is exported with its network, address range, number of rows, size in bytes,
+    query latency, number of pages, retries, split depth and export time. The queries that failed because of their
+    size and were split are also written, with the status split.
+    The report summarizes the throughput of each network and the slowest chunks, to tune max_address, page_size and
+    timeout_minutes. It can be shared between threads.
+    """
+
+    def __init__(self, path=None):
+        """
+        Parameters
+        ----------
+        path : str
+            The path of the json lines file, the entries are appended to it. Default None the entries are only kept
+            in memory
+        """
+        self.path = path
+        self.list_entry = []
+        self._lock = threading.Lock()
+
+    def write(self, entry):
+        """
+        Record the metrics of a chunk
+
+        Parameters
+        ----------
+        entry : dict
+            The metrics of the chunk
+        """
+        entry = dict(entry, created_at=time.time())
+        with self._lock:
+            self.list_entry.append(entry)
+            if self.path is not None:
+                directory = os.path.dirname(self.path)
+                if directory and not os.path.exists(directory):
+                    os.makedirs(directory, exist_ok=True)
+                with open(self.path, "a") as f:
+                    f.write(json.dumps(entry, default=str) + "\n")
+
+    def read(self):
+        """return the entries of the json lines file, or the entries in memory if there is no file"""
+        if self.path is None or not os.path.exists(self.path):
+            return list(self.list_entry)
+        with open(self.path) as f:
+            return [json.loads(line) for line in f if line.strip()]
+
+    def get_report(self, list_entry=None, n_slowest=5):
+        """
+        Summarize the metrics
+
+        Parameters
+        ----------
+        list_entry : list
+            The entries to summarize default None the entries written by this instance, the entries of the previous
+            runs are given by read
+        n_slowest : int
+            The number of slowest chunks reported default is 5
+
+        Returns
+        -------
+        report : dict
+            networks: for each network the number of chunks, failed chunks, split queries, addresses, rows, bytes,
+            the total query and export seconds, the rows per second of query and the rows per second of wall time.
+            slowest_chunks: the n_slowest chunks by query latency
+        """
+        if list_entry is None:
+            with self._lock:
+                list_entry = list(self.list_entry)
+        dict_network = {}
+        for entry in list_entry:
+            stats = dict_network.setdefault(entry["network"], {
+                'n_chunks': 0, 'n_failed': 0, 'n_split': 0, 'n_address': 0, 'n_rows': 0, 'bytes': 0,
+                'query_seconds': 0.0, 'export_seconds': 0.0, 'retries': 0, 'started_at': None, 'ended_at': None})
+            stats['query_seconds'] += entry.get("query_seconds", 0)
+            stats['retries'] += entry.get("retries", 0)
+            if entry["status"] == "split":
+                stats['n_split'] += 1
+                continue
+            stats['n_chunks'] += 1
+            stats['n_failed'] += entry["status"] == "failed"
+            stats['n_address'] += entry.get("n_address", 0)
+            stats['n_rows'] += entry.get("n_rows", 0)
+            stats['bytes'] += entry.get("bytes", 0)
+            stats['export_seconds'] += entry.get("export_seconds", 0)
+            if "query_started_at" in entry:
+                started_at = entry["query_started_at"]
+                stats['started_at'] = started_at if stats['started_at'] is None else min(stats['started_at'],
+                                                                                         started_at)
+            stats['ended_at'] = entry["created_at"] if stats['ended_at'] is None else max(stats['ended_at'],
+                                                                                           entry["created_at"])
+        for stats in dict_network.values():
+            started_at = stats.pop('started_at')
+            ended_at = stats.pop('ended_at')
+            stats['wall_seconds'] = ended_at - started_at if started_at is not None and ended_at is not None else 0.0
+            stats['rows_per_second'] = stats['n_rows'] / stats['query_seconds'] if stats['query_seconds'] else 0.0
+            stats['rows_per_wall_second'] = stats['n_rows'] / stats['wall_seconds'] if stats['wall_seconds'] else 0.0
+        list_slowest = sorted((entry for entry in list_entry if entry["status"] != "split"),
+                              key=lambda entry: entry.get("query_seconds", 0), reverse=True)[:n_slowest]
+        return {'networks': dict_network, 'slowest_chunks': list_slowest}
+
+    def print_report(self, list_entry=None, n_slowest=5):
+        """print the report of get_report"""
+        report = self.get_report(list_entry, n_slowest)
+        for network, stats in report['networks'].items():
+            print(f"{network}: {stats['n_rows']} rows of {stats['n_address']} addresses in {stats['n_chunks']} chunks "
+                  f"({stats['n_failed']} failed, {stats['n_split']} split, {stats['retries']} retries), "
+                  f"{stats['rows_per_second']:.0f} rows/s of query, {stats['rows_per_wall_second']:.0f} rows/s, "
+                  f"{stats['export_seconds']:.1f} s of export")
+        for entry in report['slowest_chunks']:
+            print(f"slow chunk {entry['network']} {entry['start_index']} - {entry['end_index']}: "
+                  f"{entry.get('query_seconds', 0):.1f} s for {entry.get('n_rows', 0)} rows, "
+                  f"{entry.get('n_pages', 0)} pages, split depth {entry.get('split_depth', 0)}")
@@ -1,14 +1,27 @@
-import os
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
 
 import numpy as np
 import pandas as pd
 from flipside import Flipside
 
+from sbscorer.sbdata.ChunkScheduler import ChunkScheduler
+from sbscorer.sbdata.ChunkSizer import ChunkSizer
+from sbscorer.sbdata.ExtractionJournal import ExtractionJournal
+from sbscorer.sbdata.ExtractionMetrics import ExtractionMetrics
+from sbscorer.sbdata.LabelStore import LabelStore
+from sbscorer.sbdata.NetworkRegistry import NETWORK_REGISTRY, REQUIRED_COLUMNS
+from sbscorer.sbdata.QueryCache import QueryCache
+from sbscorer.sbdata.RetryPolicy import LIST_SIZE_ERROR, RetryPolicy, classify_error
+from sbscorer.sbdata.TransactionSink import CsvSink, ParquetSink
+# re-exported for backward compatibility, they were defined in this module before the transaction sinks
+from sbscorer.sbdata.TransactionSink import get_address_rows, save_csv  # noqa: F401 pylint: disable=unused-import
 
-def save_csv(df, path_to_export, csv_file):
-    if not os.path.exists(path_to_export):
-        os.makedirs(path_to_export)
-    df.to_csv(csv_file, index=False)
+LIST_NETWORK = NETWORK_REGISTRY.get_names()
+# the network of the tasks of an extraction querying all the networks in one UNION ALL query
+UNION_NETWORK = "union"
 
 
 class FlipsideApi(object):
@@ -18,7 +31,9 @@ class FlipsideApi(object):
     """
 
     def __init__(self, api_key, max_age_minutes=30, ttl=30, timeout_minutes=5, retry_interval=1, page_size=100000,
-                 page_number=1, max_address=100, cached=True):
+                 page_number=1, max_address=100, cached=True, max_workers=1, max_workers_per_network=None,
+                 page_workers=4, chunk_sizer=None, export_workers=4, query_cache=None, backend=None, retry_policy=None,
+                 network_registry=None, metrics=None):
         """
         Init method of FlipsideApi
         Parameters
@@ -41,11 +56,37 @@ class FlipsideApi(object):
             If the query should be cached default is True. If you query several page it will run faster
         retry_interval : int
             The retry interval in seconds default is 1
+        max_workers : int
+            The number of queries kept in flight during an extraction default is 1, ie chunks are queried one by one
+        max_workers_per_network : int
+            The maximum number of queries in flight on the same network, default None is max_workers
+        page_workers : int
+            The number of pages of a query fetched concurrently default is 4
+        chunk_sizer : ChunkSizer or str
+            The ChunkSizer choosing the number of addresses of each query from the statistics of the previous queries,
+            or the path of the json file of its statistics. Default None, the queries have max_address addresses
+        export_workers : int
+            The number of threads writing the csv files of a chunk default is 4
+        query_cache : QueryCache or str
+            The QueryCache storing the results on disk, or its directory. Default None, only the flipside cache is used
+        backend : QueryBackend
+            The engine executing the queries, for example a SqliteBackend to run the extraction offline. Default None
+            the queries are executed by flipside with the api_key
+        retry_policy : RetryPolicy
+            The policy retrying the flipside calls that failed with a rate limit or a transient error. Default None a
+            RetryPolicy with 3 retries and without rate limiter
+        network_registry : NetworkRegistry
+            The tables and columns of the networks default None is NETWORK_REGISTRY
+        metrics : ExtractionMetrics or str
+            The ExtractionMetrics recording the metrics of each chunk, or the path of its json lines file. Default None
+            the metrics are not recorded
         """
         self.api_key = api_key
 
-        # Initialize `FlipsideApi`
-        self.sdk = Flipside(api_key)
+        # Initialize `FlipsideApi`, the sdk can be replaced by any QueryBackend
+        if backend is None:
+            backend = Flipside(api_key)
+        self.sdk = backend
         self.MAX_AGE_MINUTES = max_age_minutes
         # return up to 100,000 results per GET request on the query id
         self.PAGE_SIZE = page_size
@@ -68,10 +109,91 @@ class FlipsideApi(object):
         self.RETRY_INTERVAL_SECONDS = retry_interval
         # The max output size of flipside
         self.MAX_ROWS = 1000000  # 1 million is the max output size of flipside not true anymore its 1 GB
-
-    def execute_query(self, sql):
+        # Number of queries in flight, most of the extraction time is spent waiting for flipside
+        self.MAX_WORKERS = max_workers
+        self.MAX_WORKERS_PER_NETWORK = max_workers_per_network
+        # Number of pages of a result fetched concurrently once the number of pages is known
+        self.PAGE_WORKERS = page_workers
+        # Above this number of addresses the IN lists of the transactions queries read a common table expression
+        self.MAX_INLINE_ADDRESS = 20
+        # Adaptive number of addresses per query
+        if isinstance(chunk_sizer, str):
+            chunk_sizer = ChunkSizer(chunk_sizer, initial_size=max_address)
+        self.chunk_sizer = chunk_sizer
+        # Number of threads writing the files of the addresses
+        self.EXPORT_WORKERS = export_workers
+        # Max difference between the watermarks of the addresses queried together in an incremental extraction
+        self.WATERMARK_TOLERANCE = np.timedelta64(1, "D")
+        # Local cache of the results, a rerun does not query flipside
+        if isinstance(query_cache, str):
+            query_cache = QueryCache(query_cache)
+        self.query_cache = query_cache
+        # Retry of the transient errors, the timeouts are not retried but split into smaller queries
+        if retry_policy is None:
+            retry_policy = RetryPolicy()
+        self.retry_policy = retry_policy
+        # Networks whose transactions can be queried
+        if network_registry is None:
+            network_registry = NETWORK_REGISTRY
+        self.network_registry = network_registry
+        # Metrics of the chunks of the extractions
+        if isinstance(metrics, str):
+            metrics = ExtractionMetrics(metrics)
+        self.metrics = metrics
+
+    def execute_query(self, sql, use_cache=True):
         """
         Execute a query and return a pandas dataframe, it will automatically query all the pages using class parameters.
+        When the query returns its page stats the remaining pages are fetched concurrently by page_workers threads.
+        If a query_cache is set the results are read from it, and the successful results are added to it.
+        Parameters
+        ----------
+        sql : str
+            The sql query to execute
+        use_cache : bool
+            If False the query_cache is bypassed, for the queries whose result changes over time. Default is True
+
+        Returns
+        -------
+        df : pandas dataframe
+            The dataframe containing the results of the query. Its attrs hold the query_id, and the error if the query
+            or one of its pages failed
+
+        """
+        query_cache = self.query_cache if use_cache else None
+        if query_cache is not None:
+            key = self.get_cache_key(sql)
+            df = query_cache.get(key)
+            if df is not None:
+                df.attrs["cached"] = True
+                return df
+        df = self.execute_query_flipside(sql)
+        if query_cache is not None and "error" not in df.attrs:
+            self.query_cache.put(key, df)
+        return df
+
+    def get_cache_key(self, sql):
+        """
+        Get the key of a query in the query_cache, it includes the parameters of the api changing its result: the max
+        age of the flipside results, if they are cached by flipside, and the page size since a result of MAX_ROWS rows
+        is truncated
+        Parameters
+        ----------
+        sql : str
+            The sql query
+
+        Returns
+        -------
+        key : str
+            The key of the query
+        """
+        return self.query_cache.get_key(sql, {'max_age_minutes': self.MAX_AGE_MINUTES,
+                                              'cached': self.CACHED,
+                                              'page_size': self.PAGE_SIZE})
+
+    def execute_query_flipside(self, sql):
+        """
+        Execute a query on flipside, see execute_query
         Parameters
         ----------
         sql : str
@@ -83,51 +205,183 @@ class FlipsideApi(object):
             The dataframe containing the results of the query
 
         """
+        counter = {'retries': 0}
+        list_df = list(self.iter_query(sql, counter))
+        df = pd.concat(list_df)
+        df.attrs["query_id"] = list_df[0].attrs.get("query_id")
+        df.attrs["n_pages"] = len(list_df)
+        df.attrs["retries"] = counter['retries']
+        if "error" in list_df[-1].attrs:
+            df.attrs["error"] = list_df[-1].attrs["error"]
+            df.attrs["error_type"] = list_df[-1].attrs["error_type"]
+        if df.shape[0] == self.MAX_ROWS:
+            print("WARNING: the query is probably not returning all the results, you should decrease the max_address")
+        return df
+
+    def iter_query(self, sql, counter=None):
+        """
+        Execute a query on flipside and yield the pages of its results as they arrive, in order.
+        When the query returns its page stats the next page_workers pages are fetched ahead, so the memory is bounded
+        by a few pages whatever the size of the results.
+        The iteration stops after a failed page, it is an empty dataframe whose attrs hold the error and its type.
+
+        Parameters
+        ----------
+        sql : str
+            The sql query to execute
+        counter : dict
+            A dict counting the retries of the query and of its pages, see RetryPolicy.call. Default None
+
+        Returns
+        -------
+        iterator : iterator
+            The dataframes of the pages, their attrs hold the query_id
+        """
         page_number = 1
 
         try:
-            query_result_set = self.sdk.query(sql,
-                                              max_age_minutes=self.MAX_AGE_MINUTES,
-                                              page_size=self.PAGE_SIZE,
-                                              page_number=page_number,
-                                              timeout_minutes=self.TIMEOUT_MINUTES,
-                                              ttl_minutes=self.TTL_MINUTES,
-                                              cached=self.CACHED,
-                                              retry_interval_seconds=self.RETRY_INTERVAL_SECONDS)
+            query_result_set = self.retry_policy.call(self.sdk.query, sql, counter=counter,
+                                                      max_age_minutes=self.MAX_AGE_MINUTES,
+                                                      page_size=self.PAGE_SIZE,
+                                                      page_number=page_number,
+                                                      timeout_minutes=self.TIMEOUT_MINUTES,
+                                                      ttl_minutes=self.TTL_MINUTES,
+                                                      cached=self.CACHED,
+                                                      retry_interval_seconds=self.RETRY_INTERVAL_SECONDS)
 
         except Exception as e:
             print(e)
             print(sql)
-            return pd.DataFrame()  # return empty dataframe
+            yield self.get_error_df(e)
+            return
 
+        query_id = query_result_set.query_id
         df = pd.DataFrame(query_result_set.records)
-        df_size = df.shape[0]
-        list_df = [df]
-        while df_size == self.PAGE_SIZE:
-            try:
-                page_results = self.sdk.get_query_results(
-                    query_result_set.query_id,
-                    page_number=page_number,
-                    page_size=self.PAGE_SIZE)
-                df = pd.DataFrame(page_results.records)
-                df_size = df.shape[0]
+        df.attrs["query_id"] = query_id
+        total_pages = self.get_total_pages(query_result_set)
+        yield df
+        if total_pages is not None:
+            # the number of pages is known, the next pages are fetched concurrently and yielded in order
+            list_page = iter(range(page_number + 1, total_pages + 1))
+            with ThreadPoolExecutor(max_workers=self.PAGE_WORKERS) as pool:
+                pending = deque(pool.submit(self.get_page, query_id, page, counter)
+                                for page in islice(list_page, self.PAGE_WORKERS))
+                while pending:
+                    df = pending.popleft().result()
+                    for page in islice(list_page, 1):
+                        pending.append(pool.submit(self.get_page, query_id, page, counter))
+                    yield df
+                    if "error" in df.attrs:
+                        for future in pending:
+                            future.cancel()
+                        return
+        else:
+            while df.shape[0] == self.PAGE_SIZE:
+                page_number += 1
+                df = self.get_page(query_id, page_number, counter)
+                yield df  # a failed page is empty and stops the loop
 
-            except Exception as e:
-                print(e)
-                print(f'failed on page {page_number}')
-                df_size = 0  # break the loop
+    def execute_query_stream(self, sql, consumer):
+        """
+        Execute a query and feed each page of its results to a consumer as it arrives, instead of concatenating them.
+        It is meant for the large results, the consumer writes or reduces the pages. If a query_cache is set the
+        cached result is fed as a single page, the streamed results are not added to the cache.
 
-            page_number += 1
-            list_df.append(df)
+        Parameters
+        ----------
+        sql : str
+            The sql query to execute
+        consumer : callable
+            A function taking the dataframe of a page, it is called for each non-empty page in order
 
-        df = pd.concat(list_df)
-        if df.shape[0] == self.MAX_ROWS:
+        Returns
+        -------
+        stats : dict
+            The query_id, the number of pages and rows fed to the consumer and the error and its type if the query or
+            one of its pages failed
+        """
+        stats = {'query_id': None, 'n_pages': 0, 'n_rows': 0}
+        df_cached = None
+        if self.query_cache is not None:
+            df_cached = self.query_cache.get(self.get_cache_key(sql))
+        list_df = [df_cached] if df_cached is not None else self.iter_query(sql)
+        for df in list_df:
+            stats['query_id'] = df.attrs.get("query_id", stats['query_id'])
+            if "error" in df.attrs:
+                stats['error'] = df.attrs["error"]
+                stats['error_type'] = df.attrs["error_type"]
+            if df.shape[0] > 0:
+                consumer(df)
+                stats['n_pages'] += 1
+                stats['n_rows'] += df.shape[0]
+        if stats['n_rows'] == self.MAX_ROWS:
             print("WARNING: the query is probably not returning all the results, you should decrease the max_address")
+        return stats
+
+    @staticmethod
+    def get_total_pages(query_result_set):
+        """
+        Get the number of pages of a query from its page stats
+
+        Parameters
+        ----------
+        query_result_set : QueryResultSet
+            The result of the first page of the query
+
+        Returns
+        -------
+        total_pages : int
+            The number of pages or None if the query did not return page stats
+        """
+        page = getattr(query_result_set, "page", None)
+        if page is None or getattr(page, "totalPages", None) is None:
+            return None
+        return page.totalPages
+
+    def get_page(self, query_id, page_number, counter=None):
+        """
+        Get a page of the results of a query
+
+        Parameters
+        ----------
+        query_id : str
+            The id of the query returned by the first page
+        page_number : int
+            The page to get
+        counter : dict
+            A dict counting the retries of the query, see RetryPolicy.call. Default None
+
+        Returns
+        -------
+        df : pandas dataframe
+            The dataframe containing the rows of the page, empty if the page failed
+        """
+        try:
+            page_results = self.retry_policy.call(self.sdk.get_query_results, query_id, counter=counter,
+                                                  page_number=page_number,
+                                                  page_size=self.PAGE_SIZE)
+        except Exception as e:
+            print(e)
+            print(f'failed on page {page_number}')
+            return self.get_error_df(e)
+        return pd.DataFrame(page_results.records)
+
+    @staticmethod
+    def get_error_df(error):
+        """return an empty dataframe whose attrs hold the error and its type, see RetryPolicy.classify_error"""
+        df = pd.DataFrame()
+        df.attrs["error"] = str(error)
+        df.attrs["error_type"] = classify_error(error)
         return df
 
-    def extract_transactions(self, extract_dir, array_address):
+    def extract_transactions(self, extract_dir, array_address, list_network=None, resume=False, incremental=False,
+                             sink="csv", columns=None, union=False):
         """
         Extract the transactions contained in array_address for all the networks and save them to csv in the extract_dir
+        The chunks of all the networks are queried concurrently, up to max_workers queries in flight and
+        max_workers_per_network per network.
+        Each exported chunk is recorded in the journal of its network in extract_dir/_journal, a chunk whose query
+        raised is recorded as failed without writing its rows and the extraction goes on.
 
         Parameters
         ----------
@@ -135,6 +389,28 @@ class FlipsideApi(object):
             The directory where to save the csv files
         array_address : array
             The array of addresses to extract
+        list_network : list
+            The networks to extract default None is all the supported networks
+        resume : bool
+            If True the chunks recorded as done in the journals are skipped and the failed ones are retried, the
+            array_address must be the same as the interrupted extraction. Default is False
+        incremental : bool
+            If True only the transactions newer than the last block_timestamp of the csv of each address are queried
+            and appended to the csv. The addresses are sorted by watermark so the addresses with similar watermarks
+            are queried together. An interrupted incremental extraction is resumed by running it again, so it can not
+            be used with resume. Its queries bypass the query_cache, a refresh returning nothing new would otherwise
+            send the same query again on the next run and read its cached empty result. Default is False
+        sink : str or callable
+            The output of the transactions, "csv" default writes a csv per address in extract_dir/network, "parquet"
+            writes the parquet store of each network in extract_dir/_parquet/network which LoadData reads. A callable
+            taking extract_dir and network and returning a TransactionSink can also be given
+        columns : list
+            The columns to retrieve, see NetworkRegistry.TRANSACTION_COLUMNS, the columns needed to export the
+            transactions are always retrieved. Default None all the columns
+        union : bool
+            If True each chunk of addresses is queried on all the networks in a single UNION ALL query, its result is
+            split by network. It can not be used with incremental, the watermarks differ between the networks.
+            Default is False, each network is queried separately
 
         Returns
         -------
@@ -142,45 +418,430 @@ class FlipsideApi(object):
             Create csv files in the extract_dir
 
         """
-        list_network = ["ethereum", "polygon",
-                        "arbitrum", "avalanche", "gnosis", "optimism"]
+        if resume and incremental:
+            raise ValueError("An incremental extraction is resumed by running it again, it can not use resume")
+        if union and incremental:
+            raise ValueError("An incremental extraction queries each network from its watermarks, it can not use union")
+        if list_network is None:
+            list_network = self.network_registry.get_names()
+        if columns is not None:
+            columns = list(columns) + REQUIRED_COLUMNS
+        array_address = np.asarray(array_address)
+        dict_sink = {network: self.get_sink(sink, extract_dir, network) for network in list_network}
+        dict_address = {}
+        dict_watermark = {}
         for network in list_network:
-            self.extract_transactions_net(extract_dir, array_address, network)
+            dict_sink[network].open(keep=resume or incremental)
+            if incremental:
+                watermarks = dict_sink[network].get_watermarks(array_address)
+                order = np.argsort(watermarks, kind="stable")  # the addresses without transactions are last
+                dict_address[network] = array_address[order]
+                dict_watermark[network] = watermarks[order]
+            else:
+                dict_address[network] = array_address
+                dict_watermark[network] = None
+        dict_journal = {network: ExtractionJournal(extract_dir, network) for network in list_network}
+        dict_done_mask = {network: dict_journal[network].start(dict_address[network], resume)
+                          for network in list_network}
+        if union:
+            # a chunk is queried again if one of its networks is not done
+            dict_address[UNION_NETWORK] = array_address
+            dict_watermark[UNION_NETWORK] = None
+            dict_tasks = {UNION_NETWORK: self.get_tasks(len(array_address), UNION_NETWORK,
+                                                        np.logical_and.reduce(list(dict_done_mask.values())))}
+        else:
+            dict_tasks = {network: self.get_tasks(len(array_address), network, dict_done_mask[network],
+                                                  dict_watermark[network])
+                          for network in list_network}
+
+        def fetch_chunk(task):
+            network, start_index, end_index = task
+            since = None if dict_watermark[network] is None else dict_watermark[network][start_index]
+            query_network = list_network if network == UNION_NETWORK else network
+            try:
+                return self.fetch_split(dict_address[network], start_index, end_index,
+                                        lambda array_slice: self.get_transactions(array_slice, query_network, since,
+                                                                                  columns, use_cache=not incremental),
+                                        network)
+            except Exception as e:
+                print(e)
+                return e
+
+        list_failed = []
+
+        def export_network(network, start_index, end_index, df):
+            journal = dict_journal[network]
+            files = []
+            start_time = time.perf_counter()
+            # the rows of a failed chunk are not written, they may miss the rows of a failed page and an incremental
+            # extraction would move the watermarks of its addresses past the missing rows
+            if df.shape[0] > 0 and "error" not in df.attrs:
+                watermarks = None
+                if dict_watermark[network] is not None:
+                    watermarks = dict_watermark[network][start_index:end_index]
+                np_address = np.char.lower(dict_address[network][start_index:end_index].astype(str))
+                files = dict_sink[network].write(df, np_address, watermarks)
+            self.write_metrics(df, network, time.perf_counter() - start_time, len(files))
+            if "error" in df.attrs:
+                # the query or one of its pages failed, the chunk is retried on resume
+                journal.write_failed(start_index, end_index, df.attrs["error"])
+                list_failed.append((network, start_index, end_index))
+            else:
+                journal.write_done(start_index, end_index, df.shape[0], df.attrs.get("query_id"), files)
+
+        def export_chunk(task, list_result):
+            network, start_index, end_index = task
+            list_task_network = list_network if network == UNION_NETWORK else [network]
+            if isinstance(list_result, Exception):
+                for task_network in list_task_network:
+                    dict_journal[task_network].write_failed(start_index, end_index, list_result)
+                    list_failed.append((task_network, start_index, end_index))
+                    if self.metrics is not None:
+                        self.metrics.write({'network': task_network, 'start_index': start_index,
+                                            'end_index': end_index, 'n_address': end_index - start_index,
+                                            'status': "failed", 'error_type': classify_error(list_result)})
+                return
+            for start_index, end_index, df in list_result:
+                if network == UNION_NETWORK:
+                    for task_network in list_network:
+                        export_network(task_network, start_index, end_index, self.get_network_df(df, task_network))
+                else:
+                    export_network(network, start_index, end_index, df)
+
+        n_entry = 0 if self.metrics is None else len(self.metrics.list_entry)
+        scheduler = ChunkScheduler(self.MAX_WORKERS, self.MAX_WORKERS_PER_NETWORK)
+        try:
+            scheduler.run(ChunkScheduler.interleave(dict_tasks), fetch_chunk, export_chunk)
+        finally:
+            for network_sink in dict_sink.values():
+                network_sink.close()
+            # the statistics learnt before an interruption are kept
+            if self.chunk_sizer is not None:
+                self.chunk_sizer.save()
+        if self.metrics is not None:
+            self.metrics.print_report(self.metrics.list_entry[n_entry:])
+        if list_failed:
+            if incremental:
+                print(f"WARNING: {len(list_failed)} chunks failed, run the incremental extraction again to retry them")
+            else:
+                print(f"WARNING: {len(list_failed)} chunks failed, run again with resume=True to retry them")
 
-    def extract_data_flipside(self, array_address, sql_template):
+    def get_sink(self, sink, extract_dir, network):
+        """
+        Get the TransactionSink of a network
 
-        q, r = divmod(len(array_address), self.MAX_ADDRESS)
-        if r != 0:
-            q += 1
-        list_df = []
-        for i in range(q):
-            start_index = i * self.MAX_ADDRESS
-            end_index = (i + 1) * self.MAX_ADDRESS
-            print(
-                f"Extracting for address: {start_index} - {end_index}")
-            array_address_slice = array_address[start_index:end_index]
-            str_address_slice = self.get_string_address(array_address_slice)
-            sql = sql_template % (str_address_slice, str_address_slice)
-            df = self.execute_query(sql=sql)
+        Parameters
+        ----------
+        sink : str or callable
+            "csv", "parquet" or a callable taking extract_dir and network and returning a TransactionSink
+        extract_dir : str
+            The directory of the extraction
+        network : str
+            The network of the sink
+
+        Returns
+        -------
+        sink : TransactionSink
+            The sink of the network
+        """
+        if sink == "csv":
+            return CsvSink(extract_dir, network, self.EXPORT_WORKERS)
+        if sink == "parquet":
+            return ParquetSink(extract_dir, network)
+        if callable(sink):
+            return sink(extract_dir, network)
+        raise ValueError(f"Sink not supported: {sink}")
+
+    def get_chunks(self, len_address, network=None, start_index=0):
+        """
+        Get the start and end index of the chunks of addresses, the chunks have MAX_ADDRESS addresses or the size given
+        by the chunk_sizer for the network. The chunks are generated lazily so each chunk uses the latest statistics.
+        Parameters
+        ----------
+        len_address : int
+            The end index of the last chunk
+        network : str
+            The network of the chunks
+        start_index : int
+            The start index of the first chunk default is 0
 
-            if df.shape[0] == 0 or df.shape == self.MAX_ROWS:  # retry with smaller query timeout or max rows
-                self.extract_data_flipside_rec(array_address, sql_template, start_index, end_index)
+        Returns
+        -------
+        chunks : generator
+            The generator of (start_index, end_index)
+        """
+        while start_index < len_address:
+            if self.chunk_sizer is None:
+                chunk_size = self.MAX_ADDRESS
             else:
-                list_df.append(df)
+                chunk_size = self.chunk_sizer.get_chunk_size(network)
+            end_index = min(start_index + chunk_size, len_address)
+            yield start_index, end_index
+            start_index = end_index
+
+    def get_tasks(self, len_address, network, done_mask=None, watermarks=None):
+        """
+        Get the tasks of the ChunkScheduler for a network
+
+        Parameters
+        ----------
+        len_address : int
+            The number of addresses
+        network : str
+            The network of the tasks
+        done_mask : np.ndarray
+            The boolean mask of the addresses already extracted, they are skipped. Default None nothing is skipped
+        watermarks : np.ndarray
+            The sorted watermarks of the addresses, a chunk only has addresses whose watermark is within
+            WATERMARK_TOLERANCE of its first one. Default None
+
+        Returns
+        -------
+        tasks : generator
+            The generator of (network, start_index, end_index)
+        """
+        # the contiguous ranges of addresses with the same label are chunked, the addresses done are skipped
+        label = np.zeros(len_address, dtype=np.int64)
+        if watermarks is not None:
+            label = self.get_watermark_groups(watermarks)
+        if done_mask is not None:
+            label[done_mask] = -1
+        edges = np.flatnonzero(np.diff(label)) + 1
+        for range_start, range_end in zip(np.concatenate(([0], edges)), np.concatenate((edges, [len_address]))):
+            if range_start < range_end and label[range_start] != -1:
+                for start_index, end_index in self.get_chunks(int(range_end), network, int(range_start)):
+                    yield network, start_index, end_index
+
+    def get_watermark_groups(self, watermarks):
+        """
+        Get the groups of the sorted watermarks, a new group starts when a watermark is more than WATERMARK_TOLERANCE
+        after the first watermark of the group. The missing watermarks are in their own group.
+
+        Parameters
+        ----------
+        watermarks : np.ndarray
+            The sorted datetime64 watermarks
+
+        Returns
+        -------
+        groups : np.ndarray
+            The group of each watermark
+        """
+        groups = np.zeros(len(watermarks), dtype=np.int64)
+        group = 0
+        group_start = None
+        mask_nat = np.isnat(watermarks)
+        for i in np.flatnonzero(~mask_nat):
+            if group_start is None or watermarks[i] - group_start > self.WATERMARK_TOLERANCE:
+                group += 1
+                group_start = watermarks[i]
+            groups[i] = group
+        groups[mask_nat] = group + 1
+        return groups
+
+    def fetch_split(self, array_address, start_index, end_index, get_df, network=None, split_depth=0):
+        """
+        Query the addresses between start_index and end_index, if the query fails because of its size (timeout or row
+        cap) or hits the max rows the slice is split and each part is queried again. The slice is split in two, or in
+        chunks of the size given by the chunk_sizer which has learnt from the failure when it is smaller than half the
+        slice.
+        The other failures, for example a rate limit that outlasted the retries of the retry_policy, are not split.
+
+        Parameters
+        ----------
+        array_address : array
+            The array of addresses to extract
+        start_index : int
+            The start index of the array_address
+        end_index : int
+            The end index of the array_address
+        get_df : callable
+            A function taking a slice of addresses and returning the dataframe of the query
+        network : str
+            The network of the query, used for the statistics of the chunk_sizer
+        split_depth : int
+            The number of splits of the chunk of the slice default is 0
+
+        Returns
+        -------
+        list_result : list
+            The list of (start_index, end_index, df) of the queries, in the order of the addresses. The attrs of the
+            df of a failed query hold the error, and the attrs of each df hold the metrics of its query
+        """
+        print(f"Extracting for address: {start_index} - {end_index}")
+        if self.chunk_sizer is not None:
+            generation = self.chunk_sizer.get_generation(network)
+        query_started_at = time.time()
+        start_time = time.perf_counter()
+        df = get_df(array_address[start_index:end_index])
+        elapsed = time.perf_counter() - start_time
+        n_address = end_index - start_index
+        failed = (df.attrs.get("error_type") in LIST_SIZE_ERROR or df.shape[0] >= self.MAX_ROWS) and n_address > 1
+        if self.chunk_sizer is not None:
+            self.chunk_sizer.update(network, n_address, df.shape[0], elapsed, failed, generation)
+        if self.metrics is not None:
+            df.attrs["metrics"] = {'network': network, 'start_index': int(start_index), 'end_index': int(end_index),
+                                   'n_address': int(n_address), 'n_rows': int(df.shape[0]),
+                                   'bytes': int(df.memory_usage(index=False, deep=True).sum()),
+                                   'query_seconds': elapsed, 'query_started_at': query_started_at,
+                                   'n_pages': df.attrs.get("n_pages", 0), 'retries': df.attrs.get("retries", 0),
+                                   'split_depth': split_depth, 'cached': df.attrs.get("cached", False),
+                                   'query_id': df.attrs.get("query_id"), 'error_type': df.attrs.get("error_type")}
+            if failed:
+                self.metrics.write(dict(df.attrs["metrics"], status="split"))
+        if not failed:
+            return [(start_index, end_index, df)]
+        # retry with smaller query timeout or max rows
+        print("Retrying with smaller query")
+        # the slice is halved if the learnt size would query it again whole or almost
+        if self.chunk_sizer is None or self.chunk_sizer.get_chunk_size(network) >= n_address // 2:
+            end_first_slice = (start_index + end_index) // 2
+            list_chunk = [(start_index, end_first_slice), (end_first_slice, end_index)]
+        else:
+            list_chunk = list(self.get_chunks(end_index, network, start_index))
+        list_result = []
+        for chunk_start, chunk_end in list_chunk:
+            list_result.extend(self.fetch_split(array_address, chunk_start, chunk_end, get_df, network,
+                                                split_depth + 1))
+        return list_result
+
+    def extract_data_flipside(self, array_address, sql_template, consumer=None):
+        """
+        Extract the data of a sql template for the array of addresses by chunks of MAX_ADDRESS addresses.
+        The chunks are queried concurrently, up to max_workers queries in flight.
+
+        Parameters
+        ----------
+        array_address : array
+            The array of addresses to extract
+        sql_template : str
+            A sql query with two %s replaced by the list of addresses
+        consumer : callable
+            A function taking the dataframe of a chunk, it is called for each chunk in the order of the addresses as
+            soon as it is available. Default None the chunks are concatenated and returned
+
+        Returns
+        -------
+        df : pandas dataframe
+            The dataframe containing the results of all the chunks, None if a consumer is given
+        """
+        def get_df(array_address_slice):
+            str_address_slice = self.get_string_address(array_address_slice)
+            return self.execute_query(sql=sql_template % (str_address_slice, str_address_slice))
+
+        def fetch_chunk(task):
+            network, start_index, end_index = task
+            return self.fetch_split(array_address, start_index, end_index, get_df, network)
+
+        list_df = []
+        return_df = consumer is None
+        if return_df:
+            consumer = list_df.append
+
+        def export_chunk(task, list_result):
+            for _, _, df in list_result:
+                start_time = time.perf_counter()
+                consumer(df)
+                self.write_metrics(df, task[0], time.perf_counter() - start_time)
+
+        tasks = self.get_tasks(len(array_address), "default")
+        scheduler = ChunkScheduler(self.MAX_WORKERS, self.MAX_WORKERS_PER_NETWORK)
+        try:
+            scheduler.run(tasks, fetch_chunk, export_chunk)
+        finally:
+            if self.chunk_sizer is not None:
+                self.chunk_sizer.save()
+        if not return_df:
+            return None
         df = pd.concat(list_df)
         return df
 
-    def extract_data_flipside_rec(self, array_address, sql_template, start_index, end_index):
-        end_first_slice = (start_index + end_index) // 2
-        print("Retrying with smaller query")
-        list_df = [self.extract_data_flipside(array_address[:end_first_slice], sql_template),
-                   self.extract_data_flipside(array_address[end_first_slice:], sql_template)]
-        return pd.concat(list_df)
+    def extract_cross_chain_info(self, array_address, label_store, info_type="label"):
+        """
+        Extract the cross chain labels or tags of the addresses into a local label store.
+        Only the addresses missing from the store are queried, by chunks of MAX_ADDRESS addresses (or of the size
+        given by the chunk_sizer) with up to max_workers queries in flight. Each chunk is stored as soon as it is
+        queried, the addresses of the failed chunks stay missing and are queried by the next call.
+
+        Parameters
+        ----------
+        array_address : array
+            The array of addresses, for example the counterparties of the transactions
+        label_store : LabelStore or str
+            The LabelStore or the path of its database
+        info_type : str
+            The type of info to extract. It can be "label" or "tag"
+
+        Returns
+        -------
+        df : pandas dataframe
+            The rows of the store for the addresses of array_address
+        """
+        if isinstance(label_store, str):
+            label_store = LabelStore(label_store)
+        np_address = label_store.get_missing(array_address, info_type)
+        print(f"Extracting {info_type}s for {len(np_address)} new addresses")
+
+        def get_df(array_address_slice):
+            return self.execute_query(self.get_cross_chain_info_sql_query(array_address_slice, info_type))
+
+        def fetch_chunk(task):
+            network, start_index, end_index = task
+            return self.fetch_split(np_address, start_index, end_index, get_df, network)
+
+        list_failed = []
+
+        def export_chunk(task, list_result):
+            for start_index, end_index, df in list_result:
+                if "error" in df.attrs:
+                    list_failed.append(task)
+                else:
+                    start_time = time.perf_counter()
+                    label_store.put(df, np_address[start_index:end_index], info_type)
+                    self.write_metrics(df, task[0], time.perf_counter() - start_time)
+
+        scheduler = ChunkScheduler(self.MAX_WORKERS, self.MAX_WORKERS_PER_NETWORK)
+        try:
+            scheduler.run(self.get_tasks(len(np_address), info_type), fetch_chunk, export_chunk)
+        finally:
+            if self.chunk_sizer is not None:
+                self.chunk_sizer.save()
+        if list_failed:
+            print(f"WARNING: {len(list_failed)} chunks failed, run again to query their addresses")
+        return label_store.get(array_address, info_type)
+
+    def write_metrics(self, df, network, export_seconds, n_files=0):
+        """
+        Record the metrics of an exported chunk in the metrics, see ExtractionMetrics
 
-    def extract_transactions_net(self, extract_dir, array_address, network):
+        Parameters
+        ----------
+        df : pandas dataframe
+            The result of fetch_split whose attrs hold the metrics of its query
+        network : str
+            The network of the chunk, a network of a UNION ALL query has its own entry
+        export_seconds : float
+            The time spent exporting the chunk
+        n_files : int
+            The number of files written default is 0
+        """
+        if self.metrics is None or "metrics" not in df.attrs:
+            return
+        query_network = df.attrs["metrics"]["network"]
+        entry = dict(df.attrs["metrics"], network=network, export_seconds=export_seconds, n_files=n_files,
+                     status="failed" if "error" in df.attrs else "done")
+        if network != query_network:
+            # the rows of the network in the result of a UNION ALL query, the query metrics are shared
+            entry.update(query_network=query_network, n_rows=int(df.shape[0]),
+                         bytes=int(df.memory_usage(index=False, deep=True).sum()))
+        self.metrics.write(entry)
+
+    def extract_transactions_net(self, extract_dir, array_address, network, resume=False, incremental=False,
+                                 sink="csv"):
         """
         Extract the transactions contained in array_address for the network and save them to csv in the extract_dir
         Each csv is named as eoa_tx.csv and is stored in a folder named after the network
+        The chunks are queried concurrently, up to max_workers queries in flight.
 
         Parameters
         ----------
@@ -190,6 +851,12 @@ class FlipsideApi(object):
             The array of addresses to extract
         network : str
             The network to extract the transactions from
+        resume : bool
+            If True the chunks recorded as done in the journal are skipped default is False
+        incremental : bool
+            If True only the transactions newer than the csv of each address are queried and appended default is False
+        sink : str or callable
+            The output of the transactions, "csv" default or "parquet", see extract_transactions
 
         Returns
         -------
@@ -198,25 +865,9 @@ class FlipsideApi(object):
 
         """
         print("Extracting transactions for network: ", network)
-        len_address = len(array_address)
-        q, r = divmod(len_address, self.MAX_ADDRESS)
-        if r != 0:
-            q += 1
-        for i in range(q):
-            start_index = i * self.MAX_ADDRESS
-            end_index = (i + 1) * self.MAX_ADDRESS
-            print(
-                f"Extracting transactions for address: {start_index} - {end_index}")
-            df = self.get_transactions(
-                array_address[start_index: end_index], network)
-            if df.shape[0] == 0 or df.shape == self.MAX_ROWS:  # retry with smaller query timeout or max rows
-                self.extract_transactions_rec(
-                    array_address, start_index, end_index, network, extract_dir)
-            else:
-                self.export_address(
-                    df, array_address[start_index: end_index], extract_dir, network)
+        self.extract_transactions(extract_dir, array_address, [network], resume, incremental, sink)
 
-    def get_transactions(self, array_address, network):
+    def get_transactions(self, array_address, network, since=None, columns=None, use_cache=True):
         """
         Get the transactions for the array of addresses and the network in a df
 
@@ -224,8 +875,15 @@ class FlipsideApi(object):
         ----------
         array_address : array
             The array of addresses to extract
-        network :str
-            The network to extract the transactions from
+        network : str or list
+            The network to extract the transactions from, or a list of networks queried together in a UNION ALL
+            query, the df then has a chain column and the native token value is named value
+        since : pd.Timestamp
+            Only the transactions after since are retrieved default None everything is retrieved
+        columns : list
+            The columns to retrieve, see NetworkRegistry.TRANSACTION_COLUMNS. Default None all the columns
+        use_cache : bool
+            If False the query_cache is bypassed default is True
 
         Returns
         -------
@@ -233,31 +891,47 @@ class FlipsideApi(object):
             The dataframe containing the transactions
 
         """
-        if network == "ethereum":
-            sql = self.get_eth_transactions_sql_query(array_address)
-        elif network == "polygon":
-            sql = self.get_polygon_transactions_sql_query(array_address)
-        elif network == "arbitrum":
-            sql = self.get_arbitrum_transactions_sql_query(array_address)
-        elif network == "avalanche":
-            sql = self.get_avalanche_transactions_sql_query(array_address)
-        elif network == "gnosis":
-            sql = self.get_gnosis_transactions_sql_query(array_address)
-        elif network == "optimism":
-            sql = self.get_optimism_transactions_sql_query(array_address)
-        else:
-            raise Exception("Network not supported")
-
-        df = self.execute_query(sql)
+        sql = self.get_transactions_sql_query(array_address, network, since=since, columns=columns)
+        df = self.execute_query(sql, use_cache)
         return df
 
+    def get_network_df(self, df, network):
+        """
+        Get the transactions of a network from the df of a UNION ALL query, with the columns of a query of the network
+
+        Parameters
+        ----------
+        df : pandas dataframe
+            The transactions of several networks with a chain column
+        network : str
+            The network
+
+        Returns
+        -------
+        df_network : pandas dataframe
+            The transactions of the network, the value column is named after the network and the attrs are kept
+        """
+        if "chain" not in df.columns:
+            # an empty result or a failed query
+            return df
+        df_network = df[df.chain == network].drop(columns="chain").reset_index(drop=True)
+        if "value" in df_network.columns:
+            value_column = self.network_registry.get(network).value_column
+            if value_column is None:
+                df_network = df_network.drop(columns="value")
+            else:
+                df_network = df_network.rename(columns={"value": value_column})
+        df_network.attrs = dict(df.attrs)
+        return df_network
+
     @staticmethod
-    def export_address(df, np_address, extract_dir, network):
+    def export_address(df, np_address, extract_dir, network, n_workers=4, watermarks=None):
         """
         Export the dataframe to a csv file
 
         Change the idea and exporting straight to an account based csv for easier csv manipulation from other tools
         If there is no transactions them the file is not created, creating empty file is useless.
+        The rows are grouped by sender and receiver in a single pass and the csv files are written by a thread pool.
         Parameters
         ----------
         df : pd.DataFrame
@@ -268,114 +942,95 @@ class FlipsideApi(object):
             Directory where to export the csv file
         network : str
             Network of the transactions
+        n_workers : int
+            The number of threads writing the csv files default is 4
+        watermarks : numpy.ndarray
+            The last block_timestamp of the csv of each address of np_address, only the newer transactions are appended
+            to the csv. Default None the csv files are written from scratch
 
         Returns
         -------
+        files : list
+            The list of the csv files written
 
         """
-        np_address = np.char.lower(np_address.astype(str))
-        for address in np_address:
-            df_address_transactions = df[np.logical_or(
-                df.from_address == address, df.to_address == address)]
-            path_to_export = os.path.join(extract_dir, network)
-            csv_file = os.path.join(path_to_export, f"{address}_tx.csv")
-            if df_address_transactions.shape[0] > 0:
-                save_csv(df_address_transactions, path_to_export, csv_file)
-            # else:
-            #     print(f"No transactions found for address {address}")
+        sink = CsvSink(extract_dir, network, n_workers)
+        return sink.write(df, np.char.lower(np_address.astype(str)), watermarks)
 
-    def extract_transactions_rec(self, array_address, start_index, end_index, network, extract_dir):
+    @staticmethod
+    def get_string_address(array_address):
         """
-        Recursive method to extract the transactions for the array of addresses and the network in a df
-        It is used to retry with smaller query if the query timeout or the max rows are reached
+        Get the string of the array of addresses to use in the sql query, the unique lower case addresses quoted and
+        separated by commas
         Parameters
         ----------
         array_address : array
-            The array of addresses to extract
-        start_index : int
-            The start index of the array_address
-        end_index : int
-            The end index of the array_address
-        network : str
-            The network to extract the transactions from
-        extract_dir : str
-            The directory where to save the csv files
 
         Returns
         -------
-        None
+        lower_str : str
+            The string to use in the sql query
 
         """
-        end_first_slice = (start_index + end_index) // 2
-        print("Retrying with smaller query")
-        self.extract_transactions_between_rec(
-            array_address, start_index, end_first_slice, network, extract_dir)
-        self.extract_transactions_between_rec(
-            array_address, end_first_slice, end_index, network, extract_dir)
+        # the addresses are lower cased once here rather than by a LOWER call per literal in the warehouse
+        lower_str = ",".join(f"'{address}'" for address in dict.fromkeys(str(add).lower() for add in array_address))
+        return lower_str
 
-    def extract_transactions_between_rec(self, array_address, start_index, end_index, network, extract_dir):
+    @staticmethod
+    def get_string_values(array_address):
         """
-        Recursive method to extract the transactions for the array of addresses and the network in a df
-        It is used to retry with smaller query if the query timeout or the max rows are reached
+        Get the VALUES rows of the array of addresses to use in a common table expression of the sql query
         Parameters
         ----------
         array_address : array
-            The array of addresses to extract
-        start_index : int
-            The start index of the array_address
-        end_index : int
-            The end index of the array_address
-        network : str
-            The network to extract the transactions from
-        extract_dir : str
-            The directory where to save the csv files
 
         Returns
         -------
-        None
+        values_str : str
+            The string of the rows ('0x...'),('0x...') of the unique lower case addresses
 
         """
-        print(
-            f"Extracting transactions for address: {start_index} - {end_index}")
-        df = self.get_transactions(array_address[start_index: end_index], network)
-        if df.shape[0] == 0:
-            # recursive call
-            print("Retrying with smaller query")
-            self.extract_transactions_rec(
-                array_address, start_index, end_index, network, extract_dir)
-        else:
-            self.export_address(
-                df, array_address[start_index: end_index], extract_dir, network)
+        values_str = ",".join(f"('{address}')" for address in dict.fromkeys(str(add).lower() for add in array_address))
+        return values_str
 
     @staticmethod
-    def get_string_address(array_address):
+    def get_string_since(since):
         """
-        Get the string of the array of addresses to use in the sql query
+        Get the condition on the block_timestamp to use after each condition on the addresses in the sql query, the
+        AND has precedence over the OR so it applies to both the sent and the received transactions
         Parameters
         ----------
-        array_address : array
+        since : pd.Timestamp
+            The timestamp after which the transactions are retrieved, None or NaT for all the transactions
 
         Returns
         -------
-        lower_str : str
-            The string to use in the sql query
-
+        string_since : str
+            The condition to use in the sql query
         """
-        lower_str = ""
-        for add in array_address:
-            lower_str += f'LOWER(\'{add}\'),'
-        lower_str = lower_str[:-1]
-        return lower_str
+        if since is None or pd.isna(since):
+            return ""
+        return f" AND BLOCK_TIMESTAMP > '{pd.Timestamp(since).strftime('%Y-%m-%d %H:%M:%S.%f')[:-3]}'"
 
-    def get_eth_transactions_sql_query(self, array_address, limit=0):
+    def get_transactions_sql_query(self, array_address, network, limit=0, since=None, columns=None):
         """
-        Get the sql query to extract the transactions for the array of addresses and ethereum network
+        Get the sql query to extract the transactions for the array of addresses from the table of the network in the
+        network_registry. Only the requested columns are selected. The addresses are lower cased on the client, above
+        MAX_INLINE_ADDRESS addresses they are written once in a VALUES common table expression used by all the IN.
+        If several networks are given their queries are folded into a single UNION ALL query, the native token value
+        is named value and a chain column holds the network of each transaction.
         Parameters
         ----------
         array_address : array
             The array of addresses to extract
+        network : str or list
+            The network, or the list of networks of a UNION ALL query
         limit : int
             The limit of the query default 0 everything is retrieved. The limit is the Keyword LIMIT in SQL.
+        since : pd.Timestamp
+            Only the transactions after since are retrieved default None everything is retrieved
+        columns : list
+            The columns to retrieve, see NetworkRegistry.TRANSACTION_COLUMNS. Default None all the columns
 
         Returns
         -------
@@ -383,36 +1038,51 @@ class FlipsideApi(object):
             The sql query to execute
 
         """
-        str_list_add = self.get_string_address(array_address)
+        if len(array_address) > self.MAX_INLINE_ADDRESS:
+            # the addresses are written once in a common table expression instead of in every IN list
+            string_with = f"""
+                WITH input_address AS (SELECT column1 AS address FROM (VALUES {self.get_string_values(array_address)}))"""
+            str_list_add = "SELECT address FROM input_address"
+        else:
+            string_with = ""
+            str_list_add = self.get_string_address(array_address)
+        string_since = self.get_string_since(since)
         if limit != 0:
             string_limit = f"LIMIT {limit}"
         else:
             string_limit = ""
-        sql = f"""
-                SELECT TX_HASH,
-                BLOCK_TIMESTAMP,
-                FROM_ADDRESS,
-                TO_ADDRESS,
-                GAS_LIMIT,
-                GAS_USED,
-                TX_FEE,
-                ETH_VALUE
-                FROM ethereum.core.fact_transactions
-                WHERE FROM_ADDRESS IN ({str_list_add})
-                OR TO_ADDRESS IN ({str_list_add})
+        union = not isinstance(network, str)
+        list_network = list(network) if union else [network]
+        list_select_sql = []
+        for network_name in list_network:
+            network_info = self.network_registry.get(network_name)
+            list_select = network_info.get_select(columns, union)
+            if union:
+                list_select.append(f"'{network_info.name}' AS CHAIN")
+            string_select = ",\n                ".join(list_select)
+            list_select_sql.append(f"""
+                SELECT {string_select}
+                FROM {network_info.table_name}
+                WHERE FROM_ADDRESS IN ({str_list_add}){string_since}
+                OR TO_ADDRESS IN ({str_list_add}){string_since}""")
+        string_union = "\n                UNION ALL".join(list_select_sql)
+        sql = f"""{string_with}{string_union}
                 {string_limit};
                 """
         return sql
 
-    def get_polygon_transactions_sql_query(self, array_address, limit=0):
+    def get_eth_transactions_sql_query(self, array_address, limit=0, since=None):
         """
-        Get the sql query to extract the transactions for the array of addresses and polygon network
+        Get the sql query to extract the transactions for the array of addresses and ethereum network, see
+        get_transactions_sql_query
         Parameters
         ----------
         array_address : array
             The array of addresses to extract
         limit : int
             The limit of the query default 0 everything is retrieved. The limit is the Keyword LIMIT in SQL.
+        since : pd.Timestamp
+            Only the transactions after since are retrieved default None everything is retrieved
 
         Returns
         -------
@@ -420,36 +1090,20 @@ class FlipsideApi(object):
             The sql query to execute
 
         """
-        str_list_add = self.get_string_address(array_address)
-        if limit != 0:
-            string_limit = f"LIMIT {limit}"
-        else:
-            string_limit = ""
-        sql = f"""
-                SELECT TX_HASH,
-                BLOCK_TIMESTAMP,
-                FROM_ADDRESS,
-                TO_ADDRESS,
-                GAS_LIMIT,
-                GAS_USED,
-                TX_FEE,
-                MATIC_VALUE
-                FROM polygon.core.fact_transactions
-                WHERE FROM_ADDRESS IN ({str_list_add})
-                OR TO_ADDRESS IN ({str_list_add})
-                {string_limit};
-                """
-        return sql
+        return self.get_transactions_sql_query(array_address, "ethereum", limit=limit, since=since)
 
-    def get_arbitrum_transactions_sql_query(self, array_address, limit=0):
+    def get_polygon_transactions_sql_query(self, array_address, limit=0, since=None):
         """
-        Get the sql query to extract the transactions for the array of addresses and arbitrum network
+        Get the sql query to extract the transactions for the array of addresses and polygon network, see
+        get_transactions_sql_query
         Parameters
         ----------
         array_address : array
             The array of addresses to extract
         limit : int
             The limit of the query default 0 everything is retrieved. The limit is the Keyword LIMIT in SQL.
+        since : pd.Timestamp
+            Only the transactions after since are retrieved default None everything is retrieved
 
         Returns
         -------
@@ -457,72 +1111,41 @@ class FlipsideApi(object):
             The sql query to execute
 
         """
-        str_list_add = self.get_string_address(array_address)
-        if limit != 0:
-            string_limit = f"LIMIT {limit}"
-        else:
-            string_limit = ""
-        sql = f"""
-                SELECT TX_HASH,
-                BLOCK_TIMESTAMP,
-                FROM_ADDRESS,
-                TO_ADDRESS,
-                GAS_LIMIT,
-                GAS_USED,
-                TX_FEE,
-                ETH_VALUE
-                FROM arbitrum.core.fact_transactions
-                WHERE FROM_ADDRESS IN ({str_list_add})
-                OR TO_ADDRESS IN ({str_list_add})
-                {string_limit};
-                """
-        return sql
+        return self.get_transactions_sql_query(array_address, "polygon", limit=limit, since=since)
 
-    def get_avalanche_transactions_sql_query(self, array_address, limit=0):
+    def get_arbitrum_transactions_sql_query(self, array_address, limit=0, since=None):
         """
-        Get the sql query to extract the transactions for the array of addresses and avalanche network
+        Get the sql query to extract the transactions for the array of addresses and arbitrum network, see
+        get_transactions_sql_query
         Parameters
         ----------
         array_address : array
             The array of addresses to extract
         limit : int
             The limit of the query default 0 everything is retrieved. The limit is the Keyword LIMIT in SQL.
+        since : pd.Timestamp
+            Only the transactions after since are retrieved default None everything is retrieved
 
         Returns
         -------
         sql : str
             The sql query to execute
+
         """
-        str_list_add = self.get_string_address(array_address)
-        if limit != 0:
-            string_limit = f"LIMIT {limit}"
-        else:
-            string_limit = ""
-        sql = f"""
-                SELECT TX_HASH,
-                BLOCK_TIMESTAMP,
-                FROM_ADDRESS,
-                TO_ADDRESS,
-                GAS_LIMIT,
-                GAS_USED,
-                TX_FEE,
-                AVAX_VALUE
-                FROM avalanche.core.fact_transactions
-                WHERE FROM_ADDRESS IN ({str_list_add})
-                OR TO_ADDRESS IN ({str_list_add})
-                {string_limit};
-                """
-        return sql
+        return self.get_transactions_sql_query(array_address, "arbitrum", limit=limit, since=since)
 
-    def get_gnosis_transactions_sql_query(self, array_address, limit=0):
+    def get_avalanche_transactions_sql_query(self, array_address, limit=0, since=None):
         """
-        Get the sql query to extract the transactions for the array of addresses and gnosis network
+        Get the sql query to extract the transactions for the array of addresses and avalanche network, see
+        get_transactions_sql_query
         Parameters
         ----------
         array_address : array
             The array of addresses to extract
         limit : int
             The limit of the query default 0 everything is retrieved. The limit is the Keyword LIMIT in SQL.
+        since : pd.Timestamp
+            Only the transactions after since are retrieved default None everything is retrieved
 
         Returns
         -------
@@ -530,35 +1153,20 @@ class FlipsideApi(object):
             The sql query to execute
 
         """
-        str_list_add = self.get_string_address(array_address)
-        if limit != 0:
-            string_limit = f"LIMIT {limit}"
-        else:
-            string_limit = ""
-        sql = f"""
-                    SELECT TX_HASH,
-                    BLOCK_TIMESTAMP,
-                    FROM_ADDRESS,
-                    TO_ADDRESS,
-                    GAS_LIMIT,
-                    GAS_USED,
-                    TX_FEE
-                    FROM gnosis.core.fact_transactions
-                    WHERE FROM_ADDRESS IN ({str_list_add})
-                    OR TO_ADDRESS IN ({str_list_add})
-                    {string_limit};
-                    """
-        return sql
+        return self.get_transactions_sql_query(array_address, "avalanche", limit=limit, since=since)
 
-    def get_optimism_transactions_sql_query(self, array_address, limit=0):
+    def get_gnosis_transactions_sql_query(self, array_address, limit=0, since=None):
         """
-        Get the sql query to extract the transactions for the array of addresses and optimism network
+        Get the sql query to extract the transactions for the array of addresses and gnosis network, see
+        get_transactions_sql_query
         Parameters
         ----------
         array_address : array
             The array of addresses to extract
         limit : int
             The limit of the query default 0 everything is retrieved. The limit is the Keyword LIMIT in SQL.
+        since : pd.Timestamp
+            Only the transactions after since are retrieved default None everything is retrieved
 
         Returns
         -------
@@ -566,31 +1174,34 @@ class FlipsideApi(object):
             The sql query to execute
 
         """
-        str_list_add = self.get_string_address(array_address)
-        if limit != 0:
-            string_limit = f"LIMIT {limit}"
-        else:
-            string_limit = ""
-        sql = f"""
-                    SELECT TX_HASH,
-                    BLOCK_TIMESTAMP,
-                    FROM_ADDRESS,
-                    TO_ADDRESS,
-                    GAS_LIMIT,
-                    GAS_USED,
-                    TX_FEE,
-                    ETH_VALUE
-                    FROM optimism.core.fact_transactions
-                    WHERE FROM_ADDRESS IN ({str_list_add})
-                    OR TO_ADDRESS IN ({str_list_add})
-                    {string_limit};
-                    """
-        return sql
+        return self.get_transactions_sql_query(array_address, "gnosis", limit=limit, since=since)
+
+    def get_optimism_transactions_sql_query(self, array_address, limit=0, since=None):
+        """
+        Get the sql query to extract the transactions for the array of addresses and optimism network, see
+        get_transactions_sql_query
+        Parameters
+        ----------
+        array_address : array
+            The array of addresses to extract
+        limit : int
+            The limit of the query default 0 everything is retrieved. The limit is the Keyword LIMIT in SQL.
+        since : pd.Timestamp
+            Only the transactions after since are retrieved default None everything is retrieved
+
+        Returns
+        -------
+        sql : str
+            The sql query to execute
+
+        """
+        return self.get_transactions_sql_query(array_address, "optimism", limit=limit, since=since)
 
     def get_cross_chain_info_sql_query(self, array_address, info_type="label", limit=0):
         """
         Get the sql query to extract the cross chain labels or tags for the array of addresses.
-        WARNING you should not provide too many addresses in the array_address parameter because the query may time out.
+        WARNING you should not provide too many addresses in the array_address parameter because the query may time out,
+        extract_cross_chain_info queries them by chunks.
         Parameters
         ----------
         array_address : array
@@ -612,8 +1223,7 @@ class FlipsideApi(object):
         elif info_type == "tag":
             table_name = "crosschain.address_tags"
         else:
-            Exception("Invalid info type")
-            table_name = ""
+            raise ValueError(f"Invalid info type {info_type}, it can be label or tag")
         if limit != 0:
             string_limit = f"LIMIT {limit}"
         else:
@@ -0,0 +1,171 @@
+import json
+import sqlite3
+import threading
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+LIST_INFO_TYPE = ["label", "tag"]
+
+
+def get_lower_address(array_address):
+    """return the unique lower case addresses of the array, in their order, without the missing values"""
+    series_address = pd.Series(array_address, dtype=object).dropna().astype(str).str.lower()
+    return series_address.drop_duplicates().to_numpy(dtype=object)
+
+
+def get_sql_value(value):
+    """return a value that can be stored by sqlite, the nested values of flipside are stored as json"""
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, default=str)
+    if pd.isna(value):
+        return None
+    if isinstance(value, np.generic):
+        return value.item()
+    return str(value)
+
+
+class LabelStore(object):
+    """
+    A persistent store of the cross chain labels and tags of addresses in a local SQLite database.
+    The rows of each info type are stored in a table indexed on the address, and the addresses already queried are
+    recorded even if they have no label, so only the new addresses are queried on flipside.
+    The columns of the tables follow the columns returned by flipside. It can be shared between threads.
+    """
+
+    def __init__(self, path):
+        """
+        Parameters
+        ----------
+        path : str
+            The path of the SQLite database, ":memory:" for a store that is not persisted
+        """
+        self.path = path
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self.connection:
+            self.connection.execute("CREATE TABLE IF NOT EXISTS queried_address "
+                                    "(address TEXT, info_type TEXT, queried_at TEXT, PRIMARY KEY (address, info_type))")
+            for info_type in LIST_INFO_TYPE:
+                table_name = self.get_table_name(info_type)
+                self.connection.execute(f"CREATE TABLE IF NOT EXISTS {table_name} (address TEXT)")
+                self.connection.execute(f"CREATE INDEX IF NOT EXISTS {table_name}_address ON {table_name} (address)")
+
+    @staticmethod
+    def get_table_name(info_type):
+        if info_type not in LIST_INFO_TYPE:
+            raise ValueError(f"Invalid info type {info_type}, it can be {' or '.join(LIST_INFO_TYPE)}")
+        return f"address_{info_type}s"
+
+    def select_address(self, array_address, sql):
+        """
+        Run a sql query on the addresses of the array, they are inserted in the temporary table input_address so the
+        query uses the indexes
+
+        Parameters
+        ----------
+        array_address : array
+            The array of addresses
+        sql : str
+            The sql query reading input_address
+
+        Returns
+        -------
+        df : pd.DataFrame
+            The result of the query
+        """
+        with self._lock:
+            self.connection.execute("CREATE TEMP TABLE IF NOT EXISTS input_address (address TEXT PRIMARY KEY)")
+            self.connection.execute("DELETE FROM input_address")
+            self.connection.executemany("INSERT OR IGNORE INTO input_address VALUES (?)",
+                                        [(address,) for address in get_lower_address(array_address)])
+            df = pd.read_sql_query(sql, self.connection)
+            self.connection.execute("DELETE FROM input_address")
+            self.connection.commit()
+        return df
+
+    def get_missing(self, array_address, info_type="label"):
+        """
+        Get the addresses that have not been queried yet
+
+        Parameters
+        ----------
+        array_address : array
+            The array of addresses
+        info_type : str
+            The type of info, "label" or "tag"
+
+        Returns
+        -------
+        np_address : np.ndarray
+            The unique lower case addresses of array_address missing from the store, in their order
+        """
+        self.get_table_name(info_type)
+        np_address = get_lower_address(array_address)
+        df = self.select_address(np_address, f"SELECT i.address FROM input_address i JOIN queried_address q "
+                                             f"ON i.address = q.address AND q.info_type = '{info_type}'")
+        return np_address[~pd.Index(np_address).isin(df.address)]
+
+    def put(self, df, array_address, info_type="label"):
+        """
+        Store the result of the query of a list of addresses, the rows previously stored for them are replaced
+
+        Parameters
+        ----------
+        df : pd.DataFrame
+            The rows returned by flipside for the addresses, with an address column
+        array_address : array
+            The addresses queried, they are recorded as queried even if they have no rows
+        info_type : str
+            The type of info, "label" or "tag"
+        """
+        table_name = self.get_table_name(info_type)
+        np_address = get_lower_address(array_address)
+        df = df.rename(columns=str.lower)
+        if df.shape[0] > 0:
+            df = df.assign(address=df.address.astype(str).str.lower())
+        queried_at = datetime.now(timezone.utc).isoformat()
+        with self._lock, self.connection:
+            set_column = {row[1] for row in self.connection.execute(f"PRAGMA table_info({table_name})")}
+            for column in df.columns:
+                if column not in set_column:
+                    self.connection.execute(f'ALTER TABLE {table_name} ADD COLUMN "{column}"')
+            self.connection.executemany(f"DELETE FROM {table_name} WHERE address = ?",
+                                        [(address,) for address in np_address])
+            if df.shape[0] > 0:
+                str_column = ", ".join(f'"{column}"' for column in df.columns)
+                str_value = ", ".join("?" * df.shape[1])
+                self.connection.executemany(f"INSERT INTO {table_name} ({str_column}) VALUES ({str_value})",
+                                            [tuple(get_sql_value(value) for value in row)
+                                             for row in df.itertuples(index=False, name=None)])
+            self.connection.executemany("INSERT OR REPLACE INTO queried_address VALUES (?, ?, ?)",
+                                        [(address, info_type, queried_at) for address in np_address])
+
+    def get(self, array_address=None, info_type="label"):
+        """
+        Get the stored rows
+
+        Parameters
+        ----------
+        array_address : array
+            The addresses to get default None all the rows are returned
+        info_type : str
+            The type of info, "label" or "tag"
+
+        Returns
+        -------
+        df : pd.DataFrame
+            The rows of the addresses
+        """
+        table_name = self.get_table_name(info_type)
+        if array_address is None:
+            with self._lock:
+                return pd.read_sql_query(f"SELECT * FROM {table_name}", self.connection)
+        return self.select_address(array_address, f"SELECT t.* FROM input_address i JOIN {table_name} t "
+                                                   f"ON i.address = t.address")
+
+    def close(self):
+        self.connection.close()
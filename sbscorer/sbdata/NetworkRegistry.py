@@ -0,0 +1,116 @@
+from sbscorer.sbutils.schema import NATIVE_VALUE_COLUMNS
+
+# the columns of the transactions in the order of the csv files, value is the native token value of the network
+TRANSACTION_COLUMNS = ["tx_hash", "block_timestamp", "from_address", "to_address", "gas_limit", "gas_used", "tx_fee",
+                       "value"]
+# the columns needed to export the transactions of each address
+REQUIRED_COLUMNS = ["tx_hash", "block_timestamp", "from_address", "to_address"]
+
+
+class Network(object):
+    """
+    This class describes the transactions table of a network on flipside
+    """
+
+    def __init__(self, name, native_token, value_column=None, table_name=None):
+        """
+        Parameters
+        ----------
+        name : str
+            The name of the network, for example ethereum
+        native_token : str
+            The symbol of the native token, for example ETH
+        value_column : str
+            The column of the native token value, for example eth_value. Default None the table has no value column
+        table_name : str
+            The transactions table default None is name.core.fact_transactions
+        """
+        self.name = name
+        self.native_token = native_token
+        self.value_column = value_column
+        if table_name is None:
+            table_name = f"{name}.core.fact_transactions"
+        self.table_name = table_name
+
+    def get_columns(self, columns=None):
+        """
+        Get the columns of a query
+
+        Parameters
+        ----------
+        columns : list
+            The requested columns of TRANSACTION_COLUMNS, the value column can be named value or after the native
+            token of any network (eth_value), so a list of columns can be used on all the networks. Default None all
+            the columns
+
+        Returns
+        -------
+        list_column : list
+            The requested columns in the order of TRANSACTION_COLUMNS, with value for the value column
+        """
+        if columns is None:
+            return list(TRANSACTION_COLUMNS)
+        set_column = {"value" if column in NATIVE_VALUE_COLUMNS or column == self.value_column else column
+                      for column in columns}
+        unknown = set_column.difference(TRANSACTION_COLUMNS)
+        if unknown:
+            raise ValueError(f"Unknown columns {sorted(unknown)}, the columns are {TRANSACTION_COLUMNS}")
+        return [column for column in TRANSACTION_COLUMNS if column in set_column]
+
+    def get_select(self, columns=None, union=False):
+        """
+        Get the sql expressions selecting the columns
+
+        Parameters
+        ----------
+        columns : list
+            The requested columns, see get_columns
+        union : bool
+            If True the value column is named VALUE, and is NULL if the table has no value column, so the queries of
+            several networks have the same columns. Else it keeps its name and is skipped if the table has no value
+            column. Default is False
+
+        Returns
+        -------
+        list_select : list
+            The list of the sql expressions
+        """
+        list_select = []
+        for column in self.get_columns(columns):
+            if column != "value":
+                list_select.append(column.upper())
+            elif union:
+                list_select.append(f"{(self.value_column or 'NULL').upper()} AS VALUE")
+            elif self.value_column is not None:
+                list_select.append(self.value_column.upper())
+        return list_select
+
+
+class NetworkRegistry(object):
+    """
+    The registry of the networks whose transactions can be extracted, a network is added with register
+    """
+
+    def __init__(self, list_network=()):
+        self.dict_network = {}
+        for network in list_network:
+            self.register(network)
+
+    def register(self, network):
+        self.dict_network[network.name] = network
+
+    def get(self, name):
+        if name not in self.dict_network:
+            raise ValueError(f"Network {name} not supported, the networks are {self.get_names()}")
+        return self.dict_network[name]
+
+    def get_names(self):
+        return list(self.dict_network)
+
+
+NETWORK_REGISTRY = NetworkRegistry([Network("ethereum", "ETH", "eth_value"),
+                                    Network("polygon", "MATIC", "matic_value"),
+                                    Network("arbitrum", "ETH", "eth_value"),
+                                    Network("avalanche", "AVAX", "avax_value"),
+                                    Network("gnosis", "XDAI"),
+                                    Network("optimism", "ETH", "eth_value")])
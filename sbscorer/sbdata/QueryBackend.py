@@ -0,0 +1,204 @@
+import glob
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+import pandas as pd
+from flipside.models import QueryResultSet
+from flipside.models.query_result_set import PageStats, QueryRunStats
+
+# database.schema.table names of flipside, for example ethereum.core.fact_transactions
+TABLE_PATTERN = re.compile(r"\b(\w+)\.(\w+)\.(\w+)\b")
+
+
+def quote_table_names(sql, list_table=()):
+    """
+    Quote the database.schema.table names of a flipside query, and the other names of list_table such as
+    crosschain.address_labels, so a local engine without databases reads them as the name of a single table.
+    The string literals of the query are left unchanged.
+    """
+    pattern = TABLE_PATTERN
+    if list_table:
+        pattern = re.compile("|".join([TABLE_PATTERN.pattern] + [rf"\b{re.escape(table)}\b" for table in list_table]))
+    list_part = sql.split("'")
+    # the even parts are outside the string literals
+    list_part[::2] = [pattern.sub(lambda match: f'"{match.group(0)}"', part) for part in list_part[::2]]
+    return "'".join(list_part)
+
+
+class QueryBackend(object):
+    """
+    This class is the interface of the engine executing the queries of FlipsideApi, flipside.Flipside implements it.
+    query runs a query and returns the first page of its results, get_query_results returns the other pages.
+    """
+
+    def query(self, sql, page_size=100000, page_number=1, **kwargs):
+        """
+        Execute a query
+
+        Parameters
+        ----------
+        sql : str
+            The sql query to execute
+        page_size : int
+            The number of rows per page default is 100000
+        page_number : int
+            The page to return default is 1
+        kwargs : dict
+            The other parameters of flipside.Flipside.query (max_age_minutes, timeout_minutes, ttl_minutes, cached,
+            retry_interval_seconds), a local backend can ignore them
+
+        Returns
+        -------
+        query_result_set : QueryResultSet
+            The page of the results with its records, the query_id and the page stats
+        """
+        raise NotImplementedError
+
+    def get_query_results(self, query_id, page_number=1, page_size=100000):
+        """
+        Get a page of the results of a query
+
+        Parameters
+        ----------
+        query_id : str
+            The query_id returned by query
+        page_number : int
+            The page to return default is 1
+        page_size : int
+            The number of rows per page default is 100000
+
+        Returns
+        -------
+        query_result_set : QueryResultSet
+            The page of the results
+        """
+        raise NotImplementedError
+
+
+class SqliteBackend(QueryBackend):
+    """
+    This backend executes the flipside queries on a local SQLite database, it is a stand-in of flipside to test and
+    benchmark the extraction offline.
+    The tables are named after the flipside tables, for example ethereum.core.fact_transactions, and are loaded from
+    dataframes or from the csv files of an extraction. The results of the last max_results queries are kept to
+    return their pages.
+    A latency in seconds can be added to each query to mimic the time spent waiting for flipside, the queries run
+    one at a time on the database.
+    """
+
+    def __init__(self, path=":memory:", latency=0, max_results=64):
+        """
+        Parameters
+        ----------
+        path : str
+            The path of the SQLite database default is an in-memory database
+        latency : float
+            The time in seconds waited before each query default is 0
+        max_results : int
+            The number of results kept for get_query_results default is 64
+        """
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.latency = latency
+        self.max_results = max_results
+        self.dict_records = OrderedDict()
+        self.n_queries = 0
+        self.list_table = []
+        self._lock = threading.Lock()
+
+    def load_table(self, table_name, df, index_columns=None):
+        """
+        Append a dataframe to a table, the table is created if needed
+
+        Parameters
+        ----------
+        table_name : str
+            The flipside name of the table, for example crosschain.core.address_labels
+        df : pd.DataFrame
+            The rows to append, the column names are upper cased like the flipside columns
+        index_columns : list
+            The columns to index default None
+        """
+        df = df.rename(columns=str.upper)
+        with self._lock:
+            df.to_sql(table_name, self.connection, if_exists="append", index=False)
+            if table_name not in self.list_table:
+                self.list_table.append(table_name)
+            for column in index_columns or []:
+                index_name = f"{table_name}.{column}".replace(".", "_")
+                self.connection.execute(f'CREATE INDEX IF NOT EXISTS "{index_name}" ON "{table_name}" ({column})')
+            self.connection.commit()
+
+    def load_transactions(self, network, df):
+        """
+        Append transactions to the table network.core.fact_transactions, indexed on the addresses
+
+        Parameters
+        ----------
+        network : str
+            The network of the transactions, for example ethereum
+        df : pd.DataFrame
+            The transactions with the columns of the csv files of an extraction
+        """
+        df = df.copy()
+        # the timestamps are compared as strings with the format of FlipsideApi.get_string_since
+        df["block_timestamp"] = pd.to_datetime(df.block_timestamp, utc=True, format="mixed").dt.strftime(
+            "%Y-%m-%d %H:%M:%S.%f").str[:-3]
+        self.load_table(f"{network}.core.fact_transactions", df, index_columns=["FROM_ADDRESS", "TO_ADDRESS"])
+
+    def load_extract_dir(self, extract_dir, list_network=None):
+        """
+        Load the csv files of an extraction, a transaction between two addresses of the extraction is loaded once
+
+        Parameters
+        ----------
+        extract_dir : str
+            The directory of the extraction, with a folder of address_tx.csv files per network
+        list_network : list
+            The networks to load default None all the folders of extract_dir
+        """
+        if list_network is None:
+            list_network = [network for network in sorted(os.listdir(extract_dir))
+                            if not network.startswith("_") and os.path.isdir(os.path.join(extract_dir, network))]
+        for network in list_network:
+            files = glob.glob(os.path.join(extract_dir, network, "*_tx.csv"))
+            if files:
+                df = pd.concat([pd.read_csv(file) for file in files], ignore_index=True)
+                self.load_transactions(network, df.drop_duplicates())
+
+    def query(self, sql, page_size=100000, page_number=1, **kwargs):
+        if self.latency:
+            time.sleep(self.latency)
+        start_time = time.time()
+        with self._lock:
+            cursor = self.connection.execute(quote_table_names(sql, self.list_table))
+            columns = [description[0].lower() for description in cursor.description]
+            records = [dict(zip(columns, row)) for row in cursor.fetchall()]
+            self.n_queries += 1
+            query_id = f"sqlite-{self.n_queries}"
+            self.dict_records[query_id] = (columns, records, time.time() - start_time)
+            while len(self.dict_records) > self.max_results:
+                self.dict_records.popitem(last=False)
+        return self.get_query_results(query_id, page_number, page_size)
+
+    def get_query_results(self, query_id, page_number=1, page_size=100000):
+        with self._lock:
+            if query_id not in self.dict_records:
+                raise KeyError(f"The results of {query_id} are not available")
+            columns, records, elapsed_seconds = self.dict_records[query_id]
+        page_records = records[(page_number - 1) * page_size:page_number * page_size]
+        return QueryResultSet(query_id=query_id,
+                              status="FINISHED",
+                              columns=columns,
+                              rows=[list(record.values()) for record in page_records],
+                              records=page_records,
+                              run_stats=QueryRunStats(record_count=len(records),
+                                                       elapsed_seconds=int(elapsed_seconds)),
+                              page=PageStats(currentPageNumber=page_number,
+                                             currentPageSize=page_size,
+                                             totalRows=len(records),
+                                             totalPages=-(-len(records) // page_size)))
+
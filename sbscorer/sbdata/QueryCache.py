@@ -0,0 +1,172 @@
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+
+import pandas as pd
+
+
+def normalize_sql(sql):
+    """
+    return the sql with its whitespaces collapsed and without the trailing semicolon, the whitespaces of the string
+    literals are kept because they change the result of the query
+    """
+    # the odd parts are the single quoted literals, a quote is escaped by doubling it
+    list_part = re.split(r"('(?:[^']|'')*')", sql)
+    sql = "".join(part if i % 2 else re.sub(r"\s+", " ", part) for i, part in enumerate(list_part))
+    return sql.strip().rstrip(";").strip()
+
+
+class QueryCache(object):
+    """
+    A persistent cache of query results on disk.
+    Each result is stored as a parquet file named after the sha256 of the normalized sql and the parameters of the
+    query, so reruns of the same queries are read from disk without network. The results older than ttl_seconds are
+    ignored, and when the cache exceeds max_bytes the least recently used files are evicted.
+    It counts the hits, misses and evictions and can be shared between threads.
+    It requires pyarrow, install sbscorer[parquet].
+    """
+
+    def __init__(self, path, ttl_seconds=None, max_bytes=2 * 2 ** 30):
+        """
+        Parameters
+        ----------
+        path : str
+            The directory of the cache
+        ttl_seconds : float
+            The time to live of a result in seconds default None, the results do not expire
+        max_bytes : int
+            The maximum size in bytes of the files of the cache default is 2 GB
+        """
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def get_key(sql, params=None):
+        """
+        Get the key of a query
+
+        Parameters
+        ----------
+        sql : str
+            The sql query
+        params : dict
+            The parameters changing the result of the query default None
+
+        Returns
+        -------
+        key : str
+            The sha256 of the normalized sql and the parameters
+        """
+        content = json.dumps({"sql": normalize_sql(sql), "params": params or {}}, sort_keys=True, default=str)
+        return hashlib.sha256(content.encode()).hexdigest()
+
+    def get_path(self, key):
+        return os.path.join(self.path, f"{key}.parquet")
+
+    def get(self, key):
+        """
+        Get the result of a query, it is marked as recently used
+
+        Parameters
+        ----------
+        key : str
+            The key of the query
+
+        Returns
+        -------
+        df : pd.DataFrame
+            The result or None if it is not in the cache or expired
+        """
+        path = self.get_path(key)
+        try:
+            created_at = os.path.getmtime(path)
+            if self.ttl_seconds is not None and time.time() - created_at > self.ttl_seconds:
+                raise FileNotFoundError(path)
+            df = pd.read_parquet(path)
+            # the access time marks the recently used files, the modification time is the creation of the result
+            os.utime(path, (time.time(), created_at))
+        except (FileNotFoundError, OSError):
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return df
+
+    def put(self, key, df):
+        """
+        Add the result of a query and evict the least recently used results if needed
+
+        Parameters
+        ----------
+        key : str
+            The key of the query
+        df : pd.DataFrame
+            The result of the query
+        """
+        if not os.path.exists(self.path):
+            os.makedirs(self.path, exist_ok=True)
+        path = self.get_path(key)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            df.to_parquet(tmp_path, index=False)
+        except Exception as e:
+            # for example a column with mixed types
+            print(f"The result could not be cached: {e}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return
+        os.replace(tmp_path, path)
+        self.evict()
+
+    def get_files(self):
+        """return the list of (last access, size, path) of the results"""
+        list_file = []
+        for entry in os.scandir(self.path):
+            if entry.name.endswith(".parquet"):
+                stat = entry.stat()
+                list_file.append((stat.st_atime, stat.st_size, entry.path))
+        return list_file
+
+    def evict(self):
+        """remove the least recently used results until the cache is smaller than max_bytes"""
+        with self._lock:
+            list_file = sorted(self.get_files())
+            current_bytes = sum(size for _, size, _ in list_file)
+            for _, size, path in list_file:
+                if current_bytes <= self.max_bytes:
+                    break
+                os.remove(path)
+                current_bytes -= size
+                self.evictions += 1
+
+    def clear(self):
+        """remove all the results of the cache, the counters are kept"""
+        with self._lock:
+            if os.path.exists(self.path):
+                for _, _, path in self.get_files():
+                    os.remove(path)
+
+    def get_stats(self):
+        """
+        Get the statistics of the cache
+
+        Returns
+        -------
+        stats : dict
+            The hits, misses, evictions, number of entries and size in bytes of the cache
+        """
+        list_file = self.get_files() if os.path.exists(self.path) else []
+        return {'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'entries': len(list_file),
+                'bytes': sum(size for _, size, _ in list_file)}
@@ -0,0 +1,213 @@
+import random
+import re
+import threading
+import time
+
+import requests
+from flipside.errors import QueryRunRateLimitError, QueryRunTimeoutError, ServerError
+
+ERROR_TIMEOUT = "timeout"
+ERROR_RATE_LIMIT = "rate_limit"
+ERROR_ROW_CAP = "row_cap"
+ERROR_TRANSIENT = "transient"
+ERROR_OTHER = "other"
+# the errors due to the size of the query, a smaller query can succeed
+LIST_SIZE_ERROR = [ERROR_TIMEOUT, ERROR_ROW_CAP]
+# the errors that can go away by themselves, the same query can succeed later
+LIST_RETRY_ERROR = [ERROR_RATE_LIMIT, ERROR_TRANSIENT]
+# the server and connection errors, an http timeout is not the timeout of the query
+LIST_TRANSIENT_CLASS = (ServerError, ConnectionError, requests.exceptions.ConnectionError,
+                        requests.exceptions.Timeout)
+
+# the flipside errors are also recognized by their message, for example when they are wrapped in an ApiError
+PATTERN_RATE_LIMIT = re.compile(r"rate.?limit|MaxConcurrentQueries|too many requests|\b429\b", re.IGNORECASE)
+PATTERN_TIMEOUT = re.compile(r"time.?out|timed out", re.IGNORECASE)
+PATTERN_ROW_CAP = re.compile(r"too many rows|row (?:count )?limit|result (?:set )?(?:is )?too large", re.IGNORECASE)
+PATTERN_TRANSIENT = re.compile(r"\b50[234]\b|bad gateway|service unavailable|connection (?:reset|aborted|refused)",
+                               re.IGNORECASE)
+
+
+def classify_error(error):
+    """
+    Classify an error of a flipside call
+
+    Parameters
+    ----------
+    error : Exception
+        The error raised by the call
+
+    Returns
+    -------
+    error_type : str
+        ERROR_RATE_LIMIT, ERROR_TIMEOUT, ERROR_ROW_CAP, ERROR_TRANSIENT for the server and connection errors or
+        ERROR_OTHER, for example the execution errors of an invalid query
+    """
+    if isinstance(error, QueryRunRateLimitError):
+        return ERROR_RATE_LIMIT
+    if isinstance(error, QueryRunTimeoutError):
+        return ERROR_TIMEOUT
+    if isinstance(error, LIST_TRANSIENT_CLASS):
+        return ERROR_TRANSIENT
+    message = f"{type(error).__name__} {error}"
+    if PATTERN_RATE_LIMIT.search(message):
+        return ERROR_RATE_LIMIT
+    if PATTERN_TIMEOUT.search(message):
+        return ERROR_TIMEOUT
+    if PATTERN_ROW_CAP.search(message):
+        return ERROR_ROW_CAP
+    if PATTERN_TRANSIENT.search(message):
+        return ERROR_TRANSIENT
+    return ERROR_OTHER
+
+
+class TokenBucket(object):
+    """
+    A token bucket limiting the rate of the calls shared by several threads.
+    The bucket holds up to capacity tokens and is refilled at rate tokens per second, each call takes a token and
+    waits until one is available.
+    """
+
+    def __init__(self, rate, capacity=1):
+        """
+        Parameters
+        ----------
+        rate : float
+            The number of tokens added per second
+        capacity : int
+            The maximum number of tokens, ie the number of calls that can be made at once default is 1
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.last_refill = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """
+        Take a token, waiting until one is available
+
+        Returns
+        -------
+        waited : float
+            The time waited in seconds
+        """
+        waited = 0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.last_refill) * self.rate)
+                self.last_refill = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return waited
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+            waited += wait
+
+
+class RetryPolicy(object):
+    """
+    This class retries the flipside calls that failed with a transient error.
+    The rate limit errors and the transient server and connection errors are retried with a jittered exponential
+    backoff, up to max_retries times. The errors due to the size of the query (timeout and row cap) are not retried, a
+    smaller query has to be made, and the other errors, for example the execution error of an invalid query, fail
+    fast. If a rate_limiter is set, each call and retry takes a token of the bucket first.
+    It counts the calls, retries, errors by type and the time spent waiting, and can be shared between threads.
+    """
+
+    def __init__(self, max_retries=3, base_delay=2, max_delay=60, rate_limiter=None, seed=None):
+        """
+        Parameters
+        ----------
+        max_retries : int
+            The maximum number of retries of a call default is 3, 0 disables the retries
+        base_delay : float
+            The delay in seconds before the first retry default is 2, it doubles at each retry
+        max_delay : float
+            The maximum delay in seconds between two retries default is 60
+        rate_limiter : TokenBucket
+            The token bucket limiting the rate of the calls default None, the calls are not limited
+        seed : int
+            The seed of the jitter default None
+        """
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.rate_limiter = rate_limiter
+        self.random = random.Random(seed)
+        self.dict_counter = {'calls': 0, 'successes': 0, 'retries': 0, 'failures': 0,
+                             'throttled_seconds': 0.0, 'backoff_seconds': 0.0,
+                             'errors': {error_type: 0 for error_type in
+                                        [ERROR_TIMEOUT, ERROR_RATE_LIMIT, ERROR_ROW_CAP, ERROR_TRANSIENT,
+                                         ERROR_OTHER]}}
+        self._lock = threading.Lock()
+
+    def get_delay(self, attempt):
+        """return the delay before the retry number attempt, drawn between half and the whole exponential delay"""
+        delay = min(self.max_delay, self.base_delay * 2 ** attempt)
+        with self._lock:
+            return delay * self.random.uniform(0.5, 1)
+
+    def count(self, key, value=1):
+        with self._lock:
+            self.dict_counter[key] += value
+
+    def call(self, function, *args, counter=None, **kwargs):
+        """
+        Call a function, it is retried if it raises a rate limit or a transient error
+
+        Parameters
+        ----------
+        function : callable
+            The function to call, for example Flipside.query
+        counter : dict
+            A dict whose retries key is incremented at each retry, to count the retries of a query. Default None
+        args : list
+            The arguments of the function
+        kwargs : dict
+            The keyword arguments of the function
+
+        Returns
+        -------
+        result : object
+            The result of the function, the last error is raised if all the attempts failed
+        """
+        attempt = 0
+        while True:
+            if self.rate_limiter is not None:
+                self.count('throttled_seconds', self.rate_limiter.acquire())
+            self.count('calls')
+            try:
+                result = function(*args, **kwargs)
+            except Exception as e:
+                error_type = classify_error(e)
+                with self._lock:
+                    self.dict_counter['errors'][error_type] += 1
+                if error_type not in LIST_RETRY_ERROR or attempt >= self.max_retries:
+                    self.count('failures')
+                    raise
+                delay = self.get_delay(attempt)
+                print(f"{error_type} error, retrying in {delay:.1f} seconds: {e}")
+                self.count('retries')
+                self.count('backoff_seconds', delay)
+                if counter is not None:
+                    with self._lock:
+                        counter['retries'] = counter.get('retries', 0) + 1
+                time.sleep(delay)
+                attempt += 1
+                continue
+            self.count('successes')
+            return result
+
+    def get_stats(self):
+        """
+        Get the counters of the calls
+
+        Returns
+        -------
+        stats : dict
+            The number of calls, successes, retries, failures, errors by type and the time in seconds spent waiting
+            for the rate limiter and in backoff
+        """
+        with self._lock:
+            return dict(self.dict_counter, errors=dict(self.dict_counter['errors']))
@@ -0,0 +1,285 @@
+import hashlib
+import os
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from sbscorer.sbutils.TransactionStore import TransactionStore, get_bucket
+from sbscorer.sbutils.schema import set_transaction_dtypes
+
+
+def save_csv(df, path_to_export, csv_file):
+    if not os.path.exists(path_to_export):
+        os.makedirs(path_to_export)
+    df.to_csv(csv_file, index=False)
+
+
+def get_timestamp(series):
+    """return the block_timestamp series as UTC datetimes, flipside may return them with or without timezone"""
+    return pd.to_datetime(series, utc=True, format="mixed")
+
+
+def get_naive_timestamp(series):
+    """return the block_timestamp series as datetime64 without timezone, in UTC"""
+    return get_timestamp(series).dt.tz_localize(None)
+
+
+def get_address_rows(df, np_address):
+    """
+    Get the positions of the rows sent or received by each address in a single pass over the dataframe
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        Dataframe containing the transactions of potentially many addresses
+    np_address : numpy.ndarray
+        Array containing the addresses
+
+    Returns
+    -------
+    dict_rows : dict
+        The sorted positions of the rows of each address of np_address that has transactions, in the order of
+        np_address
+    """
+    if df.shape[0] == 0:
+        return {}
+    n_rows = df.shape[0]
+    eoa = np.concatenate((df.from_address.to_numpy(dtype=object), df.to_address.to_numpy(dtype=object)))
+    row = np.concatenate((np.arange(n_rows), np.arange(n_rows)))
+    mask = pd.Index(eoa).isin(np_address)
+    df_rows = pd.DataFrame({"eoa": eoa[mask], "row": row[mask]}).drop_duplicates()  # a transfer to itself
+    dict_group = df_rows.groupby("eoa", sort=False).row.indices
+    row = df_rows.row.to_numpy()
+    return {address: np.sort(row[dict_group[address]]) for address in dict.fromkeys(np_address)
+            if address in dict_group}
+
+
+def get_new_rows(df, rows, watermark):
+    """return the rows of df whose block_timestamp is after the watermark, all the rows if the watermark is NaT"""
+    if watermark is None or np.isnat(watermark):
+        return rows
+    timestamps = get_naive_timestamp(df.block_timestamp.iloc[rows]).to_numpy()
+    return rows[timestamps > watermark]
+
+
+class TransactionSink(object):
+    """
+    This class is the interface of the outputs of FlipsideApi.extract_transactions.
+    A sink is created for each network of an extraction, it is opened, receives the transactions of each chunk of
+    addresses and is closed at the end of the extraction.
+    """
+
+    def open(self, keep=False):
+        """
+        Prepare the sink for an extraction
+
+        Parameters
+        ----------
+        keep : bool
+            If True the existing outputs are kept, for a resumed or incremental extraction, else they can be replaced
+        """
+        pass
+
+    def write(self, df, np_address, watermarks=None):
+        """
+        Write the transactions of a chunk of addresses
+
+        Parameters
+        ----------
+        df : pd.DataFrame
+            Dataframe containing the transactions of potentially many addresses
+        np_address : numpy.ndarray
+            Array containing the lower case addresses of the chunk
+        watermarks : numpy.ndarray
+            The last block_timestamp already written for each address of np_address, only the newer transactions are
+            written. Default None all the transactions are written
+
+        Returns
+        -------
+        files : list
+            The list of the files written
+        """
+        raise NotImplementedError
+
+    def get_watermarks(self, array_address):
+        """
+        Get the last block_timestamp written for each address
+
+        Parameters
+        ----------
+        array_address : array
+            The array of addresses
+
+        Returns
+        -------
+        watermarks : np.ndarray
+            The datetime64 watermark of each address, NaT if the address has no transactions written
+        """
+        raise NotImplementedError
+
+    def close(self):
+        """finish the outputs of the extraction, it is called even if the extraction failed"""
+        pass
+
+
+class CsvSink(TransactionSink):
+    """
+    This sink writes one csv file per address named extract_dir/network/address_tx.csv, it is the default sink.
+    The files are written by a thread pool.
+    """
+
+    def __init__(self, extract_dir, network, n_workers=4):
+        """
+        Parameters
+        ----------
+        extract_dir : str
+            Directory where to export the csv files
+        network : str
+            Network of the transactions
+        n_workers : int
+            The number of threads writing the csv files default is 4
+        """
+        self.path_to_export = os.path.join(extract_dir, network)
+        self.n_workers = n_workers
+
+    def write(self, df, np_address, watermarks=None):
+        dict_rows = get_address_rows(df, np_address)
+        if not dict_rows:
+            return []
+        if not os.path.exists(self.path_to_export):
+            os.makedirs(self.path_to_export)
+        dict_watermark = {}
+        if watermarks is not None:
+            dict_watermark = dict(zip(np_address, watermarks))
+
+        def save_address(address):
+            csv_file = os.path.join(self.path_to_export, f"{address}_tx.csv")
+            rows = dict_rows[address]
+            if address in dict_watermark and os.path.exists(csv_file):
+                rows = get_new_rows(df, rows, dict_watermark[address])
+                if len(rows) == 0:
+                    return None
+                columns = pd.read_csv(csv_file, nrows=0).columns
+                df.iloc[rows][columns].to_csv(csv_file, mode="a", header=False, index=False)
+                return csv_file
+            save_csv(df.iloc[rows], self.path_to_export, csv_file)
+            return csv_file
+
+        if self.n_workers > 1 and len(dict_rows) > 1:
+            with ThreadPoolExecutor(max_workers=self.n_workers) as pool:
+                files = list(pool.map(save_address, dict_rows))
+        else:
+            files = [save_address(address) for address in dict_rows]
+        return [file for file in files if file is not None]
+
+    def get_watermarks(self, array_address):
+        watermarks = np.full(len(array_address), np.datetime64("NaT"), dtype="datetime64[ns]")
+        if not os.path.exists(self.path_to_export):
+            return watermarks
+        set_file = set(os.listdir(self.path_to_export))
+        for i, address in enumerate(array_address):
+            csv_file = f"{str(address).lower()}_tx.csv"
+            if csv_file in set_file:
+                df = pd.read_csv(os.path.join(self.path_to_export, csv_file), usecols=["block_timestamp"])
+                watermarks[i] = get_naive_timestamp(df.block_timestamp).max()
+        return watermarks
+
+
+class ParquetSink(TransactionSink):
+    """
+    This sink writes the transactions in the parquet store of the network, partitioned by address bucket, in
+    extract_dir/_parquet/network. Each chunk writes one file per bucket with the transactions of its addresses and an
+    EOA column, the same layout as LoadData.compact so LoadData reads the store with its manifest.
+    When the sink is closed the manifest is written and, if consolidate, the files of each bucket are merged.
+    The transactions of an address written again, for example a chunk exported before an interruption and queried
+    again with another chunking on resume, are deduplicated on tx_hash when the files of its bucket are merged, the
+    buckets with such addresses are merged even if the sink does not consolidate.
+    It requires pyarrow, install sbscorer[parquet].
+    """
+
+    def __init__(self, extract_dir, network, n_buckets=64, consolidate=True):
+        """
+        Parameters
+        ----------
+        extract_dir : str
+            The directory of the extraction
+        network : str
+            Network of the transactions
+        n_buckets : int
+            The number of address buckets default is 64
+        consolidate : bool
+            If True default the files of each bucket are merged into a single file when the sink is closed
+        """
+        self.store = TransactionStore(extract_dir, network, n_buckets)
+        self.consolidate = consolidate
+        self.n_files = 0
+        # the addresses with transactions in the store and the buckets whose files may hold duplicated transactions
+        self.set_address = set()
+        self.set_dirty_bucket = set()
+
+    def open(self, keep=False):
+        self.set_address = set()
+        self.set_dirty_bucket = set()
+        if not keep:
+            if os.path.exists(self.store.path_to_store):
+                shutil.rmtree(self.store.path_to_store)
+            return
+        if self.store.exists():
+            self.store.n_buckets = self.store.load_manifest()['n_buckets']
+        if os.path.exists(self.store.path_to_store):
+            # the manifest also lists the files written by an interrupted extraction after the last manifest
+            self.set_address = set(self.store.refresh_manifest()['addresses'])
+
+    def write(self, df, np_address, watermarks=None):
+        dict_rows = get_address_rows(df, np_address)
+        dict_watermark = {}
+        if watermarks is not None:
+            dict_watermark = dict(zip(np_address, watermarks))
+        dict_bucket_df = {}
+        for address, rows in dict_rows.items():
+            rows = get_new_rows(df, rows, dict_watermark.get(address))
+            if len(rows) > 0:
+                df_address = df.iloc[rows].copy()
+                df_address["EOA"] = address
+                bucket = get_bucket(address, self.store.n_buckets)
+                dict_bucket_df.setdefault(bucket, []).append(df_address)
+                # only the transactions newer than the watermark of an address are written again
+                if address in self.set_address and address not in dict_watermark:
+                    self.set_dirty_bucket.add(bucket)
+                self.set_address.add(address)
+        # the name of the files of a chunk is stable so exporting the same chunk again replaces them, and the
+        # watermarks of an incremental extraction make it different from the files of the previous extraction
+        sha1 = hashlib.sha1(",".join(np_address).encode())
+        if watermarks is not None:
+            sha1.update(np.asarray(watermarks, dtype="datetime64[ns]").tobytes())
+        part_name = "part-" + sha1.hexdigest()[:16]
+        files = []
+        for bucket, list_df in dict_bucket_df.items():
+            df_bucket = pd.concat(list_df, ignore_index=True)
+            df_bucket["block_timestamp"] = get_naive_timestamp(df_bucket.block_timestamp)
+            df_bucket = set_transaction_dtypes(df_bucket)
+            files.append(os.path.join(self.store.path_to_store,
+                                      self.store.write_part(bucket, df_bucket, part_name)['path']))
+        self.n_files += len(files)
+        return files
+
+    def get_watermarks(self, array_address):
+        watermarks = np.full(len(array_address), np.datetime64("NaT"), dtype="datetime64[ns]")
+        if not self.store.exists():
+            return watermarks
+        address_list = [str(address).lower() for address in array_address]
+        df = self.store.read(address_list, columns=["block_timestamp"])
+        if df.shape[0] > 0:
+            series_max = df.groupby("EOA").block_timestamp.max()
+            watermarks = pd.Series(address_list).map(series_max).to_numpy(dtype="datetime64[ns]")
+        return watermarks
+
+    def close(self):
+        if self.consolidate:
+            self.store.consolidate(subset=["EOA", "tx_hash"])
+        elif self.set_dirty_bucket:
+            self.store.consolidate(sorted(self.set_dirty_bucket), subset=["EOA", "tx_hash"])
+        else:
+            self.store.refresh_manifest()
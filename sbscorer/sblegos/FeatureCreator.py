@@ -10,8 +10,8 @@ ETH_DECIMAL = 10E18
 
 class FeatureCreator(Transaction):
 
-    def __init__(self, df_transactions, array_address=None):
-        super().__init__(df_transactions, array_address)
+    def __init__(self, df_transactions, array_address=None, interner=None):
+        super().__init__(df_transactions, array_address, interner)
 
         self.df_transactions.sort_values("block_timestamp", inplace=True)  # required by tsfresh
         self.df_transactions.reset_index(drop=True, inplace=True)
@@ -32,5 +32,7 @@ class FeatureCreator(Transaction):
                                             impute_function=impute)
         features_tsfresh.reset_index(inplace=True)
         features_tsfresh.rename(columns={"index": "eoa"}, inplace=True)
+        if self.interner is not None:
+            features_tsfresh = self.interner.translate_df(features_tsfresh, ['eoa'])
 
         return features_tsfresh
@@ -16,7 +16,7 @@ class Transaction(object):
     It has methods that allows to perform on chain analysis of an address.
     """
 
-    def __init__(self, df_transactions, array_address=None):
+    def __init__(self, df_transactions, array_address=None, interner=None):
         """
         This class is used to analyse transactions of an address.
         It has methods that allows to perform on chain analysis of an address.
@@ -27,8 +27,11 @@ class Transaction(object):
         ----------
         df_transactions : pd.DataFrame
             The dataframe containing all the transactions of the addresses
-        array_address : np.ndarray
-            The ndarray containing a list of addresses
+        array_address : array like
+            The array containing a list of addresses, it is converted to a np.ndarray
+        interner : AddressInterner
+            The interner used to load df_transactions when its address columns are uint32 ids, the addresses are then
+            translated back to strings in the outputs
         """
         assert isinstance(df_transactions, pd.DataFrame), "The df_transactions should be a pd.DataFrame"
 
@@ -42,6 +45,8 @@ class Transaction(object):
         assert 'from_address' in columns, "The df_transactions should have a column named 'from_address'"
         assert 'to_address' in columns, "The df_transactions should have a column named 'to_address'"
 
+        self.interner = interner
+
         if 'eoa' not in columns:
             tmp_df_tx = df_transactions.copy()
             print("Creating eoa column")
@@ -55,6 +60,7 @@ class Transaction(object):
             self.array_address = tmp_df_tx['eoa'].unique()
             self.df_transactions = tmp_df_tx
         else:
-            assert isinstance(array_address, np.ndarray), "The array_address should be a numpy array"
+            # the unique of a compact column is an ArrowStringArray
+            array_address = np.asarray(array_address)
             self.array_address = np.intersect1d(array_address, tmp_df_tx['eoa'].unique())
             self.df_transactions = df_transactions[tmp_df_tx['eoa'].isin(array_address)]
@@ -18,7 +18,7 @@ class TransactionAnalyser(object):
     It has methods that allows to perform on chain analysis of an address.
     """
 
-    def __init__(self, df_transactions, array_address):
+    def __init__(self, df_transactions, array_address, backing_store=None, interner=None):
         """
         This class is used to analyse transactions of an address.
         It has methods that allows to perform on chain analysis of an address.
@@ -29,11 +29,24 @@ class TransactionAnalyser(object):
         ----------
         df_transactions : pd.DataFrame
             The dataframe containing all the transactions of the addresses
-        array_address : np.ndarray
-            The ndarray containing a list of addresses
+        array_address : array like
+            The array containing a list of addresses, it is converted to a np.ndarray
+        backing_store : callable
+            Optional function taking an address and returning its transactions, for example
+            LoadData.get_backing_store(chain). It is used by get_address_transactions for the addresses that are not
+            in df_transactions, so they are loaded lazily.
+        interner : AddressInterner
+            The interner used to load df_transactions when its address columns are uint32 ids (LoadData with
+            intern_addresses=True). array_address and the addresses given to the methods are then ids too, and the
+            addresses are translated back to strings in the outputs of transaction_similitude_pylcs and
+            get_df_features.
         """
         assert isinstance(df_transactions, pd.DataFrame), "The df_transactions should be a pd.DataFrame"
-        assert isinstance(array_address, np.ndarray), "The df_address should be a numpy array"
+        # the unique of a compact column is an ArrowStringArray
+        array_address = np.asarray(array_address)
+
+        self.backing_store = backing_store
+        self.interner = interner
 
         self.gb_EOA_sorted = None
         self.df_seed_wallet_naive = None
@@ -313,7 +326,8 @@ class TransactionAnalyser(object):
         for address in self.unique_eoa:
             df = self.gb_EOA_sorted.get_group(address)
             add_interacted = np.append(df['to_address'].to_numpy(), df['from_address'].to_numpy())
-            add_interacted = add_interacted.astype('str')
+            if add_interacted.dtype == object:
+                add_interacted = add_interacted.astype('str')
             unique_add_interacted = np.unique(add_interacted)
             unique_add_interacted = unique_add_interacted[unique_add_interacted != address]
             dict_add_interacted[address] = unique_add_interacted
@@ -494,6 +508,8 @@ class TransactionAnalyser(object):
         df_similar_address['len_intersect'] = df_similar_address['shape'].apply(lambda x: max(1, min(shape_target, x)))
         df_similar_address['score'] = df_similar_address['lcs'] / df_similar_address['len_intersect']
         df_similar_address.drop(columns=['shape', 'len_intersect'], inplace=True)
+        if self.interner is not None:
+            df_similar_address = self.interner.translate_df(df_similar_address, ['address'])
         return df_similar_address.set_index('address')
 
     @staticmethod
@@ -547,7 +563,8 @@ class TransactionAnalyser(object):
 
     def get_address_transactions(self, address):
         """
-        Get transactions of an address from the self.df_transaction df using the group by
+        Get transactions of an address from the self.df_transaction df using the group by.
+        If the address is not in df_transactions and a backing_store is set, the transactions are loaded from it.
         Parameters
         ----------
         address : str
@@ -562,8 +579,13 @@ class TransactionAnalyser(object):
         try:
             df = self.gb_EOA_sorted.get_group(address)
         except Exception as e:
-            df = pd.DataFrame()
-            print(e)
+            if self.backing_store is not None:
+                df = self.backing_store(address)
+                if df.shape[0] > 0:
+                    df = df.sort_values('block_timestamp', ascending=True)
+            else:
+                df = pd.DataFrame()
+                print(e)
         return df
 
     def get_address_transactions_add(self, df, address):
@@ -617,7 +639,13 @@ class TransactionAnalyser(object):
     def get_dict_string_tx(self, gb_address, algo_type="address_only"):
         dict_string_tx = {}
         for address, df_address in gb_address:
-            array_transactions = self.get_array_transactions(df_address, address, algo_type)
+            if self.interner is not None:
+                # the strings compare the first characters of the addresses, the ids are translated back
+                df_address = self.interner.translate_df(df_address, ['from_address', 'to_address'])
+                array_transactions = self.get_array_transactions(df_address, self.interner.translate(address),
+                                                                 algo_type)
+            else:
+                array_transactions = self.get_array_transactions(df_address, address, algo_type)
             dict_string_tx[address] = "".join(array_transactions)
         return dict_string_tx
 
@@ -779,4 +807,6 @@ class TransactionAnalyser(object):
             merge = merge.merge(details_first_outgoing_transaction, on='EOA', how='left')
             self.print_time_elapsed(start_time, 'details_first_outgoing_transaction')
 
+        if self.interner is not None:
+            merge = self.interner.translate_df(merge, ['EOA', 'first_in_tx_from', 'to_address'])
         return merge
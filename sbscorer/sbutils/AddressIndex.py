@@ -0,0 +1,156 @@
+import os
+
+import pandas as pd
+
+INDEX_DIR = "_index"
+INDEX_COLUMNS = ['address', 'file', 'n_rows', 'size', 'mtime']
+
+
+def count_rows(full_path):
+    """return the number of rows of a csv file without parsing it, the header is not counted"""
+    with open(full_path, 'rb') as f:
+        n_lines = sum(chunk.count(b'\n') for chunk in iter(lambda: f.read(1 << 20), b''))
+        f.seek(0, os.SEEK_END)
+        if f.tell() > 0:
+            f.seek(-1, os.SEEK_END)
+            if f.read(1) != b'\n':
+                n_lines += 1  # last line without a line break
+    return max(0, n_lines - 1)
+
+
+class AddressIndex(object):
+    """
+    This class holds the manifest of the transaction files of a chain. It maps each address to its file, the number
+    of transactions, the size in bytes and the modification time of the file in nanoseconds.
+    It is persisted in path_to_transaction_folder/_index/chain.csv and refreshed incrementally: only the new or
+    modified files are read to count their rows.
+    """
+
+    def __init__(self, path_to_transaction_folder, chain):
+        """
+        Parameters
+        ----------
+        path_to_transaction_folder : str
+            The path to the folder containing a folder for each chain
+        chain : str
+            The chain of the index. For example "ethereum"
+        """
+        self.chain = chain
+        self.path_to_chain = os.path.join(path_to_transaction_folder, chain)
+        self.path_to_index = os.path.join(path_to_transaction_folder, INDEX_DIR, f"{chain}.csv")
+        self.df_index = None
+
+    def exists(self):
+        """return True if the index has been persisted"""
+        return os.path.exists(self.path_to_index)
+
+    def load(self):
+        """
+        Load the persisted index, or build it if it does not exist
+
+        Returns
+        -------
+        df_index : pd.DataFrame
+            The index with address as index and the columns file, n_rows, size and mtime
+        """
+        if self.df_index is None:
+            if self.exists():
+                self.df_index = pd.read_csv(self.path_to_index, index_col='address')
+            else:
+                self.refresh()
+        return self.df_index
+
+    def save(self):
+        """persist the index"""
+        os.makedirs(os.path.dirname(self.path_to_index), exist_ok=True)
+        self.df_index.to_csv(self.path_to_index)
+
+    def scan(self):
+        """
+        Stat all the files of the chain folder
+
+        Returns
+        -------
+        df_scan : pd.DataFrame
+            A dataframe with address as index and the columns file, size and mtime
+        """
+        list_stat = []
+        with os.scandir(self.path_to_chain) as it:
+            for entry in it:
+                if entry.is_file():
+                    stat = entry.stat()
+                    list_stat.append((entry.name.split('_')[0], entry.name, stat.st_size, stat.st_mtime_ns))
+        df_scan = pd.DataFrame(list_stat, columns=['address', 'file', 'size', 'mtime'])
+        return df_scan.set_index('address')
+
+    def refresh(self):
+        """
+        Update the index with the current content of the chain folder and persist it if it changed.
+        The rows of the files that did not change (same size and mtime) are not counted again.
+
+        Returns
+        -------
+        df_changed : pd.DataFrame
+            The entries of the new or modified files
+        """
+        df_scan = self.scan()
+        if self.df_index is None and self.exists():
+            self.df_index = pd.read_csv(self.path_to_index, index_col='address')
+
+        if self.df_index is None:
+            mask_changed = pd.Series(True, index=df_scan.index)
+            df_scan['n_rows'] = -1
+        else:
+            df_scan['n_rows'] = self.df_index['n_rows'].reindex(df_scan.index).fillna(-1).astype('int64')
+            df_old = self.df_index.reindex(df_scan.index)
+            mask_changed = (df_old['size'] != df_scan['size']) | (df_old['mtime'] != df_scan['mtime'])
+
+        if mask_changed.any():
+            df_scan.loc[mask_changed, 'n_rows'] = [count_rows(os.path.join(self.path_to_chain, file))
+                                                   for file in df_scan.loc[mask_changed, 'file']]
+        # the index is only written again if a file was added, modified or removed
+        removed = self.df_index is not None and not self.df_index.index.isin(df_scan.index).all()
+        self.df_index = df_scan.loc[:, INDEX_COLUMNS[1:]]
+        if mask_changed.any() or removed or not self.exists():
+            self.save()
+        return self.df_index[mask_changed]
+
+    def get_files(self, address_list=None):
+        """
+        Get the files of the addresses in address_list, the lookup is done with a hash table
+
+        Parameters
+        ----------
+        address_list : list
+            A list of addresses, if None all the files are returned
+
+        Returns
+        -------
+        files : list
+            The files of the addresses present in the index
+        """
+        df_index = self.load()
+        if address_list is None:
+            return df_index['file'].tolist()
+        return df_index.loc[df_index.index.isin(address_list), 'file'].tolist()
+
+    def estimate(self, address_list=None):
+        """
+        Estimate the size of the transactions of a list of addresses before loading them
+
+        Parameters
+        ----------
+        address_list : list
+            A list of addresses, if None all the addresses of the index are used
+
+        Returns
+        -------
+        estimate : dict
+            The number of files, the number of rows and the size in bytes of the csv files
+        """
+        df_index = self.load()
+        if address_list is not None:
+            df_index = df_index[df_index.index.isin(address_list)]
+        return {'n_files': int(df_index.shape[0]),
+                'n_rows': int(df_index['n_rows'].sum()),
+                'size': int(df_index['size'].sum())}
@@ -0,0 +1,134 @@
+import threading
+
+import numpy as np
+import pandas as pd
+
+from sbscorer.sbutils.schema import ADDRESS_COLUMNS
+
+# id of the missing addresses, for example the to_address of a contract creation
+MISSING_ID = 0
+
+
+class AddressInterner(object):
+    """
+    This class maps each address to a compact uint32 id and back.
+    Comparing, hashing and grouping uint32 ids is much faster and lighter than 42 characters strings, so the address
+    columns can be interned at load time and translated back to strings only for the outputs.
+    The ids only live in memory, the same interner must be used for all the dataframes that are compared together,
+    GLOBAL_INTERNER is shared by default.
+    """
+
+    def __init__(self):
+        self.dict_id = {}
+        self.list_address = [None]  # MISSING_ID
+        self._array_address = None
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.list_address) - 1
+
+    def intern(self, values):
+        """
+        Get the ids of the addresses, new addresses are given a new id
+
+        Parameters
+        ----------
+        values : array like
+            The addresses, missing values are given MISSING_ID
+
+        Returns
+        -------
+        ids : np.ndarray
+            The uint32 ids of the addresses
+        """
+        codes, uniques = pd.factorize(pd.Series(values))
+        with self._lock:
+            ids_unique = np.fromiter((self.get_or_add(address) for address in uniques), dtype=np.uint32,
+                                     count=len(uniques))
+        ids = np.full(len(codes), MISSING_ID, dtype=np.uint32)
+        mask = codes >= 0
+        ids[mask] = ids_unique[codes[mask]]
+        return ids
+
+    def get_or_add(self, address):
+        """return the id of an address and add it if needed, the caller should hold the lock"""
+        address_id = self.dict_id.get(address)
+        if address_id is None:
+            address_id = len(self.list_address)
+            self.dict_id[address] = address_id
+            self.list_address.append(address)
+        return address_id
+
+    def get_id(self, address):
+        """return the id of an address or None if it has not been interned"""
+        return self.dict_id.get(address)
+
+    def translate(self, ids):
+        """
+        Get the addresses of ids
+
+        Parameters
+        ----------
+        ids : array like or int
+            The ids to translate
+
+        Returns
+        -------
+        addresses : np.ndarray or str
+            The addresses, None for MISSING_ID
+        """
+        if self._array_address is None or len(self._array_address) != len(self.list_address):
+            with self._lock:
+                self._array_address = np.array(self.list_address, dtype=object)
+        return self._array_address[ids]
+
+    def intern_df(self, df, columns=None):
+        """
+        Replace the address columns of a dataframe by their ids
+
+        Parameters
+        ----------
+        df : pd.DataFrame
+            The dataframe of transactions
+        columns : list
+            The columns to intern default is EOA, from_address and to_address when they are in df
+
+        Returns
+        -------
+        df : pd.DataFrame
+            The same dataframe with uint32 address columns
+        """
+        if columns is None:
+            columns = [col for col in ADDRESS_COLUMNS if col in df.columns]
+        for col in columns:
+            df[col] = self.intern(df[col])
+        return df
+
+    def translate_df(self, df, columns):
+        """
+        Replace the id columns of a dataframe by their addresses, the dataframe is copied
+
+        Parameters
+        ----------
+        df : pd.DataFrame
+            The dataframe with id columns
+        columns : list
+            The columns to translate, the columns that are not in df are ignored
+
+        Returns
+        -------
+        df : pd.DataFrame
+            A copy of the dataframe with address columns
+        """
+        df = df.copy()
+        for col in columns:
+            if col in df.columns:
+                # a left merge can add missing values to an id column
+                mask = df[col].notna().to_numpy()
+                addresses = np.full(df.shape[0], None, dtype=object)
+                addresses[mask] = self.translate(df[col].to_numpy()[mask].astype(np.int64))
+                df[col] = addresses
+        return df
+
+
+GLOBAL_INTERNER = AddressInterner()
@@ -1,7 +1,19 @@
 import os
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from itertools import repeat
 
 import pandas as pd
 
+from sbscorer.sbutils.AddressIndex import AddressIndex
+from sbscorer.sbutils.AddressInterner import GLOBAL_INTERNER
+from sbscorer.sbutils.TransactionCache import TransactionCache
+from sbscorer.sbutils.TransactionSnapshot import TransactionSnapshot
+from sbscorer.sbutils.TransactionStore import TransactionStore, get_bucket
+from sbscorer.sbutils.TransactionTable import TransactionTable
+from sbscorer.sbutils.schema import get_file_columns, set_compact_dtypes, set_transaction_dtypes
+
 
 class LoadData(object):
     """
@@ -9,7 +21,9 @@ class LoadData(object):
     The main one is create_df_tx which load all the transactions from the csv files
     """
 
-    def __init__(self, path_to_transaction_folder):
+    def __init__(self, path_to_transaction_folder, n_workers=1, executor="thread", use_store=True, columns=None,
+                 compact=False, cache_max_bytes=512 * 2 ** 20, incremental=False, intern_addresses=False,
+                 interner=None):
         """
         Initialize the class with the path to the folder containing the csv files as exported by Flipside package
         It should contain a folder for each chain (ethereum, arbitrum, polygon, etc.) and inside are the csv files name
@@ -18,8 +32,94 @@ class LoadData(object):
         ----------
         path_to_transaction_folder : str
             The path to the folder containing the csv files
+        n_workers : int
+            The number of workers used to read the csv files concurrently default is 1, ie files are read serially
+        executor : str
+            The type of pool used when n_workers > 1. It can be "thread" or "process" default is "thread".
+            pd.read_csv releases the GIL for most of the parsing so threads are usually enough, "process" can help
+            when there are many tiny files and the python overhead dominates.
+        use_store : bool
+            If True default, create_df_tx reads the parquet store of the chain created by compact when it exists
+            instead of the csv files, unless the csv files changed since the store was created
+        columns : list
+            The columns to load, the others are not read. If None default, all columns are loaded.
+            The EOA column is always added. The column value selects the native value column of each chain, for example
+            eth_value on ethereum and matic_value on polygon, and the columns missing from a chain are skipped.
+            schema.ANALYSER_COLUMNS and schema.FEATURE_COLUMNS hold the columns used by
+            TransactionAnalyser and FeatureCreator.
+        compact : bool
+            If True the transactions are loaded with memory efficient dtypes: pyarrow strings for the addresses and
+            hashes, datetime64 for the timestamps and uint32 for the gas. It requires pyarrow. Default is False.
+        cache_max_bytes : int
+            The maximum memory size of the cache used by get_address_transactions default is 512 MB
+        incremental : bool
+            If True, create_df_tx keeps a snapshot of the transactions of each chain in
+            path_to_transaction_folder/_snapshot and the next calls only parse the files that are new or modified since
+            the snapshot (different size or modification time). Default is False.
+        intern_addresses : bool
+            If True, the EOA, from_address and to_address columns of the loaded dataframes are replaced by uint32 ids
+            given by the interner. TransactionAnalyser and FeatureCreator can run on these columns when they are given
+            the same interner. Default is False.
+        interner : AddressInterner
+            The interner used when intern_addresses is True default is GLOBAL_INTERNER
         """
+        if executor not in ("thread", "process"):
+            raise ValueError("executor must be either thread or process")
         self.path_to_tx_dir = path_to_transaction_folder
+        self.n_workers = n_workers
+        self.executor = executor
+        self.use_store = use_store
+        self.columns = get_file_columns(columns)
+        self.compact_dtypes = compact
+        # time in seconds to load each chain in the last call to create_df_tx_multi
+        self.load_timings = {}
+        self.cache = TransactionCache(cache_max_bytes)
+        self.incremental = incremental
+        # the store of each chain checked by get_address_transactions, None if the csv files are read instead
+        self.dict_store = {}
+        if intern_addresses:
+            self.interner = GLOBAL_INTERNER if interner is None else interner
+        else:
+            self.interner = None
+
+    def __getstate__(self):
+        # the workers of a process pool only parse files, they do not need a copy of the interner
+        state = self.__dict__.copy()
+        state['interner'] = None
+        return state
+
+    def get_store(self, tx_chain):
+        """
+        Get the parquet store of a chain if use_store is True and the store exists and holds the current csv files of
+        the chain. A store created before csv files were added, removed or modified is not used, a warning is printed
+        and the csv files are read instead until compact is run again.
+
+        Parameters
+        ----------
+        tx_chain : str
+            The chain of the store. For example "ethereum"
+
+        Returns
+        -------
+        store : TransactionStore
+            The store of the chain, None if the csv files should be read
+        """
+        if not self.use_store:
+            return None
+        store = TransactionStore(self.path_to_tx_dir, tx_chain)
+        if not store.exists():
+            return None
+        if store.is_stale():
+            print(f"WARNING: the csv files of {tx_chain} changed since its parquet store was created, they are read "
+                  f"instead of the store. Run compact again to update it")
+            return None
+        return store
+
+    def intern_df(self, df):
+        """return df with its address columns interned if intern_addresses is True, df otherwise"""
+        if self.interner is None:
+            return df
+        return self.interner.intern_df(df)
 
     def create_df_all_transactions(self, files, tx_chain, n_files=-1):
         """
@@ -39,13 +139,60 @@ class LoadData(object):
             A dataframe with all transactions from the given chain
 
         """
-        if n_files == -1:
-            df_list = [self.load_df_transactions(files[f_i], tx_chain) for f_i in range(len(files))]
+        if n_files != -1:
+            files = files[:n_files]
+        return self.load_files(files, tx_chain)
+
+    def load_files(self, files, tx_chain):
+        """
+        Load the given files of a chain and concatenate them in a single dataframe.
+        If n_workers > 1 the files are read concurrently in a pool of workers, the order of the rows is the same as
+        the order of the files whatever the number of workers.
+        Parameters
+        ----------
+        files : list
+            A list of files to load
+        tx_chain : str
+            The chain to load the transactions from. For example "ethereum"
+
+        Returns
+        -------
+        df : pd.DataFrame
+            A dataframe with the transactions of all the files
+        """
+        if self.n_workers == 1 or len(files) <= 1:
+            df_list = [self.load_df_tx(file, tx_chain) for file in files]
         else:
-            df_list = [self.load_df_transactions(files[f_i], tx_chain) for f_i in range(n_files)]
+            df_list = self.load_files_pool(files, tx_chain)
         df = pd.concat(df_list)
         return df
 
+    def load_files_pool(self, files, tx_chain):
+        """
+        Read the files in a thread or process pool. executor.map returns the results in the order of the files.
+        Parameters
+        ----------
+        files : list
+            A list of files to load
+        tx_chain : str
+            The chain to load the transactions from. For example "ethereum"
+
+        Returns
+        -------
+        df_list : list
+            The list of dataframes in the same order as the files
+        """
+        if self.executor == "process":
+            pool = ProcessPoolExecutor(max_workers=self.n_workers)
+            # send the files by chunks to limit the inter process communication for small files
+            chunksize = max(1, len(files) // (self.n_workers * 4))
+        else:
+            pool = ThreadPoolExecutor(max_workers=self.n_workers)
+            chunksize = 1
+        with pool:
+            df_list = list(pool.map(self.load_df_tx, files, repeat(tx_chain), chunksize=chunksize))
+        return df_list
+
     @staticmethod
     def get_files(path, chain):
         """
@@ -69,6 +216,8 @@ class LoadData(object):
     def get_files_in_address(self, chain, address_list):
         """
         Get the list of files in a given path and chain and that are in the address list
+        If the address index of the chain has been created with get_address_index it is refreshed, only the new or
+        modified files are counted, and used to look up the files.
         Parameters
         ----------
         chain : str
@@ -82,10 +231,42 @@ class LoadData(object):
             A list of files in the given path and chain and filtered by the address list
 
         """
+        address_index = AddressIndex(self.path_to_tx_dir, chain)
+        if address_index.exists():
+            # the files added or removed since the index was persisted are taken into account
+            address_index.refresh()
+            return address_index.get_files(address_list)
         all_files = self.get_files(self.path_to_tx_dir, chain)
-        files = [file for file in all_files if self.get_address_name(file) in address_list]
+        set_address = set(address_list)
+        files = [file for file in all_files if self.get_address_name(file) in set_address]
         return files
 
+    def get_address_index(self, chain, refresh=True):
+        """
+        Get the address index of a chain, a persisted manifest mapping each address to its file, number of rows, size
+        and modification time. Once created it is used by get_files_in_address, it can also be used to estimate the
+        memory needed before loading with AddressIndex.estimate.
+
+        Parameters
+        ----------
+        chain : str
+            The name of the chain
+        refresh : bool
+            If True default, the index is updated with the new or modified files of the chain folder and persisted.
+            It should be refreshed after each extraction.
+
+        Returns
+        -------
+        address_index : AddressIndex
+            The address index of the chain
+        """
+        address_index = AddressIndex(self.path_to_tx_dir, chain)
+        if refresh:
+            address_index.refresh()
+        else:
+            address_index.load()
+        return address_index
+
     def create_df_tx(self, tx_chain, address_list=None, n_files=-1):
         """
         Create a dataframe with all transactions from a given chain.
@@ -107,17 +288,336 @@ class LoadData(object):
             A dataframe with all transactions from the given chain
 
         """
+        store = self.get_store(tx_chain)
+        if store is not None:
+            return self.intern_df(self.read_store(store, address_list, n_files))
+        if self.incremental:
+            return self.intern_df(self.load_incremental(tx_chain, address_list, n_files))
 
         if address_list is None:
             files = self.get_files(self.path_to_tx_dir, tx_chain)
         else:
             files = self.get_files_in_address(tx_chain, address_list)
 
-        if n_files == -1:
-            df_list = [self.load_df_tx(files[f_i], tx_chain) for f_i in range(len(files))]
+        if n_files != -1:
+            files = files[:n_files]
+        return self.intern_df(self.load_files(files, tx_chain))
+
+    def create_df_tx_multi(self, chains, address_list=None, n_files=-1):
+        """
+        Create a dataframe with the transactions of several chains loaded concurrently, one thread per chain.
+        A categorical column chain holds the chain of each transaction and the dtypes are converted with
+        set_transaction_dtypes (or set_compact_dtypes in compact mode) so the csv and the parquet chains match.
+        The native value column keeps the name of each chain (eth_value, matic_value, avax_value...).
+        Chains without a folder or a parquet store are skipped. The time to load each chain is stored in load_timings.
+
+        Parameters
+        ----------
+        chains : list
+            The chains to load. For example ["ethereum", "polygon", "arbitrum"]
+        address_list : list
+            A list of addresses to filter the contributors
+        n_files : int
+            The number of files to load per chain. If -1, all files are loaded
+
+        Returns
+        -------
+        df : pd.DataFrame
+            A dataframe with the transactions of all the chains and a chain column
+        """
+        available_chains = []
+        for chain in chains:
+            if os.path.isdir(os.path.join(self.path_to_tx_dir, chain)) or \
+                    TransactionStore(self.path_to_tx_dir, chain).exists():
+                available_chains.append(chain)
+            else:
+                print(f"No transactions found for chain: {chain}")
+
+        self.load_timings = {}
+        with ThreadPoolExecutor(max_workers=max(1, len(available_chains))) as pool:
+            df_list = list(pool.map(self.load_chain, available_chains, repeat(address_list), repeat(n_files),
+                                    repeat(available_chains)))
+        for chain in available_chains:
+            print(f"Time taken for {chain}: {self.load_timings[chain]:.2f} seconds")
+        df = pd.concat(df_list, ignore_index=True)
+        return df
+
+    def create_transaction_table(self, tx_chain, address_list=None, n_files=-1):
+        """
+        Load the transactions of one or several chains into a TransactionTable where each transaction is stored once
+        even if it is in the file of both its sender and its receiver. The table keeps an address to rows index to get
+        the transactions of each EOA.
+
+        Parameters
+        ----------
+        tx_chain : str or list
+            The chain to load, for example "ethereum", or a list of chains loaded with create_df_tx_multi, the
+            transactions are then deduplicated on tx_hash and chain
+        address_list : list
+            A list of addresses to filter the contributors
+        n_files : int
+            The number of files to load per chain. If -1, all files are loaded
+
+        Returns
+        -------
+        transaction_table : TransactionTable
+            The deduplicated transactions and the address index
+        """
+        if isinstance(tx_chain, str):
+            df = self.create_df_tx(tx_chain, address_list=address_list, n_files=n_files)
         else:
-            df_list = [self.load_df_tx(files[f_i], tx_chain) for f_i in range(n_files)]
-        df = pd.concat(df_list)
+            df = self.create_df_tx_multi(tx_chain, address_list=address_list, n_files=n_files)
+        return TransactionTable(df)
+
+    def load_chain(self, tx_chain, address_list=None, n_files=-1, categories=None):
+        """
+        Load the transactions of a chain for create_df_tx_multi with a categorical chain column and store the time
+        taken in load_timings.
+
+        Parameters
+        ----------
+        tx_chain : str
+            The chain to load. For example "ethereum"
+        address_list : list
+            A list of addresses to filter the contributors
+        n_files : int
+            The number of files to load. If -1, all files are loaded
+        categories : list
+            The categories of the chain column, the same categories for all the chains keep the column categorical
+            after the concatenation. If None, only tx_chain is used.
+
+        Returns
+        -------
+        df : pd.DataFrame
+            A dataframe with the transactions of the chain
+        """
+        start_time = time.time()
+        df = self.create_df_tx(tx_chain, address_list=address_list, n_files=n_files)
+        if self.compact_dtypes:
+            df = set_compact_dtypes(df)
+        else:
+            df = set_transaction_dtypes(df)
+        if categories is None:
+            categories = [tx_chain]
+        df['chain'] = pd.Categorical([tx_chain] * df.shape[0], categories=categories)
+        self.load_timings[tx_chain] = time.time() - start_time
+        return df
+
+    def get_address_transactions(self, tx_chain, address):
+        """
+        Get the transactions of a single address without loading the chain. Only the file of the address, or its
+        bucket in the parquet store, is read. The dataframes are kept in a LRU cache bounded by cache_max_bytes,
+        the hits and misses are given by cache.get_stats(). The returned dataframe is shared with the cache and should
+        not be modified in place.
+
+        Parameters
+        ----------
+        tx_chain : str
+            The chain of the transactions. For example "ethereum"
+        address : str or int
+            The address to retrieve transactions, or its id if intern_addresses is True
+
+        Returns
+        -------
+        df : pd.DataFrame
+            The transactions of the address, empty if there is no transactions for the address
+        """
+        if self.interner is not None and not isinstance(address, str):
+            # TransactionAnalyser gives the ids of the interned dataframes, the files are named after the addresses
+            address = self.interner.translate(int(address))
+        key = (tx_chain, address)
+        df = self.cache.get(key)
+        if df is not None:
+            return df
+
+        # the freshness of the store is checked once per chain, not for each address
+        if tx_chain not in self.dict_store:
+            self.dict_store[tx_chain] = self.get_store(tx_chain)
+        store = self.dict_store[tx_chain]
+        file_name = f"{address}_tx.csv"
+        if store is not None:
+            df = store.read([address], columns=self.columns, compact=self.compact_dtypes)
+        elif os.path.exists(os.path.join(self.path_to_tx_dir, tx_chain, file_name)):
+            df = self.load_df_tx(file_name, tx_chain)
+        else:
+            df = pd.DataFrame()
+        df = self.intern_df(df)
+        self.cache.put(key, df)
+        return df
+
+    def get_backing_store(self, tx_chain):
+        """
+        Get a function returning the transactions of an address of a chain through get_address_transactions, to be
+        given as backing_store to TransactionAnalyser
+
+        Parameters
+        ----------
+        tx_chain : str
+            The chain of the transactions. For example "ethereum"
+
+        Returns
+        -------
+        backing_store : callable
+            A function taking an address and returning its transactions
+        """
+        return partial(self.get_address_transactions, tx_chain)
+
+    def iter_batches(self, tx_chain, batch_size=1000, address_list=None):
+        """
+        Iterate over the transactions of a chain by batches of addresses. Each batch holds all the transactions of
+        batch_size addresses, so per address features can be computed batch by batch without loading the whole chain.
+        It reads the parquet store of the chain when it exists and the csv files otherwise.
+
+        Parameters
+        ----------
+        tx_chain : str
+            The chain to study. For example "ethereum"
+        batch_size : int
+            The number of addresses in each batch default is 1000
+        address_list : list
+            A list of addresses to filter the contributors
+
+        Yields
+        ------
+        df : pd.DataFrame
+            A dataframe with all the transactions of the addresses of the batch
+        """
+        store = self.get_store(tx_chain)
+        if store is not None:
+            addresses = store.get_addresses()
+            if address_list is not None:
+                set_address = set(address_list)
+                addresses = [add for add in addresses if add in set_address]
+            # consecutive addresses of the same bucket are read from the same parquet file
+            addresses = sorted(addresses, key=lambda add: get_bucket(add, store.n_buckets))
+            for i in range(0, len(addresses), batch_size):
+                yield self.intern_df(store.read(addresses[i:i + batch_size], columns=self.columns,
+                                                compact=self.compact_dtypes))
+        else:
+            if address_list is None:
+                files = self.get_files(self.path_to_tx_dir, tx_chain)
+            else:
+                files = self.get_files_in_address(tx_chain, address_list)
+            for i in range(0, len(files), batch_size):
+                yield self.intern_df(self.load_files(files[i:i + batch_size], tx_chain))
+
+    def read_store(self, store, address_list=None, n_files=-1):
+        """
+        Read the transactions from the parquet store of a chain
+        Parameters
+        ----------
+        store : TransactionStore
+            The store of the chain
+        address_list : list
+            A list of addresses to filter the contributors
+        n_files : int
+            The number of addresses to load, the equivalent of the number of files. If -1, all addresses are loaded
+
+        Returns
+        -------
+        df : pd.DataFrame
+            A dataframe with the transactions of the store
+        """
+        if n_files != -1:
+            if address_list is None:
+                address_list = store.get_addresses()
+            else:
+                store_addresses = store.load_manifest()['addresses']
+                address_list = [add for add in address_list if add in store_addresses]
+            address_list = address_list[:n_files]
+        return store.read(address_list, columns=self.columns, compact=self.compact_dtypes)
+
+    def compact(self, tx_chain, n_buckets=64):
+        """
+        Convert the csv files of a chain into a parquet store partitioned by address bucket with proper dtypes and an
+        EOA column. The store is created in path_to_transaction_folder/_parquet/chain and is then used by create_df_tx.
+        The csv files are loaded bucket by bucket so the whole chain is never held in memory.
+        The store is not updated automatically, compact should be run again after a new extraction, until then the
+        csv files are read.
+        All the columns of the csv files are stored whatever the columns parameter of the class.
+
+        Parameters
+        ----------
+        tx_chain : str
+            The chain to compact. For example "ethereum"
+        n_buckets : int
+            The number of address buckets of the store default is 64
+
+        Returns
+        -------
+        manifest : dict
+            The manifest of the store
+        """
+        files = self.get_files(self.path_to_tx_dir, tx_chain)
+        dict_bucket_files = {}
+        for file in files:
+            bucket = get_bucket(self.get_address_name(file), n_buckets)
+            dict_bucket_files.setdefault(bucket, []).append(file)
+
+        path_dir = os.path.join(self.path_to_tx_dir, tx_chain)
+        source_files = []
+        for file in files:
+            stat = os.stat(os.path.join(path_dir, file))
+            source_files.append({'file': file, 'size': stat.st_size, 'mtime': stat.st_mtime})
+        self.dict_store.pop(tx_chain, None)
+
+        csv_loader = LoadData(self.path_to_tx_dir, n_workers=self.n_workers, executor=self.executor, use_store=False)
+        gen_df_bucket = ((bucket, set_transaction_dtypes(csv_loader.load_files(dict_bucket_files[bucket], tx_chain)))
+                         for bucket in sorted(dict_bucket_files))
+        store = TransactionStore(self.path_to_tx_dir, tx_chain, n_buckets=n_buckets)
+        return store.write(gen_df_bucket, source_files)
+
+    def load_incremental(self, tx_chain, address_list=None, n_files=-1):
+        """
+        Load all the transactions of a chain from its snapshot, only the files that are new or modified since the
+        snapshot are parsed and spliced in. The transactions of the removed files are dropped. The snapshot is then
+        updated if a file was added, modified or removed. The snapshot always holds the whole chain, address_list and
+        n_files are applied afterwards.
+
+        Parameters
+        ----------
+        tx_chain : str
+            The chain to study. For example "ethereum"
+        address_list : list
+            A list of addresses to filter the contributors
+        n_files : int
+            The number of files to load. If -1, all files are loaded
+
+        Returns
+        -------
+        df : pd.DataFrame
+            A dataframe with all transactions from the given chain
+        """
+        snapshot = TransactionSnapshot(self.path_to_tx_dir, tx_chain)
+        df_files = AddressIndex(self.path_to_tx_dir, tx_chain).scan()
+        meta = {'columns': self.columns, 'compact': self.compact_dtypes}
+        state = snapshot.load()
+
+        if state is None or state['meta'] != meta:
+            files_changed = df_files['file'].tolist()
+            df = self.load_files(files_changed, tx_chain)
+            modified = True
+        else:
+            df_old_files = state['df_files'].reindex(df_files.index)
+            mask_changed = (df_old_files['size'] != df_files['size']) | (df_old_files['mtime'] != df_files['mtime'])
+            files_changed = df_files.loc[mask_changed, 'file'].tolist()
+            removed = state['df_files'].index.difference(df_files.index)
+            addresses_out = removed.union(df_files.index[mask_changed])
+            df = state['df']
+            if len(addresses_out) > 0:
+                df = df[~df['EOA'].isin(addresses_out)]
+            if len(files_changed) > 0:
+                df = pd.concat([df, self.load_files(files_changed, tx_chain)])
+            modified = len(addresses_out) > 0
+        print(f"Parsed {len(files_changed)} new or modified files out of {df_files.shape[0]}")
+        # the snapshot is only written again if a file was added, modified or removed
+        if modified:
+            snapshot.save(df, df_files, meta)
+
+        if address_list is not None:
+            df = df[df['EOA'].isin(set(address_list))]
+        if n_files != -1:
+            df = df[df['EOA'].isin(df['EOA'].unique()[:n_files])]
         return df
 
     def load_df_tx(self, file_name, tx_chain):
@@ -139,14 +639,22 @@ class LoadData(object):
         """
         path_dir = os.path.join(self.path_to_tx_dir, tx_chain)
         full_path = os.path.join(path_dir, file_name)
+        if self.columns is None:
+            usecols = None
+        else:
+            # a callable does not fail on the columns missing from a chain, for example eth_value on polygon
+            set_columns = set(self.columns)
+            usecols = lambda col: col in set_columns
         try:
-            df = pd.read_csv(full_path)
+            df = pd.read_csv(full_path, usecols=usecols)
         except Exception as e:
             print(e)
             print("Error reading file: {}".format(full_path))
             raise
         if not "EOA" in df.columns.values:
             df["EOA"] = self.get_address_name(file_name)
+        if self.compact_dtypes:
+            df = set_compact_dtypes(df)
         return df
 
     @staticmethod
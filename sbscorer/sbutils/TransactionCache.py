@@ -0,0 +1,103 @@
+import threading
+from collections import OrderedDict
+
+
+class TransactionCache(object):
+    """
+    A least recently used cache of dataframes bounded by their memory size.
+    When adding a dataframe makes the cache exceed max_bytes, the least recently used dataframes are evicted.
+    It counts the hits, misses and evictions and can be shared between threads.
+    """
+
+    def __init__(self, max_bytes=512 * 2 ** 20):
+        """
+        Parameters
+        ----------
+        max_bytes : int
+            The maximum memory size in bytes of the dataframes in the cache default is 512 MB
+        """
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._dict_df = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """
+        Get a dataframe from the cache and mark it as recently used
+
+        Parameters
+        ----------
+        key : hashable
+            The key of the dataframe
+
+        Returns
+        -------
+        df : pd.DataFrame
+            The dataframe or None if the key is not in the cache
+        """
+        with self._lock:
+            if key not in self._dict_df:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._dict_df.move_to_end(key)
+            return self._dict_df[key][0]
+
+    def put(self, key, df):
+        """
+        Add a dataframe to the cache and evict the least recently used ones if needed.
+        A dataframe larger than max_bytes is not cached.
+
+        Parameters
+        ----------
+        key : hashable
+            The key of the dataframe
+        df : pd.DataFrame
+            The dataframe to cache
+        """
+        n_bytes = int(df.memory_usage(deep=True).sum())
+        if n_bytes > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._dict_df:
+                self.current_bytes -= self._dict_df.pop(key)[1]
+            self._dict_df[key] = (df, n_bytes)
+            self.current_bytes += n_bytes
+            while self.current_bytes > self.max_bytes:
+                _, (_, evicted_bytes) = self._dict_df.popitem(last=False)
+                self.current_bytes -= evicted_bytes
+                self.evictions += 1
+
+    def clear(self):
+        """remove all the dataframes from the cache, the counters are kept"""
+        with self._lock:
+            self._dict_df.clear()
+            self.current_bytes = 0
+
+    def __getstate__(self):
+        # a pickled cache (for example sent to a process pool with its LoadData) starts empty
+        return {'max_bytes': self.max_bytes}
+
+    def __setstate__(self, state):
+        self.__init__(state['max_bytes'])
+
+    def __len__(self):
+        return len(self._dict_df)
+
+    def get_stats(self):
+        """
+        Get the statistics of the cache
+
+        Returns
+        -------
+        stats : dict
+            The hits, misses, evictions, number of entries and size in bytes of the cache
+        """
+        return {'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'entries': len(self._dict_df),
+                'bytes': self.current_bytes}
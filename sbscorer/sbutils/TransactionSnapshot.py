@@ -0,0 +1,62 @@
+import os
+import pickle
+
+SNAPSHOT_DIR = "_snapshot"
+
+
+class TransactionSnapshot(object):
+    """
+    This class persists the transactions of a chain loaded from the csv files together with the size and modification
+    time of each file, so that the next load only parses the new or modified files.
+    It is stored in path_to_transaction_folder/_snapshot/chain.pkl
+    """
+
+    def __init__(self, path_to_transaction_folder, chain):
+        """
+        Parameters
+        ----------
+        path_to_transaction_folder : str
+            The path to the folder containing a folder for each chain
+        chain : str
+            The chain of the snapshot. For example "ethereum"
+        """
+        self.chain = chain
+        self.path_to_snapshot = os.path.join(path_to_transaction_folder, SNAPSHOT_DIR, f"{chain}.pkl")
+
+    def exists(self):
+        """return True if a snapshot has been saved"""
+        return os.path.exists(self.path_to_snapshot)
+
+    def load(self):
+        """
+        Load the snapshot
+
+        Returns
+        -------
+        snapshot : dict
+            A dict with the keys df (the transactions), df_files (file, size and mtime indexed by address) and meta
+            (the loading options the snapshot was created with), None if there is no snapshot
+        """
+        if not self.exists():
+            return None
+        with open(self.path_to_snapshot, 'rb') as f:
+            return pickle.load(f)
+
+    def save(self, df, df_files, meta):
+        """
+        Save the snapshot, it is first written to a temporary file so an interrupted save does not corrupt it
+
+        Parameters
+        ----------
+        df : pd.DataFrame
+            The transactions of the chain
+        df_files : pd.DataFrame
+            The file, size and mtime of the files the transactions were loaded from, indexed by address
+        meta : dict
+            The loading options, a snapshot is only reused with the same options
+        """
+        os.makedirs(os.path.dirname(self.path_to_snapshot), exist_ok=True)
+        path_tmp = self.path_to_snapshot + ".tmp"
+        with open(path_tmp, 'wb') as f:
+            pickle.dump({'df': df, 'df_files': df_files, 'meta': meta}, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(path_tmp, self.path_to_snapshot)
@@ -0,0 +1,285 @@
+import json
+import os
+import shutil
+import time
+import zlib
+
+import pandas as pd
+
+from sbscorer.sbutils.schema import set_compact_dtypes
+
+STORE_DIR = "_parquet"
+MANIFEST_FILE = "_manifest.json"
+
+
+def get_bucket(address, n_buckets):
+    """return the bucket of an address, it is stable between runs and python versions"""
+    return zlib.crc32(str(address).lower().encode()) % n_buckets
+
+
+class TransactionStore(object):
+    """
+    This class holds the transactions of a chain in a parquet dataset partitioned by address bucket.
+    It is located in path_to_transaction_folder/_parquet/chain and is described by a _manifest.json file listing the
+    parquet files, the addresses and the schema of the dataset.
+    It requires pyarrow to be installed.
+    """
+
+    def __init__(self, path_to_transaction_folder, chain, n_buckets=64):
+        """
+        Parameters
+        ----------
+        path_to_transaction_folder : str
+            The path to the folder containing a folder for each chain
+        chain : str
+            The chain of the store. For example "ethereum"
+        n_buckets : int
+            The number of address buckets used when writing the store default is 64
+        """
+        self.chain = chain
+        self.path_to_chain = os.path.join(path_to_transaction_folder, chain)
+        self.path_to_store = os.path.join(path_to_transaction_folder, STORE_DIR, chain)
+        self.path_to_manifest = os.path.join(self.path_to_store, MANIFEST_FILE)
+        self.n_buckets = n_buckets
+        self.manifest = None
+
+    def exists(self):
+        """return True if the store has been written"""
+        return os.path.exists(self.path_to_manifest)
+
+    def load_manifest(self):
+        """
+        Load the manifest of the store
+
+        Returns
+        -------
+        manifest : dict
+            The manifest with the keys chain, n_buckets, n_rows, columns, files and addresses
+        """
+        if self.manifest is None:
+            with open(self.path_to_manifest) as f:
+                self.manifest = json.load(f)
+            self.n_buckets = self.manifest['n_buckets']
+        return self.manifest
+
+    def is_stale(self):
+        """
+        Check if the csv files of the chain changed since the store was created from them with LoadData.compact, a
+        file was added, removed or modified (different size or modification time).
+        A store that was not created from csv files, for example by the ParquetSink of FlipsideApi, is never stale.
+
+        Returns
+        -------
+        stale : bool
+            True if the store does not hold the current csv files of the chain
+        """
+        source_files = self.load_manifest()['source_files']
+        if len(source_files) == 0:
+            return False
+        if not os.path.isdir(self.path_to_chain):
+            return True
+        dict_source = {f['file']: (f['size'], f['mtime']) for f in source_files}
+        dict_current = {}
+        with os.scandir(self.path_to_chain) as it:
+            for entry in it:
+                if entry.is_file():
+                    stat = entry.stat()
+                    dict_current[entry.name] = (stat.st_size, stat.st_mtime)
+        return dict_source != dict_current
+
+    def get_addresses(self):
+        """return the list of addresses in the store in the order they were written"""
+        return list(self.load_manifest()['addresses'].keys())
+
+    def write(self, gen_df_bucket, source_files=None):
+        """
+        Write the store from a generator of (bucket, df) where df holds all the transactions of the addresses of the
+        bucket. Writing bucket by bucket keeps the memory bounded by the size of a bucket.
+        An existing store of the chain is replaced.
+
+        Parameters
+        ----------
+        gen_df_bucket : iterable
+            An iterable of (bucket, df) tuples, df must have an EOA column
+        source_files : list
+            Optional list of dict describing the files the store was created from, stored in the manifest
+
+        Returns
+        -------
+        manifest : dict
+            The manifest of the store
+        """
+        if os.path.exists(self.path_to_store):
+            shutil.rmtree(self.path_to_store)
+        os.makedirs(self.path_to_store)
+        files = []
+        addresses = {}
+        columns = {}
+        for bucket, df in gen_df_bucket:
+            files.append(self.write_part(bucket, df))
+            for address, n_rows in df.groupby('EOA', sort=False).size().items():
+                addresses[address] = int(n_rows)
+            for col, dtype in df.dtypes.items():
+                columns[col] = str(dtype)
+        return self.write_manifest(files, addresses, columns, source_files)
+
+    def write_part(self, bucket, df, part_name="part-0"):
+        """
+        Write a parquet file in the folder of a bucket, an existing file with the same name is replaced
+
+        Parameters
+        ----------
+        bucket : int
+            The bucket of all the addresses of the EOA column of df
+        df : pd.DataFrame
+            The transactions to write
+        part_name : str
+            The name of the file without extension default is part-0
+
+        Returns
+        -------
+        file : dict
+            The path relative to the store, the bucket and the number of rows of the file
+        """
+        path_bucket = os.path.join(self.path_to_store, f"bucket={bucket:03d}")
+        os.makedirs(path_bucket, exist_ok=True)
+        relative_path = os.path.join(f"bucket={bucket:03d}", f"{part_name}.parquet")
+        tmp_path = os.path.join(self.path_to_store, relative_path + ".tmp")
+        df.to_parquet(tmp_path, index=False)
+        os.replace(tmp_path, os.path.join(self.path_to_store, relative_path))
+        return {'path': relative_path, 'bucket': bucket, 'n_rows': int(df.shape[0])}
+
+    def write_manifest(self, files, addresses, columns, source_files=None):
+        """write the manifest of the store and return it"""
+        self.manifest = {'chain': self.chain,
+                         'n_buckets': self.n_buckets,
+                         'n_rows': sum(f['n_rows'] for f in files),
+                         'created_at': time.time(),
+                         'columns': columns,
+                         'files': files,
+                         'addresses': addresses,
+                         'source_files': source_files or []}
+        with open(self.path_to_manifest, 'w') as f:
+            json.dump(self.manifest, f)
+        return self.manifest
+
+    def get_parts(self):
+        """return the sorted list of (bucket, relative path) of the parquet files of the store"""
+        list_part = []
+        if not os.path.exists(self.path_to_store):
+            return list_part
+        for bucket_dir in sorted(os.listdir(self.path_to_store)):
+            if bucket_dir.startswith("bucket="):
+                bucket = int(bucket_dir.split("=")[1])
+                for part in sorted(os.listdir(os.path.join(self.path_to_store, bucket_dir))):
+                    if part.endswith(".parquet"):
+                        list_part.append((bucket, os.path.join(bucket_dir, part)))
+        return list_part
+
+    def refresh_manifest(self, source_files=None):
+        """
+        Write the manifest from the parquet files of the store, for a store written part by part
+
+        Parameters
+        ----------
+        source_files : list
+            Optional list of dict describing the files the store was created from, stored in the manifest
+
+        Returns
+        -------
+        manifest : dict
+            The manifest of the store
+        """
+        import pyarrow.parquet as pq
+
+        files = []
+        addresses = {}
+        columns = {}
+        for bucket, relative_path in self.get_parts():
+            full_path = os.path.join(self.path_to_store, relative_path)
+            df_eoa = pq.read_table(full_path, columns=['EOA']).to_pandas()
+            files.append({'path': relative_path, 'bucket': bucket, 'n_rows': int(df_eoa.shape[0])})
+            for address, n_rows in df_eoa.groupby('EOA', sort=False).size().items():
+                addresses[address] = addresses.get(address, 0) + int(n_rows)
+            if not columns:
+                columns = {col: str(dtype)
+                           for col, dtype in pq.read_schema(full_path).empty_table().to_pandas().dtypes.items()}
+        os.makedirs(self.path_to_store, exist_ok=True)
+        return self.write_manifest(files, addresses, columns, source_files)
+
+    def consolidate(self, list_bucket=None, subset=None):
+        """
+        Merge the parquet files of each bucket into a single file, the buckets are read one by one so the memory is
+        bounded by the size of a bucket. The manifest is then refreshed.
+
+        Parameters
+        ----------
+        list_bucket : list
+            The buckets to merge default None all the buckets
+        subset : list
+            If given the rows duplicated on these columns are dropped when merging the files of a bucket, for example
+            the transactions of a chunk written twice. Default None the rows are kept
+
+        Returns
+        -------
+        manifest : dict
+            The manifest of the store
+        """
+        dict_bucket_parts = {}
+        for bucket, relative_path in self.get_parts():
+            if list_bucket is None or bucket in list_bucket:
+                dict_bucket_parts.setdefault(bucket, []).append(relative_path)
+        for bucket, list_path in dict_bucket_parts.items():
+            if list_path == [os.path.join(f"bucket={bucket:03d}", "part-0.parquet")]:
+                continue
+            df = pd.concat([pd.read_parquet(os.path.join(self.path_to_store, path)) for path in list_path],
+                           ignore_index=True)
+            if subset is not None:
+                df = df.drop_duplicates(subset=subset, ignore_index=True)
+            self.write_part(bucket, df)
+            for path in list_path:
+                if os.path.basename(path) != "part-0.parquet":
+                    os.remove(os.path.join(self.path_to_store, path))
+        return self.refresh_manifest()
+
+    def read(self, address_list=None, columns=None, compact=False):
+        """
+        Read the transactions of the store. If an address_list is given only the buckets of these addresses are read.
+
+        Parameters
+        ----------
+        address_list : list
+            A list of addresses to filter the EOA, if None all the transactions are read
+        columns : list
+            The columns to read, if None all columns are read
+        compact : bool
+            If True the dtypes of each file are converted with set_compact_dtypes before concatenation
+
+        Returns
+        -------
+        df : pd.DataFrame
+            A dataframe with the transactions
+        """
+        manifest = self.load_manifest()
+        files = manifest['files']
+        filters = None
+        if address_list is not None:
+            address_list = [add for add in address_list if add in manifest['addresses']]
+            buckets = {get_bucket(add, self.n_buckets) for add in address_list}
+            files = [f for f in files if f['bucket'] in buckets]
+            filters = [('EOA', 'in', address_list)]
+        if columns is not None:
+            # the columns missing from the store are skipped like in the csv files, eg eth_value on polygon
+            columns = [col for col in columns if col in manifest['columns']]
+            if 'EOA' not in columns:
+                columns.append('EOA')
+
+        df_list = []
+        for f in files:
+            df = pd.read_parquet(os.path.join(self.path_to_store, f['path']), columns=columns, filters=filters)
+            if compact:
+                df = set_compact_dtypes(df)
+            df_list.append(df)
+        if len(df_list) == 0:
+            return pd.DataFrame(columns=columns if columns is not None else list(manifest['columns'].keys()))
+        return pd.concat(df_list, ignore_index=True)
@@ -0,0 +1,87 @@
+import numpy as np
+import pandas as pd
+
+
+class TransactionTable(object):
+    """
+    This class holds the transactions of a set of addresses without duplicates.
+    A transaction between two addresses of the set is exported in the file of both addresses, here it is stored once
+    in df_transactions and each address points to its rows with a CSR index: the rows of addresses[i] are
+    indices[indptr[i]:indptr[i + 1]].
+    """
+
+    def __init__(self, df_transactions):
+        """
+        Build the table from a dataframe of transactions as loaded by LoadData, one row per transaction and EOA.
+        Transactions are identified by tx_hash, and by chain too if the dataframe has a chain column.
+
+        Parameters
+        ----------
+        df_transactions : pd.DataFrame
+            The dataframe of transactions with an EOA column
+        """
+        assert isinstance(df_transactions, pd.DataFrame), "The df_transactions should be a pd.DataFrame"
+        assert 'EOA' in df_transactions.columns, "The df_transactions should have a column named 'EOA'"
+
+        if 'chain' in df_transactions.columns:
+            row_id, _ = pd.MultiIndex.from_frame(df_transactions[['tx_hash', 'chain']]).factorize()
+        else:
+            row_id, _ = pd.factorize(df_transactions['tx_hash'], use_na_sentinel=False)
+        # codes are given in order of first appearance so the first rows are sorted by code
+        _, first_rows = np.unique(row_id, return_index=True)
+        self.df_transactions = df_transactions.iloc[first_rows].drop(columns='EOA').reset_index(drop=True)
+
+        eoa_codes, addresses = pd.factorize(df_transactions['EOA'])
+        order = np.argsort(eoa_codes, kind='stable')
+        self.addresses = np.asarray(addresses)
+        self.indices = row_id[order]
+        self.indptr = np.concatenate(([0], np.cumsum(np.bincount(eoa_codes, minlength=len(addresses)))))
+        self.address_position = pd.Index(self.addresses)
+
+    def get_address_rows(self, address):
+        """
+        Get the positions in df_transactions of the transactions of an address
+
+        Parameters
+        ----------
+        address : str
+            The address to retrieve transactions
+
+        Returns
+        -------
+        rows : np.ndarray
+            The positions of the transactions of the address, empty if the address is unknown
+        """
+        if address not in self.address_position:
+            return np.array([], dtype=self.indices.dtype)
+        i = self.address_position.get_loc(address)
+        return self.indices[self.indptr[i]:self.indptr[i + 1]]
+
+    def get_address_transactions(self, address):
+        """
+        Get the transactions of an address
+
+        Parameters
+        ----------
+        address : str
+            The address to retrieve transactions
+
+        Returns
+        -------
+        df : pd.DataFrame
+            The data frame with the transactions of the address
+        """
+        return self.df_transactions.iloc[self.get_address_rows(address)]
+
+    def to_eoa_frame(self):
+        """
+        Expand the table back to one row per transaction and EOA, the format expected by TransactionAnalyser
+
+        Returns
+        -------
+        df : pd.DataFrame
+            The transactions with an EOA column
+        """
+        df = self.df_transactions.iloc[self.indices].reset_index(drop=True)
+        df['EOA'] = np.repeat(self.addresses, np.diff(self.indptr))
+        return df
@@ -0,0 +1,101 @@
+import pandas as pd
+
+# Columns of the transaction files exported by FlipsideApi, the native value column depends on the network
+ADDRESS_COLUMNS = ['EOA', 'from_address', 'to_address']
+TIMESTAMP_COLUMNS = ['block_timestamp']
+GAS_COLUMNS = ['gas_limit', 'gas_used']
+NATIVE_VALUE_COLUMNS = ['eth_value', 'matic_value', 'avax_value', 'value']
+VALUE_COLUMNS = ['tx_fee'] + NATIVE_VALUE_COLUMNS
+STRING_COLUMNS = ['tx_hash']
+# The name of the native value column whatever the chain, in a list of columns it selects the value column of the chain
+VALUE_COLUMN = 'value'
+
+# Columns actually used by the legos, to be given to LoadData to avoid materializing the others
+ANALYSER_COLUMNS = ['tx_hash', 'block_timestamp', 'from_address', 'to_address', 'gas_limit', 'gas_used', VALUE_COLUMN]
+FEATURE_COLUMNS = ['block_timestamp', 'block_number', 'from_address', 'to_address', 'gas_limit', 'gas_used', 'tx_fee',
+                   VALUE_COLUMN]
+
+MAX_UINT32 = 2 ** 32 - 1
+
+
+def get_file_columns(columns):
+    """
+    Get the columns to read from the transaction files for a list of columns, VALUE_COLUMN is replaced by the native
+    value columns of all the chains so the value column of each chain is read with its name (eth_value, matic_value...)
+
+    Parameters
+    ----------
+    columns : list
+        The columns to load, None for all the columns
+
+    Returns
+    -------
+    file_columns : list
+        The columns to read, None for all the columns
+    """
+    if columns is None:
+        return None
+    file_columns = []
+    for col in columns:
+        for file_col in NATIVE_VALUE_COLUMNS if col == VALUE_COLUMN else [col]:
+            if file_col not in file_columns:
+                file_columns.append(file_col)
+    return file_columns
+
+
+def set_transaction_dtypes(df):
+    """
+    Convert the columns of a transaction dataframe read from csv to proper dtypes.
+    Timestamps are parsed to datetime64, gas to int64 and values to float64. Columns that are not in the dataframe are
+    ignored.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        The dataframe of transactions
+
+    Returns
+    -------
+    df : pd.DataFrame
+        The same dataframe with the converted columns
+    """
+    for col in TIMESTAMP_COLUMNS:
+        if col in df.columns and not pd.api.types.is_datetime64_any_dtype(df[col]):
+            df[col] = pd.to_datetime(df[col], format='ISO8601')
+    for col in GAS_COLUMNS:
+        if col in df.columns:
+            df[col] = pd.to_numeric(df[col])
+            if not df[col].hasnans:
+                df[col] = df[col].astype('int64')
+    for col in VALUE_COLUMNS:
+        if col in df.columns:
+            df[col] = pd.to_numeric(df[col]).astype('float64')
+    return df
+
+
+def set_compact_dtypes(df):
+    """
+    Convert the columns of a transaction dataframe to memory efficient dtypes.
+    On top of set_transaction_dtypes, addresses and hashes are stored as pyarrow strings instead of python objects and
+    gas columns are stored as uint32 when the values fit. It requires pyarrow to be installed.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        The dataframe of transactions
+
+    Returns
+    -------
+    df : pd.DataFrame
+        The same dataframe with the converted columns
+    """
+    df = set_transaction_dtypes(df)
+    for col in ADDRESS_COLUMNS + STRING_COLUMNS:
+        # the address columns interned as uint32 ids are kept
+        if col in df.columns and not pd.api.types.is_numeric_dtype(df[col]):
+            df[col] = df[col].astype('string[pyarrow]')
+    for col in GAS_COLUMNS:
+        if col in df.columns and df[col].dtype == 'int64':
+            if df.shape[0] == 0 or (df[col].min() >= 0 and df[col].max() <= MAX_UINT32):
+                df[col] = df[col].astype('uint32')
+    return df
@@ -0,0 +1,58 @@
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+absolute_path = os.fspath(Path.cwd().parent)
+if absolute_path not in sys.path:
+    sys.path.append(absolute_path)
+
+from sbscorer.sbdata.FlipsideApi import FlipsideApi
+from sbscorer.sbdata.QueryBackend import SqliteBackend
+
+# Benchmark of FlipsideApi.extract_transactions offline, on a SQLite stand-in of ethereum.core.fact_transactions
+N_ADDRESS = 20000
+N_TX_PER_ADDRESS = 20
+# seconds waited by each query to mimic flipside
+LATENCY = 0.5
+MAX_ADDRESS = 1000
+LIST_MAX_WORKERS = [1, 4, 8]
+
+
+def random_address(rng, n):
+    return np.array(["0x" + "".join(rng.choice(list("0123456789abcdef"), 40)) for _ in range(n)])
+
+
+def create_backend(array_address, n_tx_per_address):
+    rng = np.random.default_rng(0)
+    n_tx = len(array_address) * n_tx_per_address
+    df = pd.DataFrame({
+        "tx_hash": [f"0x{h:064x}" for h in rng.integers(0, 2 ** 62, n_tx)],
+        "block_timestamp": pd.Timestamp("2022-01-01") + pd.to_timedelta(rng.integers(0, 365 * 24, n_tx), unit="h"),
+        "from_address": np.repeat(array_address, n_tx_per_address),
+        "to_address": rng.choice(random_address(rng, 1000), n_tx),
+        "gas_limit": 21000,
+        "gas_used": 21000,
+        "tx_fee": rng.random(n_tx) / 1000,
+        "eth_value": rng.random(n_tx),
+    })
+    backend = SqliteBackend(latency=LATENCY)
+    backend.load_transactions("ethereum", df)
+    return backend
+
+
+if __name__ == "__main__":
+    array_address = random_address(np.random.default_rng(1), N_ADDRESS)
+    print(f"Loading {N_ADDRESS * N_TX_PER_ADDRESS} transactions of {N_ADDRESS} addresses")
+    backend = create_backend(array_address, N_TX_PER_ADDRESS)
+    for max_workers in LIST_MAX_WORKERS:
+        flipside_api = FlipsideApi("offline", max_address=MAX_ADDRESS, max_workers=max_workers, backend=backend)
+        with tempfile.TemporaryDirectory() as extract_dir:
+            start_time = time.time()
+            flipside_api.extract_transactions(extract_dir, array_address, list_network=["ethereum"])
+            elapsed = time.time() - start_time
+        print(f"max_workers={max_workers}: {elapsed:.2f} seconds for {N_ADDRESS} addresses")
@@ -0,0 +1,62 @@
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+absolute_path = os.fspath(Path.cwd().parent)
+if absolute_path not in sys.path:
+    sys.path.append(absolute_path)
+
+from sbscorer.sbutils.LoadData import LoadData
+
+# Benchmark of LoadData.create_df_tx on a synthetic chain folder of many small <address>_tx.csv files
+N_FILES = 50000
+N_TX_PER_FILE = 20
+CHAIN = "ethereum"
+LIST_N_WORKERS = [4, 8, 16]
+
+
+def random_address(rng, n):
+    return np.array(["0x" + "".join(rng.choice(list("0123456789abcdef"), 40)) for _ in range(n)])
+
+
+def create_synthetic_folder(path_to_tx_dir, n_files, n_tx_per_file):
+    rng = np.random.default_rng(0)
+    path_to_chain = os.path.join(path_to_tx_dir, CHAIN)
+    os.makedirs(path_to_chain)
+    counterparties = random_address(rng, 1000)
+    for address in random_address(rng, n_files):
+        df = pd.DataFrame({
+            "tx_hash": [f"0x{h:064x}" for h in rng.integers(0, 2 ** 62, n_tx_per_file)],
+            "block_timestamp": pd.date_range("2022-01-01", periods=n_tx_per_file, freq="h").astype(str),
+            "from_address": address,
+            "to_address": rng.choice(counterparties, n_tx_per_file),
+            "gas_limit": 21000,
+            "gas_used": 21000,
+            "tx_fee": rng.random(n_tx_per_file) / 1000,
+            "eth_value": rng.random(n_tx_per_file),
+        })
+        df.to_csv(os.path.join(path_to_chain, f"{address}_tx.csv"), index=False)
+
+
+def time_load(data_loader):
+    start_time = time.time()
+    df = data_loader.create_df_tx(CHAIN)
+    return time.time() - start_time, df.shape[0]
+
+
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        print(f"Creating {N_FILES} files of {N_TX_PER_FILE} transactions")
+        create_synthetic_folder(tmp_dir, N_FILES, N_TX_PER_FILE)
+
+        elapsed, n_rows = time_load(LoadData(tmp_dir))
+        print(f"serial: {elapsed:.2f} seconds for {n_rows} rows")
+        for executor in ["thread", "process"]:
+            for n_workers in LIST_N_WORKERS:
+                elapsed, n_rows = time_load(LoadData(tmp_dir, n_workers=n_workers, executor=executor))
+                print(f"{executor} n_workers={n_workers}: {elapsed:.2f} seconds for {n_rows} rows")
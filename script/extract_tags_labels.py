@@ -10,43 +10,51 @@ if absolute_path not in sys.path:
     sys.path.append(absolute_path)
 
 from sbscorer.sbdata.FlipsideApi import FlipsideApi
+from sbscorer.sbdata.LabelStore import LabelStore
 
 api_key = os.environ['FLIPSIDE_API_KEY']
-flipside_api = FlipsideApi(api_key)
+# the counterparties are queried by chunks of max_address addresses, max_workers queries in flight
+flipside_api = FlipsideApi(api_key, max_address=1000, max_workers=4)
 PATH_TO_ADDRESS = "../../data/grants/unique_ctbt_address.csv"
 PATH_TO_TRANSACTIONS = "../../data/transactions"
 PATH_TO_TAGS = "../../data/tags"
+# the labels and tags already extracted are kept in a local store, only the new counterparties are queried
+PATH_TO_LABEL_STORE = os.path.join(PATH_TO_TAGS, "label_store.sqlite")
 
 # Extract transactions from all csv in PATH_TO_TRANSACTIONS
 list_address = []
-for network in os.listdir(PATH_TO_TRANSACTIONS):
-    print("Extracting transactions for network: ", network)
+for network in sorted(os.listdir(PATH_TO_TRANSACTIONS)):
     path_to_export = os.path.join(PATH_TO_TRANSACTIONS, network)
-    for file in os.listdir(path_to_export):
+    # the journal, parquet store, address index and snapshots of the extraction are kept in folders starting with _
+    if network.startswith("_") or not os.path.isdir(path_to_export):
+        continue
+    print("Extracting transactions for network: ", network)
+    for file in sorted(os.listdir(path_to_export)):
+        if not file.endswith("_tx.csv"):
+            continue
         df_address = pd.read_csv(
             os.path.join(path_to_export, file),
             usecols=["from_address", "to_address"])
         list_address.append(df_address.from_address.values)
         list_address.append(df_address.to_address.values)
 
-list_address = np.concatenate(list_address)
-list_unique_address = np.unique(list_address.astype(str))
+list_address = pd.Series(np.concatenate(list_address)).dropna()
+list_unique_address = list_address.astype(str).str.lower().unique()
+
+if not os.path.exists(PATH_TO_TAGS):
+    os.makedirs(PATH_TO_TAGS)
+label_store = LabelStore(PATH_TO_LABEL_STORE)
 
 print("Start extracting tags")
-sql_tag = flipside_api.get_all_cross_chain_info_sql_query(list_unique_address, info_type="tag")
-df_tags = flipside_api.execute_query(sql_tag)
+df_tags = flipside_api.extract_cross_chain_info(list_unique_address, label_store, info_type="tag")
 print("End extracting tags")
 
 print("Start extracting labels")
-sql_labels = flipside_api.get_all_cross_chain_info_sql_query(list_unique_address, info_type="label")
-df_labels = flipside_api.execute_query(sql_labels)
+df_labels = flipside_api.extract_cross_chain_info(list_unique_address, label_store, info_type="label")
 print("End extracting labels")
 
 print("export_to_csv")
 
-if not os.path.exists(PATH_TO_TAGS):
-    os.makedirs(PATH_TO_TAGS)
-
 df_tags.to_csv(os.path.join(PATH_TO_TAGS, "tags.csv"), index=True)
 df_labels.to_csv(os.path.join(PATH_TO_TAGS, "labels.csv"), index=True)
 
@@ -0,0 +1,64 @@
+import json
+import os
+import tempfile
+import unittest
+
+from sbscorer.sbdata.ChunkSizer import ChunkSizer
+
+
+class ChunkSizerTest(unittest.TestCase):
+
+    def test_get_chunk_size(self):
+        chunk_sizer = ChunkSizer(initial_size=100, target_rows=1000, time_budget_seconds=60)
+        self.assertEqual(chunk_sizer.get_chunk_size("ethereum"), 100)
+        # 5 rows per address and 0.1 second per address
+        chunk_sizer.update("ethereum", 100, 500, 10)
+        self.assertEqual(chunk_sizer.get_chunk_size("ethereum"), 200)
+        # the time budget is reached before the target rows
+        chunk_sizer.time_budget_seconds = 10
+        self.assertEqual(chunk_sizer.get_chunk_size("ethereum"), 100)
+        # the other networks are not impacted
+        self.assertEqual(chunk_sizer.get_chunk_size("polygon"), 100)
+
+    def test_update_failed(self):
+        chunk_sizer = ChunkSizer(initial_size=100)
+        chunk_sizer.update("polygon", 100, 0, 300, failed=True)
+        self.assertEqual(chunk_sizer.get_chunk_size("polygon"), 50)
+        chunk_sizer.update("polygon", 1, 0, 300, failed=True)
+        self.assertEqual(chunk_sizer.get_chunk_size("polygon"), 1)
+        # the max size grows back with the successful chunks
+        chunk_sizer.update("polygon", 1, 10, 1)
+        self.assertEqual(chunk_sizer.dict_stats["polygon"]["max_size"], 2)
+        self.assertEqual(chunk_sizer.dict_stats["polygon"]["n_failures"], 2)
+        self.assertEqual(chunk_sizer.dict_stats["polygon"]["n_queries"], 3)
+
+    def test_update_in_flight(self):
+        chunk_sizer = ChunkSizer(max_size=1000)
+        list_generation = [chunk_sizer.get_generation("ethereum") for _ in range(4)]
+        chunk_sizer.update("ethereum", 1000, 0, 300, failed=True, generation=list_generation[0])
+        self.assertEqual(chunk_sizer.get_generation("ethereum"), list_generation[0] + 1)
+        # the chunks of 1000 addresses in flight during the failure do not raise the max size back
+        for generation in list_generation[1:]:
+            chunk_sizer.update("ethereum", 1000, 10, 1, generation=generation)
+        self.assertEqual(chunk_sizer.dict_stats["ethereum"]["max_size"], 500)
+        # neither do the chunks sized above the max size
+        chunk_sizer.update("ethereum", 1000, 10, 1, generation=chunk_sizer.get_generation("ethereum"))
+        self.assertEqual(chunk_sizer.dict_stats["ethereum"]["max_size"], 500)
+        chunk_sizer.update("ethereum", 500, 10, 1, generation=chunk_sizer.get_generation("ethereum"))
+        self.assertEqual(chunk_sizer.dict_stats["ethereum"]["max_size"], 626)
+
+    def test_save_load(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "stats", "chunk_stats.json")
+            chunk_sizer = ChunkSizer(path, target_rows=1000)
+            chunk_sizer.update("ethereum", 10, 100, 1)
+            chunk_sizer.save()
+            with open(path) as f:
+                self.assertEqual(json.load(f)["ethereum"]["rows_per_address"], 10)
+            chunk_sizer_loaded = ChunkSizer(path, target_rows=1000)
+            self.assertEqual(chunk_sizer_loaded.dict_stats, chunk_sizer.dict_stats)
+            self.assertEqual(chunk_sizer_loaded.get_chunk_size("ethereum"), 100)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,45 @@
+import tempfile
+import unittest
+
+import numpy as np
+
+from sbscorer.sbdata.ExtractionJournal import ExtractionJournal
+
+
+class ExtractionJournalTest(unittest.TestCase):
+    array_address = np.array([f"0x{i:040x}" for i in range(10)])
+
+    def test_resume(self):
+        with tempfile.TemporaryDirectory() as extract_dir:
+            journal = ExtractionJournal(extract_dir, "ethereum")
+            self.assertFalse(journal.start(self.array_address).any())
+            journal.write_done(0, 4, 12, "query-1", ["0x0_tx.csv"])
+            journal.write_failed(4, 6, "QueryRunTimeoutError")
+            journal.write_done(6, 8, 0, "query-2", [])
+            # a line truncated by a crash
+            with open(journal.path_to_journal, "a") as f:
+                f.write('{"status": "done", "start_')
+
+            done_mask = ExtractionJournal(extract_dir, "ethereum").start(self.array_address, resume=True)
+            np.testing.assert_array_equal(np.flatnonzero(done_mask), [0, 1, 2, 3, 6, 7])
+            list_entry = journal.read()
+            self.assertEqual(len(list_entry), 4)
+            self.assertEqual(list_entry[1]["query_id"], "query-1")
+            self.assertEqual(list_entry[2]["status"], "failed")
+
+            # without resume the journal is started again
+            self.assertFalse(journal.start(self.array_address).any())
+            self.assertEqual(len(journal.read()), 1)
+
+    def test_resume_other_address(self):
+        with tempfile.TemporaryDirectory() as extract_dir:
+            journal = ExtractionJournal(extract_dir, "polygon")
+            journal.start(self.array_address)
+            with self.assertRaises(ValueError):
+                journal.start(self.array_address[::-1], resume=True)
+            # resuming without journal starts a new one
+            self.assertFalse(ExtractionJournal(extract_dir, "gnosis").start(self.array_address, resume=True).any())
+
+
+if __name__ == '__main__':
+    unittest.main()
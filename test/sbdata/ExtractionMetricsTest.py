@@ -0,0 +1,80 @@
+import os
+import re
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+from flipside.errors import QueryRunTimeoutError
+
+from sbscorer.sbdata.ExtractionMetrics import ExtractionMetrics
+from sbscorer.sbdata.FlipsideApi import FlipsideApi
+from sbscorer.sbdata.QueryBackend import SqliteBackend
+
+
+class ExtractionMetricsTest(unittest.TestCase):
+    array_address = np.array([f"0x{i:040x}" for i in range(40)])
+
+    def test_get_report(self):
+        list_entry = [
+            {"network": "ethereum", "status": "split", "start_index": 0, "end_index": 20, "query_seconds": 4.0,
+             "created_at": 4.0},
+            {"network": "ethereum", "status": "done", "start_index": 0, "end_index": 10, "n_address": 10,
+             "n_rows": 300, "bytes": 1000, "query_seconds": 2.0, "query_started_at": 4.0, "export_seconds": 0.5,
+             "retries": 1, "created_at": 6.5},
+            {"network": "ethereum", "status": "failed", "start_index": 10, "end_index": 20, "n_address": 10,
+             "n_rows": 0, "query_seconds": 1.0, "query_started_at": 6.0, "created_at": 9.0},
+            {"network": "gnosis", "status": "done", "start_index": 0, "end_index": 20, "n_address": 20,
+             "n_rows": 50, "query_seconds": 0.5, "query_started_at": 0.0, "created_at": 1.0}]
+        report = ExtractionMetrics().get_report(list_entry, n_slowest=2)
+        stats = report["networks"]["ethereum"]
+        self.assertEqual((stats["n_chunks"], stats["n_failed"], stats["n_split"], stats["retries"]), (2, 1, 1, 1))
+        self.assertEqual((stats["n_address"], stats["n_rows"], stats["bytes"]), (20, 300, 1000))
+        self.assertEqual((stats["query_seconds"], stats["wall_seconds"]), (7.0, 5.0))
+        self.assertAlmostEqual(stats["rows_per_second"], 300 / 7)
+        self.assertAlmostEqual(stats["rows_per_wall_second"], 60)
+        self.assertEqual(report["networks"]["gnosis"]["rows_per_wall_second"], 50)
+        self.assertEqual([entry["query_seconds"] for entry in report["slowest_chunks"]], [2.0, 1.0])
+
+    def test_extract_transactions(self):
+        backend = SqliteBackend()
+        backend.load_transactions("ethereum", pd.DataFrame({
+            "tx_hash": [f"0x{i:064x}" for i in range(len(self.array_address))],
+            "block_timestamp": "2023-01-01 00:00:00.000",
+            "from_address": self.array_address,
+            "to_address": self.array_address[::-1],
+            "gas_limit": 21000,
+            "gas_used": 21000,
+            "tx_fee": 0.001,
+            "eth_value": 1.0}))
+        query = backend.query
+
+        def query_timeout(sql, **kwargs):
+            # the queries of more than 10 addresses time out
+            if len(set(re.findall(r"0x[0-9a-f]{40}", sql))) > 10:
+                raise QueryRunTimeoutError(300)
+            return query(sql, **kwargs)
+
+        backend.query = query_timeout
+        with tempfile.TemporaryDirectory() as extract_dir:
+            path_metrics = os.path.join(extract_dir, "_metrics", "metrics.jsonl")
+            flipside_api = FlipsideApi("fake", max_address=20, backend=backend, metrics=path_metrics)
+            flipside_api.extract_transactions(extract_dir, self.array_address, ["ethereum"])
+            list_entry = ExtractionMetrics(path_metrics).read()
+        # the split queries are written when they fail, the chunks when they are exported
+        self.assertEqual(sorted(entry["status"] for entry in list_entry), ["done"] * 4 + ["split"] * 2)
+        list_done = [entry for entry in list_entry if entry["status"] == "done"]
+        self.assertEqual([(entry["start_index"], entry["end_index"]) for entry in list_done],
+                         [(0, 10), (10, 20), (20, 30), (30, 40)])
+        entry = list_done[0]
+        self.assertEqual(entry["network"], "ethereum")
+        self.assertEqual((entry["n_rows"], entry["n_files"], entry["n_pages"], entry["split_depth"]), (20, 10, 1, 1))
+        self.assertGreater(entry["bytes"], 0)
+        self.assertEqual(list_entry[0]["error_type"], "timeout")
+        report = flipside_api.metrics.get_report()
+        self.assertEqual(report["networks"]["ethereum"]["n_rows"], 80)
+        self.assertEqual(report["networks"]["ethereum"]["n_split"], 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -12,8 +12,13 @@ if absolute_path not in sys.path:
     sys.path.append(absolute_path)
 
 
+# the queries to flipside need an api key, the tests building the sql run without it
+API_KEY = os.environ.get('FLIPSIDE_API_KEY')
+requires_api_key = unittest.skipUnless(API_KEY, "FLIPSIDE_API_KEY is not set")
+
+
 class FlipsideApiTest(unittest.TestCase):
-    api_key = os.environ['FLIPSIDE_API_KEY']
+    api_key = API_KEY or "fake"
     flipside_api = FlipsideApi(api_key, max_address=100)
     PATH_TO_RESOURCES = "../resources"
     PATH_TO_TEST_ADDRESS = os.path.join(PATH_TO_RESOURCES, "test_address")
@@ -35,65 +40,72 @@ class FlipsideApiTest(unittest.TestCase):
     def test_get_string_address(self):
         string_add = self.flipside_api.get_string_address(
             self.list_unique_address)
-        expected = 'LOWER(\'0x06cd8288dc001024ce0a1cf39caaedc0e2db9c82\'),LOWER(' \
-                   '\'0x9be7d88cfd6e4b519cd9720db6de6e6f2c1ca77e\'),' \
-                   'LOWER(\'0xf8bde71eb161bd83da88bd3a1003eef9ba0c7485\'),' \
-                   'LOWER(\'0x1994bc4f630a373ffc3ecef84165cfb85e7f7820\'),' \
-                   'LOWER(\'0x13ef1086cdfecc00e0f8f3b2ac2c600f297dc333\'),' \
-                   'LOWER(\'0xb324b8ab8634a6c160361d34e672cec739ac55cd\'),' \
-                   'LOWER(\'0x1b7a0da1d9c63d9b8209fa5ce98ac0d148960800\'),' \
-                   'LOWER(\'0xe718bb18d8176659606b3d7d3f705906a9d3e1bd\')'
+        expected = '\'0x06cd8288dc001024ce0a1cf39caaedc0e2db9c82\',' \
+                   '\'0x9be7d88cfd6e4b519cd9720db6de6e6f2c1ca77e\',' \
+                   '\'0xf8bde71eb161bd83da88bd3a1003eef9ba0c7485\',' \
+                   '\'0x1994bc4f630a373ffc3ecef84165cfb85e7f7820\',' \
+                   '\'0x13ef1086cdfecc00e0f8f3b2ac2c600f297dc333\',' \
+                   '\'0xb324b8ab8634a6c160361d34e672cec739ac55cd\',' \
+                   '\'0x1b7a0da1d9c63d9b8209fa5ce98ac0d148960800\',' \
+                   '\'0xe718bb18d8176659606b3d7d3f705906a9d3e1bd\''
         self.assertEqual(expected, string_add)
 
     def test_get_eth_transactions_sql_query(self):
         sql = self.flipside_api.get_eth_transactions_sql_query(
             self.list_unique_address)
-        expected = 'WHERE FROM_ADDRESS IN (LOWER(\'0x06cd8288dc001024ce0a1cf39caaedc0e2db9c82\'),' \
-                   'LOWER(\'0x9be7d88cfd6e4b519cd9720db6de6e6f2c1ca77e\'),' \
-                   'LOWER(\'0xf8bde71eb161bd83da88bd3a1003eef9ba0c7485\'),' \
-                   'LOWER(\'0x1994bc4f630a373ffc3ecef84165cfb85e7f7820\'),' \
-                   'LOWER(\'0x13ef1086cdfecc00e0f8f3b2ac2c600f297dc333\'),' \
-                   'LOWER(\'0xb324b8ab8634a6c160361d34e672cec739ac55cd\'),' \
-                   'LOWER(\'0x1b7a0da1d9c63d9b8209fa5ce98ac0d148960800\'),' \
-                   'LOWER(\'0xe718bb18d8176659606b3d7d3f705906a9d3e1bd\'))'
+        expected = 'WHERE FROM_ADDRESS IN (\'0x06cd8288dc001024ce0a1cf39caaedc0e2db9c82\',' \
+                   '\'0x9be7d88cfd6e4b519cd9720db6de6e6f2c1ca77e\',' \
+                   '\'0xf8bde71eb161bd83da88bd3a1003eef9ba0c7485\',' \
+                   '\'0x1994bc4f630a373ffc3ecef84165cfb85e7f7820\',' \
+                   '\'0x13ef1086cdfecc00e0f8f3b2ac2c600f297dc333\',' \
+                   '\'0xb324b8ab8634a6c160361d34e672cec739ac55cd\',' \
+                   '\'0x1b7a0da1d9c63d9b8209fa5ce98ac0d148960800\',' \
+                   '\'0xe718bb18d8176659606b3d7d3f705906a9d3e1bd\')'
         self.assertTrue(expected in sql)
 
+    @requires_api_key
     def test_execute_get_tx_eth(self):
         sql = self.flipside_api.get_eth_transactions_sql_query(
             self.list_unique_address, limit=10)
         df = self.flipside_api.execute_query(sql)
         self.assertEqual(10, df.shape[0])
 
+    @requires_api_key
     def test_execute_get_tx_polygon(self):
         sql = self.flipside_api.get_polygon_transactions_sql_query(
             self.list_unique_address, limit=10)
         df = self.flipside_api.execute_query(sql)
         self.assertEqual(10, df.shape[0])
 
+    @requires_api_key
     def test_execute_get_tx_optimism(self):
         sql = self.flipside_api.get_optimism_transactions_sql_query(
             self.list_unique_address, limit=10)
         df = self.flipside_api.execute_query(sql)
         self.assertEqual(10, df.shape[0])
 
+    @requires_api_key
     def test_execute_get_tx_arbitrum(self):
         sql = self.flipside_api.get_arbitrum_transactions_sql_query(
             self.list_unique_address, limit=10)
         df = self.flipside_api.execute_query(sql)
         self.assertEqual(10, df.shape[0])
 
+    @requires_api_key
     def test_execute_get_tx_gnosis(self):
         sql = self.flipside_api.get_gnosis_transactions_sql_query(
             self.list_unique_address, limit=10)
         df = self.flipside_api.execute_query(sql)
         self.assertEqual(10, df.shape[0])
 
+    @requires_api_key
     def test_execute_get_tx_avalanche(self):
         sql = self.flipside_api.get_avalanche_transactions_sql_query(
             self.list_unique_address, limit=10)
         df = self.flipside_api.execute_query(sql)
         self.assertEqual(10, df.shape[0])
 
+    @requires_api_key
     def test_execute_get_tags(self):
         sql = self.flipside_api.get_cross_chain_info_sql_query(
             self.list_unique_address,
@@ -102,6 +114,7 @@ class FlipsideApiTest(unittest.TestCase):
         df = self.flipside_api.execute_query(sql)
         self.assertEqual(0, df.shape[1])  # no tags or labels in the example
 
+    @requires_api_key
     def test_execute_get_labels(self):
         sql = self.flipside_api.get_cross_chain_info_sql_query(
             self.list_unique_address,
@@ -110,6 +123,7 @@ class FlipsideApiTest(unittest.TestCase):
         df = self.flipside_api.execute_query(sql)
         self.assertEqual(0, df.shape[1])
 
+    @requires_api_key
     def test_extract_tx_eth(self):
         tx_chain = "ethereum"
         self.flipside_api.extract_transactions_net(self.PATH_TO_TMP_TX, self.test_address, tx_chain)
@@ -127,11 +141,13 @@ class FlipsideApiTest(unittest.TestCase):
         df_filter = df_output[df_output["block_timestamp"] <= '2023-01-01']
         self.assertEqual(114540, df_filter.shape[0])  # 100k transactions the maximum per_page of sbdata api
 
+    @requires_api_key
     def test_get_transactions_ethereum(self):
         df_output = self.flipside_api.get_transactions(self.list_unique_address, "ethereum")
         self.assertTrue(
             '0xc1e0b64374095ae27ca4a98932f03fa3fcfbf60dcece1ca12c71015b21fbedb9' in df_output.tx_hash.values)
 
+    @requires_api_key
     def test_get_transactions_polygon(self):
         df_output = self.flipside_api.get_transactions(self.list_unique_address, "polygon")
         self.assertTrue(
@@ -0,0 +1,550 @@
+import io
+import json
+import os
+import re
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+
+from sbscorer.sbdata.ChunkScheduler import ChunkScheduler
+from sbscorer.sbdata.ChunkSizer import ChunkSizer
+from sbscorer.sbdata.ExtractionJournal import JOURNAL_DIR
+from sbscorer.sbdata.FlipsideApi import FlipsideApi, get_address_rows
+from sbscorer.sbdata.RetryPolicy import RetryPolicy
+from sbscorer.sbdata.TransactionSink import ParquetSink
+from sbscorer.sbutils.LoadData import LoadData
+from sbscorer.sbutils.TransactionStore import STORE_DIR
+from sbscorer.sbutils.schema import set_transaction_dtypes
+
+
+class FakeFlipside(object):
+    """
+    Stand-in of the flipside sdk, it returns a few transactions per address after a small latency and records the
+    number of queries in flight
+    """
+
+    def __init__(self, latency=0.02, page_stats=True, fail_address=None, n_new=0, error="QueryRunTimeoutError"):
+        self.latency = latency
+        self.error = error
+        self.n_new = n_new
+        self.n_records = 0
+        self.fail_address = fail_address
+        self.page_stats = page_stats
+        self.dict_records = {}
+        self.list_page = []
+        self.n_queries = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.dict_in_flight = {}
+        self.dict_max_in_flight = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def get_records(sql, n_new=0):
+        network = re.search(r"(\w+)\.core\.fact_transactions", sql).group(1)
+        match_since = re.search(r"BLOCK_TIMESTAMP > '([^']+)'", sql)
+        records = []
+        for address in dict.fromkeys(re.findall(r"0x[0-9a-fA-F]{40}", sql)):
+            address = address.lower()
+            for i in range(int(address[-1], 16) % 3 + n_new):
+                if match_since is not None and f"2023-01-0{i + 1} 00:00:00.000" <= match_since.group(1):
+                    continue
+                records.append({"tx_hash": f"{network}-{address}-{i}",
+                                "block_timestamp": f"2023-01-0{i + 1} 00:00:00.000",
+                                "from_address": address,
+                                "to_address": "0x" + "0" * 40,
+                                "gas_limit": 21000,
+                                "gas_used": 21000,
+                                "tx_fee": 0.001,
+                                "eth_value": i})
+        return network, records
+
+    def get_result_set(self, query_id, page_number, page_size):
+        records = self.dict_records[query_id]
+        self.list_page.append(page_number)
+        page = None
+        if self.page_stats:
+            page = SimpleNamespace(currentPageNumber=page_number, currentPageSize=page_size, totalRows=len(records),
+                                   totalPages=-(-len(records) // page_size))
+        return SimpleNamespace(records=records[(page_number - 1) * page_size:page_number * page_size],
+                               query_id=query_id, page=page)
+
+    def query(self, sql, page_size=100000, page_number=1, **kwargs):
+        network, records = self.get_records(sql, self.n_new)
+        if self.fail_address is not None and self.fail_address in sql:
+            raise RuntimeError(self.error)
+        with self._lock:
+            self.n_queries += 1
+            self.n_records += len(records)
+            self.in_flight += 1
+            self.dict_in_flight[network] = self.dict_in_flight.get(network, 0) + 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            self.dict_max_in_flight[network] = max(self.dict_max_in_flight.get(network, 0),
+                                                   self.dict_in_flight[network])
+        time.sleep(self.latency)
+        with self._lock:
+            self.in_flight -= 1
+            self.dict_in_flight[network] -= 1
+            query_id = str(self.n_queries)
+            self.dict_records[query_id] = records
+            return self.get_result_set(query_id, page_number, page_size)
+
+    def get_query_results(self, query_id, page_number=1, page_size=100000):
+        with self._lock:
+            return self.get_result_set(query_id, page_number, page_size)
+
+
+class UnorderedFakeFlipside(FakeFlipside):
+    """
+    Stand-in of the flipside sdk returning the newest transactions first, the pages from fail_page on raise
+    """
+
+    def __init__(self, fail_page=None, **kwargs):
+        super().__init__(**kwargs)
+        self.fail_page = fail_page
+
+    @staticmethod
+    def get_records(sql, n_new=0):
+        network, records = FakeFlipside.get_records(sql, n_new)
+        return network, records[::-1]
+
+    def get_query_results(self, query_id, page_number=1, page_size=100000):
+        if self.fail_page is not None and page_number >= self.fail_page:
+            raise RuntimeError("page failed")
+        return super().get_query_results(query_id, page_number, page_size)
+
+
+def read_extract_dir(extract_dir):
+    dict_df = {}
+    for network in sorted(network for network in os.listdir(extract_dir) if not network.startswith("_")):
+        for file in sorted(os.listdir(os.path.join(extract_dir, network))):
+            dict_df[(network, file)] = pd.read_csv(os.path.join(extract_dir, network, file))
+    return dict_df
+
+
+class FlipsideSchedulerTest(unittest.TestCase):
+    PATH_TO_TEST_ADDRESS = "../resources/test_address"
+    test_address = pd.read_csv(os.path.join(PATH_TO_TEST_ADDRESS, "unique_ctbt_address.csv")).address.values[:60]
+    list_network = ["ethereum", "polygon", "gnosis"]
+
+    @staticmethod
+    def get_flipside_api(**kwargs):
+        flipside_api = FlipsideApi("fake", max_address=10, **kwargs)
+        flipside_api.sdk = FakeFlipside()
+        return flipside_api
+
+    def extract(self, extract_dir, **kwargs):
+        flipside_api = self.get_flipside_api(**kwargs)
+        flipside_api.extract_transactions(extract_dir, self.test_address, self.list_network)
+        return flipside_api.sdk
+
+    def test_extract_transactions_concurrent(self):
+        with tempfile.TemporaryDirectory() as dir_serial, tempfile.TemporaryDirectory() as dir_concurrent:
+            sdk_serial = self.extract(dir_serial)
+            sdk_concurrent = self.extract(dir_concurrent, max_workers=4, max_workers_per_network=2)
+            self.assertEqual(sdk_serial.max_in_flight, 1)
+            self.assertGreater(sdk_concurrent.max_in_flight, 1)
+            self.assertLessEqual(sdk_concurrent.max_in_flight, 4)
+            self.assertLessEqual(max(sdk_concurrent.dict_max_in_flight.values()), 2)
+            self.assertEqual(sdk_serial.n_queries, sdk_concurrent.n_queries)
+
+            dict_serial = read_extract_dir(dir_serial)
+            dict_concurrent = read_extract_dir(dir_concurrent)
+            self.assertGreater(len(dict_serial), 0)
+            self.assertEqual(dict_serial.keys(), dict_concurrent.keys())
+            for key, df in dict_serial.items():
+                pd.testing.assert_frame_equal(df, dict_concurrent[key])
+
+    def test_extract_transactions_adaptive(self):
+        with tempfile.TemporaryDirectory() as dir_fixed, tempfile.TemporaryDirectory() as dir_adaptive:
+            self.extract(dir_fixed)
+            path_stats = os.path.join(dir_adaptive, "chunk_stats.json")
+            chunk_sizer = ChunkSizer(path_stats, initial_size=10, target_rows=40)
+            sdk = self.extract(os.path.join(dir_adaptive, "transactions"), max_workers=2, chunk_sizer=chunk_sizer)
+            # about 1 row per address, the chunks grow to about 40 addresses
+            self.assertGreater(chunk_sizer.get_chunk_size("ethereum"), 10)
+            self.assertLess(sdk.n_queries, 3 * 6)
+            self.assertTrue(os.path.exists(path_stats))
+            self.assertEqual(ChunkSizer(path_stats).dict_stats.keys(), set(self.list_network))
+
+            dict_fixed = read_extract_dir(dir_fixed)
+            dict_adaptive = read_extract_dir(os.path.join(dir_adaptive, "transactions"))
+            self.assertEqual(dict_fixed.keys(), dict_adaptive.keys())
+            for key, df in dict_fixed.items():
+                pd.testing.assert_frame_equal(df, dict_adaptive[key])
+
+    def test_extract_transactions_resume(self):
+        with tempfile.TemporaryDirectory() as dir_serial, tempfile.TemporaryDirectory() as dir_resume:
+            self.extract(dir_serial)
+            # the queries with an address that has transactions fail, the other chunks are exported
+            fail_index = next(i for i in range(20, 30) if int(self.test_address[i][-1], 16) % 3)
+            flipside_api = self.get_flipside_api(max_workers=3)
+            flipside_api.sdk = FakeFlipside(fail_address=self.test_address[fail_index].lower())
+            flipside_api.extract_transactions(dir_resume, self.test_address, self.list_network)
+            with open(os.path.join(dir_resume, JOURNAL_DIR, "ethereum.jsonl")) as f:
+                list_entry = [json.loads(line) for line in f]
+            list_failed = [entry for entry in list_entry[1:] if entry["status"] == "failed"]
+            self.assertEqual([(entry["start_index"], entry["end_index"]) for entry in list_failed], [(fail_index, fail_index + 1)])
+            self.assertEqual(len(read_extract_dir(dir_resume)), len(read_extract_dir(dir_serial)) - 3)
+            entry_done = [entry for entry in list_entry[1:] if entry["status"] == "done" and entry["files"]][0]
+            self.assertTrue(all(os.path.exists(file) for file in entry_done["files"]))
+            self.assertIsNotNone(entry_done["query_id"])
+
+            # only the failed addresses are queried again
+            flipside_api.sdk = FakeFlipside()
+            flipside_api.extract_transactions(dir_resume, self.test_address, self.list_network, resume=True)
+            self.assertEqual(flipside_api.sdk.n_queries, len(self.list_network))
+            dict_serial = read_extract_dir(dir_serial)
+            dict_resume = read_extract_dir(dir_resume)
+            self.assertEqual(dict_serial.keys(), dict_resume.keys())
+            for key, df in dict_serial.items():
+                pd.testing.assert_frame_equal(df, dict_resume[key])
+
+            # nothing is left to do
+            flipside_api.sdk = FakeFlipside()
+            flipside_api.extract_transactions(dir_resume, self.test_address, self.list_network, resume=True)
+            self.assertEqual(flipside_api.sdk.n_queries, 0)
+            with self.assertRaises(ValueError):
+                flipside_api.extract_transactions(dir_resume, self.test_address[:10], self.list_network, resume=True)
+
+    def test_extract_transactions_incremental(self):
+        with tempfile.TemporaryDirectory() as dir_full, tempfile.TemporaryDirectory() as dir_incremental:
+            self.extract(dir_incremental)
+            # two days of new transactions
+            flipside_api = self.get_flipside_api(max_workers=2)
+            flipside_api.sdk = FakeFlipside(n_new=2)
+            flipside_api.extract_transactions(dir_incremental, self.test_address, self.list_network, incremental=True)
+            sdk_full = FakeFlipside(n_new=2)
+            flipside_api_full = self.get_flipside_api()
+            flipside_api_full.sdk = sdk_full
+            flipside_api_full.extract_transactions(dir_full, self.test_address, self.list_network)
+            # only the new transactions are returned, the addresses without csv get all their transactions
+            self.assertLess(flipside_api.sdk.n_records, sdk_full.n_records)
+            self.assertGreater(flipside_api.sdk.n_records, 0)
+
+            dict_full = read_extract_dir(dir_full)
+            dict_incremental = read_extract_dir(dir_incremental)
+            self.assertEqual(dict_full.keys(), dict_incremental.keys())
+            for key, df in dict_full.items():
+                pd.testing.assert_frame_equal(df, dict_incremental[key])
+
+            # nothing new, a chunk queries from the oldest watermark of its addresses so a few rows are filtered out
+            n_records = flipside_api.sdk.n_records
+            flipside_api.sdk = FakeFlipside(n_new=2)
+            flipside_api.extract_transactions(dir_incremental, self.test_address, self.list_network, incremental=True)
+            self.assertLess(flipside_api.sdk.n_records, n_records / 10)
+            dict_incremental = read_extract_dir(dir_incremental)
+            for key, df in dict_full.items():
+                pd.testing.assert_frame_equal(df, dict_incremental[key])
+            with self.assertRaises(ValueError):
+                flipside_api.extract_transactions(dir_incremental, self.test_address, resume=True, incremental=True)
+
+    def test_extract_transactions_incremental_failed_page(self):
+        with tempfile.TemporaryDirectory() as dir_full, tempfile.TemporaryDirectory() as dir_incremental:
+            self.extract(dir_incremental)
+            flipside_api_full = self.get_flipside_api()
+            flipside_api_full.sdk = FakeFlipside(n_new=2)
+            flipside_api_full.extract_transactions(dir_full, self.test_address, self.list_network)
+
+            # the first page holds the newest transactions, the chunks whose second page fails are not written so
+            # their watermarks do not skip the transactions of the failed pages
+            flipside_api = self.get_flipside_api(page_size=5)
+            flipside_api.sdk = UnorderedFakeFlipside(fail_page=2, n_new=2)
+            flipside_api.extract_transactions(dir_incremental, self.test_address, self.list_network, incremental=True)
+            flipside_api.sdk = UnorderedFakeFlipside(n_new=2)
+            flipside_api.extract_transactions(dir_incremental, self.test_address, self.list_network, incremental=True)
+
+            dict_full = read_extract_dir(dir_full)
+            dict_incremental = read_extract_dir(dir_incremental)
+            self.assertEqual(dict_full.keys(), dict_incremental.keys())
+            for key, df in dict_full.items():
+                self.assertEqual(sorted(df.tx_hash), sorted(dict_incremental[key].tx_hash))
+
+    def test_get_transactions_since(self):
+        flipside_api = self.get_flipside_api()
+        sql = flipside_api.get_polygon_transactions_sql_query(self.test_address[:2])
+        self.assertEqual(sql, flipside_api.get_polygon_transactions_sql_query(self.test_address[:2], since=pd.NaT))
+        sql_since = flipside_api.get_polygon_transactions_sql_query(self.test_address[:2],
+                                                                    since=np.datetime64("2023-01-02T10:00"))
+        self.assertEqual(sql_since.count("AND BLOCK_TIMESTAMP > '2023-01-02 10:00:00.000'"), 2)
+        watermarks = np.array(["2023-01-01", "2023-01-01T12", "2023-01-03", "2023-01-03T01", "NaT"],
+                              dtype="datetime64[ns]")
+        self.assertEqual(flipside_api.get_watermark_groups(watermarks).tolist(), [1, 1, 2, 2, 3])
+        tasks = list(flipside_api.get_tasks(5, "polygon", watermarks=watermarks))
+        self.assertEqual(tasks, [("polygon", 0, 2), ("polygon", 2, 4), ("polygon", 4, 5)])
+
+    def load_parquet_csv(self, dir_parquet, dir_csv, network):
+        """return the transactions of the parquet store and of the csv files sorted the same way"""
+        df_parquet = LoadData(dir_parquet).create_df_tx(network)
+        # the store has the dtypes of LoadData.compact
+        df_csv = set_transaction_dtypes(LoadData(dir_csv, use_store=False).create_df_tx(network))
+        return [df.sort_values(["EOA", "tx_hash"]).reset_index(drop=True)[df_csv.columns] for df in [df_parquet, df_csv]]
+
+    def test_extract_transactions_parquet(self):
+        with tempfile.TemporaryDirectory() as dir_csv, tempfile.TemporaryDirectory() as dir_parquet:
+            self.extract(dir_csv)
+            flipside_api = self.get_flipside_api(max_workers=2)
+            flipside_api.extract_transactions(dir_parquet, self.test_address, self.list_network, sink="parquet")
+            self.assertEqual(read_extract_dir(dir_parquet), {})
+            for network in self.list_network:
+                df_parquet, df_csv = self.load_parquet_csv(dir_parquet, dir_csv, network)
+                pd.testing.assert_frame_equal(df_parquet, df_csv)
+                # the files of each bucket are consolidated
+                path_store = os.path.join(dir_parquet, STORE_DIR, network)
+                for bucket_dir in os.listdir(path_store):
+                    if bucket_dir.startswith("bucket="):
+                        self.assertEqual(os.listdir(os.path.join(path_store, bucket_dir)), ["part-0.parquet"])
+
+            # incremental extraction appends the new transactions to the store
+            flipside_api.sdk = FakeFlipside(n_new=2)
+            flipside_api.extract_transactions(dir_parquet, self.test_address, self.list_network, incremental=True,
+                                              sink="parquet")
+            flipside_api_csv = self.get_flipside_api()
+            flipside_api_csv.sdk = FakeFlipside(n_new=2)
+            flipside_api_csv.extract_transactions(dir_csv, self.test_address, self.list_network)
+            for network in self.list_network:
+                df_parquet, df_csv = self.load_parquet_csv(dir_parquet, dir_csv, network)
+                pd.testing.assert_frame_equal(df_parquet, df_csv)
+
+    def test_extract_transactions_parquet_rewrite(self):
+        with tempfile.TemporaryDirectory() as dir_csv:
+            self.extract(dir_csv)
+            for consolidate in [True, False]:
+                with tempfile.TemporaryDirectory() as dir_parquet:
+                    def get_sink(extract_dir, network):
+                        return ParquetSink(extract_dir, network, consolidate=consolidate)
+
+                    self.get_flipside_api().extract_transactions(dir_parquet, self.test_address, self.list_network,
+                                                                 sink=get_sink)
+                    # the chunks were written but not recorded in the journal before an interruption, they are
+                    # written again with another chunking
+                    shutil.rmtree(os.path.join(dir_parquet, JOURNAL_DIR))
+                    flipside_api = self.get_flipside_api()
+                    flipside_api.MAX_ADDRESS = 7
+                    flipside_api.extract_transactions(dir_parquet, self.test_address, self.list_network, resume=True,
+                                                      sink=get_sink)
+                    for network in self.list_network:
+                        df_parquet, df_csv = self.load_parquet_csv(dir_parquet, dir_csv, network)
+                        pd.testing.assert_frame_equal(df_parquet, df_csv)
+
+    def test_extract_transactions_split_empty(self):
+        # an empty result is not a failure, the chunk of addresses without transactions is not split
+        flipside_api = self.get_flipside_api()
+        array_address = np.array([f"0x{i:039x}3" for i in range(10)])
+        with tempfile.TemporaryDirectory() as extract_dir:
+            flipside_api.extract_transactions(extract_dir, array_address, ["ethereum"])
+            self.assertEqual(read_extract_dir(extract_dir), {})
+        self.assertEqual(flipside_api.sdk.n_queries, 1)
+
+    def test_extract_transactions_adaptive_interrupted(self):
+        with tempfile.TemporaryDirectory() as extract_dir:
+            path_stats = os.path.join(extract_dir, "chunk_stats.json")
+            flipside_api = self.get_flipside_api(chunk_sizer=ChunkSizer(path_stats, initial_size=10))
+
+            def get_sink(extract_dir, network):
+                sink = flipside_api.get_sink("csv", extract_dir, network)
+                write = sink.write
+
+                def write_interrupted(df, np_address, watermarks=None):
+                    # the disk is full after the first chunks
+                    if flipside_api.sdk.n_queries > 2:
+                        raise OSError("No space left on device")
+                    return write(df, np_address, watermarks)
+
+                sink.write = write_interrupted
+                return sink
+
+            with self.assertRaises(OSError):
+                flipside_api.extract_transactions(os.path.join(extract_dir, "transactions"), self.test_address,
+                                                  ["ethereum"], sink=get_sink)
+            # the statistics learnt before the interruption are saved
+            self.assertGreater(ChunkSizer(path_stats).dict_stats["ethereum"]["n_queries"], 0)
+
+    def test_fetch_split_halve(self):
+        flipside_api = self.get_flipside_api(chunk_sizer=ChunkSizer(max_size=1000))
+        # the learnt size was raised back close to the size of the failed slice
+        flipside_api.chunk_sizer.get_chunk_size = lambda network: 979
+        list_slice = []
+
+        def get_df(array_address):
+            list_slice.append(len(array_address))
+            df = pd.DataFrame()
+            if len(array_address) == 1000:
+                df.attrs["error_type"] = "timeout"
+            return df
+
+        list_result = flipside_api.fetch_split(np.arange(1000), 0, 1000, get_df, "ethereum")
+        self.assertEqual([(start, end) for start, end, _ in list_result], [(0, 500), (500, 1000)])
+        self.assertEqual(list_slice, [1000, 500, 500])
+
+    def test_extract_transactions_rate_limit(self):
+        # a chunk failing with a rate limit is retried, then recorded as failed without being split
+        fail_index = 25
+        flipside_api = self.get_flipside_api(retry_policy=RetryPolicy(max_retries=2, base_delay=0))
+        flipside_api.sdk = FakeFlipside(fail_address=self.test_address[fail_index].lower(),
+                                        error="QUERY_RUN_RATE_LIMIT_ERROR")
+        with tempfile.TemporaryDirectory() as extract_dir:
+            flipside_api.extract_transactions(extract_dir, self.test_address, ["ethereum"])
+            with open(os.path.join(extract_dir, JOURNAL_DIR, "ethereum.jsonl")) as f:
+                list_failed = [json.loads(line) for line in f if '"failed"' in line]
+        self.assertEqual([(entry["start_index"], entry["end_index"]) for entry in list_failed], [(20, 30)])
+        stats = flipside_api.retry_policy.get_stats()
+        self.assertEqual((stats["retries"], stats["failures"], stats["errors"]["rate_limit"]), (2, 1, 3))
+        self.assertEqual(stats["successes"], 5)
+
+    def test_extract_data_flipside(self):
+        flipside_api = self.get_flipside_api(max_workers=4)
+        sql_template = "SELECT * FROM ethereum.core.fact_transactions WHERE FROM_ADDRESS IN (%s) OR TO_ADDRESS IN (%s)"
+        df = flipside_api.extract_data_flipside(self.test_address, sql_template)
+        _, records = FakeFlipside.get_records(sql_template % (",".join(self.test_address), ""))
+        self.assertEqual(df.tx_hash.tolist(), [record["tx_hash"] for record in records])
+
+    def test_execute_query_pages(self):
+        sql = "SELECT * FROM ethereum.core.fact_transactions WHERE FROM_ADDRESS IN (%s)" % ",".join(self.test_address)
+        _, records = FakeFlipside.get_records(sql)
+        for page_stats in [True, False]:
+            flipside_api = FlipsideApi("fake", page_size=7)
+            flipside_api.sdk = FakeFlipside(page_stats=page_stats)
+            df = flipside_api.execute_query(sql)
+            self.assertEqual(df.tx_hash.tolist(), [record["tx_hash"] for record in records])
+            # page 1 is returned by the query and not fetched again, without page stats the pages are fetched
+            # until a page is not full
+            n_pages = -(-len(records) // 7) if page_stats else len(records) // 7 + 1
+            list_page = sorted(flipside_api.sdk.list_page)
+            expected = list(range(1, n_pages + 1))
+            self.assertEqual(list_page, expected)
+
+    def test_execute_query_stream(self):
+        sql = "SELECT * FROM ethereum.core.fact_transactions WHERE FROM_ADDRESS IN (%s)" % ",".join(self.test_address)
+        _, records = FakeFlipside.get_records(sql)
+        for page_stats in [True, False]:
+            flipside_api = FlipsideApi("fake", page_size=7, page_workers=2)
+            flipside_api.sdk = FakeFlipside(page_stats=page_stats)
+            list_df = []
+            list_n_fetched = []
+
+            def consumer(df):
+                list_df.append(df)
+                list_n_fetched.append(len(flipside_api.sdk.list_page))
+
+            stats = flipside_api.execute_query_stream(sql, consumer)
+            self.assertEqual(pd.concat(list_df).tx_hash.tolist(), [record["tx_hash"] for record in records])
+            self.assertTrue(all(df.shape[0] <= 7 for df in list_df))
+            self.assertEqual((stats["n_pages"], stats["n_rows"]), (len(list_df), len(records)))
+            self.assertNotIn("error", stats)
+            # the pages are fetched at most page_workers pages ahead of the consumer
+            for i, n_fetched in enumerate(list_n_fetched):
+                self.assertLessEqual(n_fetched, i + 1 + 2)
+
+        # a failed page stops the stream
+        flipside_api = FlipsideApi("fake", page_size=7, page_workers=2, retry_policy=RetryPolicy(max_retries=0))
+        flipside_api.sdk = FakeFlipside()
+        get_query_results = flipside_api.sdk.get_query_results
+
+        def get_query_results_fail(query_id, page_number=1, page_size=100000):
+            if page_number == 3:
+                raise RuntimeError("ApiError")
+            return get_query_results(query_id, page_number, page_size)
+
+        flipside_api.sdk.get_query_results = get_query_results_fail
+        list_df = []
+        stats = flipside_api.execute_query_stream(sql, list_df.append)
+        self.assertEqual((stats["n_pages"], stats["error"]), (2, "ApiError"))
+        df = flipside_api.execute_query(sql)
+        self.assertEqual((df.shape[0], df.attrs["error"]), (14, "ApiError"))
+
+    def test_extract_data_flipside_consumer(self):
+        flipside_api = self.get_flipside_api(max_workers=4)
+        sql_template = "SELECT * FROM ethereum.core.fact_transactions WHERE FROM_ADDRESS IN (%s) OR TO_ADDRESS IN (%s)"
+        list_df = []
+        self.assertIsNone(flipside_api.extract_data_flipside(self.test_address, sql_template, list_df.append))
+        self.assertEqual(len(list_df), 6)
+        pd.testing.assert_frame_equal(pd.concat(list_df),
+                                      self.get_flipside_api().extract_data_flipside(self.test_address, sql_template))
+
+    def test_export_address(self):
+        address = [f"0x{i:040x}" for i in range(4)]
+        df = pd.DataFrame({"tx_hash": ["a", "b", "c", "d", "e"],
+                           "from_address": [address[0], address[1], address[0], address[2], address[1]],
+                           "to_address": [address[1], None, address[0], address[1], address[3]]})
+        np_address = np.array([address[1].upper(), address[0], address[3], "0x" + "f" * 40])
+        dict_rows = get_address_rows(df, np.char.lower(np_address.astype(str)))
+        self.assertEqual(list(dict_rows), [address[1], address[0], address[3]])
+        self.assertEqual(dict_rows[address[1]].tolist(), [0, 1, 3, 4])
+        self.assertEqual(dict_rows[address[0]].tolist(), [0, 2])
+        with tempfile.TemporaryDirectory() as extract_dir:
+            files = FlipsideApi.export_address(df, np_address, extract_dir, "ethereum")
+            self.assertEqual(files, [os.path.join(extract_dir, "ethereum", f"{add}_tx.csv")
+                                     for add in [address[1], address[0], address[3]]])
+            for add in [address[1], address[0], address[3]]:
+                df_address = df[np.logical_or(df.from_address == add, df.to_address == add)]
+                pd.testing.assert_frame_equal(pd.read_csv(os.path.join(extract_dir, "ethereum", f"{add}_tx.csv")),
+                                              pd.read_csv(io.StringIO(df_address.to_csv(index=False))))
+        self.assertEqual(FlipsideApi.export_address(df.iloc[:0], np_address, extract_dir, "ethereum"), [])
+
+    def test_execute_query_cache(self):
+        with tempfile.TemporaryDirectory() as dir_cache, tempfile.TemporaryDirectory() as extract_dir:
+            flipside_api = self.get_flipside_api(query_cache=dir_cache)
+            flipside_api.extract_transactions(extract_dir, self.test_address, self.list_network)
+            n_queries = flipside_api.sdk.n_queries
+            dict_df = read_extract_dir(extract_dir)
+
+            # the rerun is read from the cache without network
+            flipside_api = self.get_flipside_api(query_cache=dir_cache)
+            flipside_api.sdk = None
+            with tempfile.TemporaryDirectory() as extract_dir_rerun:
+                flipside_api.extract_transactions(extract_dir_rerun, self.test_address, self.list_network)
+                dict_df_rerun = read_extract_dir(extract_dir_rerun)
+            self.assertEqual(flipside_api.query_cache.get_stats()["hits"], n_queries)
+            self.assertEqual(dict_df.keys(), dict_df_rerun.keys())
+            for key, df in dict_df.items():
+                pd.testing.assert_frame_equal(df, dict_df_rerun[key])
+
+    def test_execute_query_cache_params(self):
+        with tempfile.TemporaryDirectory() as dir_cache:
+            flipside_api = self.get_flipside_api(query_cache=dir_cache)
+            sql = flipside_api.get_eth_transactions_sql_query(self.test_address[:3])
+            flipside_api.execute_query(sql)
+            # a result of another page size or max age is not read from the cache
+            flipside_api_page = self.get_flipside_api(query_cache=dir_cache, page_size=1000)
+            self.assertNotEqual(flipside_api_page.get_cache_key(sql), flipside_api.get_cache_key(sql))
+            flipside_api_page.execute_query(sql)
+            self.assertEqual(flipside_api_page.sdk.n_queries, 1)
+            flipside_api_age = self.get_flipside_api(query_cache=dir_cache, max_age_minutes=0)
+            self.assertNotEqual(flipside_api_age.get_cache_key(sql), flipside_api.get_cache_key(sql))
+            self.assertEqual(self.get_flipside_api(query_cache=dir_cache).get_cache_key(sql),
+                             flipside_api.get_cache_key(sql))
+
+    def test_extract_transactions_incremental_cache(self):
+        address = self.test_address[0].lower()
+        with tempfile.TemporaryDirectory() as dir_cache, tempfile.TemporaryDirectory() as extract_dir:
+            flipside_api = self.get_flipside_api(query_cache=dir_cache)
+            flipside_api.extract_transactions(extract_dir, self.test_address, ["ethereum"])
+            flipside_api.extract_transactions(extract_dir, self.test_address, ["ethereum"], incremental=True)
+            n_rows = pd.read_csv(os.path.join(extract_dir, "ethereum", f"{address}_tx.csv")).shape[0]
+
+            # new transactions arrive between two incremental runs, they are queried and not read from the cache
+            flipside_api.sdk = FakeFlipside(n_new=1)
+            flipside_api.extract_transactions(extract_dir, self.test_address, ["ethereum"], incremental=True)
+            df = pd.read_csv(os.path.join(extract_dir, "ethereum", f"{address}_tx.csv"))
+            self.assertEqual(df.shape[0], n_rows + 1)
+            self.assertEqual(flipside_api.query_cache.get_stats()["hits"], 0)
+
+    def test_scheduler_order(self):
+        scheduler = ChunkScheduler(max_workers=3)
+        tasks = list(ChunkScheduler.interleave({"a": [("a", i) for i in range(5)], "b": [("b", i) for i in range(2)]}))
+        self.assertEqual(tasks[:4], [("a", 0), ("b", 0), ("a", 1), ("b", 1)])
+        list_exported = []
+        scheduler.run(tasks, lambda task: time.sleep(0.01 * (5 - task[1])) or task[1],
+                      lambda task, result: list_exported.append((task, result)))
+        self.assertEqual(list_exported, [(task, task[1]) for task in tasks])
+
+
+if __name__ == '__main__':
+    unittest.main()
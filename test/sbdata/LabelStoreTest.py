@@ -0,0 +1,65 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from sbscorer.sbdata.FlipsideApi import FlipsideApi
+from sbscorer.sbdata.LabelStore import LabelStore
+from sbscorer.sbdata.QueryBackend import SqliteBackend
+
+
+class LabelStoreTest(unittest.TestCase):
+    array_address = np.array([f"0x{i:040x}" for i in range(50)])
+    # the even addresses have a label, the multiples of 10 have two
+    df_labels = pd.DataFrame({"address": [address for i, address in enumerate(array_address) if i % 2 == 0]
+                              + [address for i, address in enumerate(array_address) if i % 10 == 0],
+                              "blockchain": "ethereum",
+                              "label_type": "cex"})
+
+    def test_put_get(self):
+        with tempfile.TemporaryDirectory() as path:
+            path_to_store = os.path.join(path, "labels.sqlite")
+            label_store = LabelStore(path_to_store)
+            self.assertEqual(list(label_store.get_missing(self.array_address[:3])), list(self.array_address[:3]))
+            df = pd.DataFrame({"ADDRESS": [self.array_address[0].upper()], "LABEL": ["binance"],
+                               "TAGS": [{"exchange": True}]})
+            label_store.put(df, [self.array_address[0].upper(), self.array_address[1]])
+            # the address without label is not missing anymore, the store is persisted
+            label_store = LabelStore(path_to_store)
+            self.assertEqual(list(label_store.get_missing(self.array_address[:3])), [self.array_address[2]])
+            self.assertEqual(list(label_store.get_missing(self.array_address[:3], "tag")), list(self.array_address[:3]))
+            df_store = label_store.get(self.array_address[:3])
+            self.assertEqual(df_store.to_dict("records"),
+                             [{"address": self.array_address[0], "label": "binance", "tags": '{"exchange": true}'}])
+
+            # the rows of an address queried again are replaced, the new columns are added
+            label_store.put(pd.DataFrame({"address": [self.array_address[0]], "label_type": ["cex"]}),
+                            self.array_address[:1])
+            df_store = label_store.get()
+            self.assertEqual(df_store.shape[0], 1)
+            self.assertEqual((df_store.label[0], df_store.label_type[0]), (None, "cex"))
+            label_store.close()
+
+            with self.assertRaises(ValueError):
+                label_store.get_table_name("name")
+
+    def test_extract_cross_chain_info(self):
+        backend = SqliteBackend()
+        backend.load_table("crosschain.address_labels", self.df_labels, index_columns=["ADDRESS"])
+        flipside_api = FlipsideApi("fake", max_address=8, max_workers=2, backend=backend)
+        label_store = LabelStore(":memory:")
+        df = flipside_api.extract_cross_chain_info(self.array_address[:30], label_store)
+        self.assertEqual(df.shape[0], 18)
+        self.assertEqual(backend.n_queries, 4)
+
+        # only the new addresses are queried
+        df = flipside_api.extract_cross_chain_info(self.array_address[::-1], label_store)
+        self.assertEqual(backend.n_queries, 7)
+        self.assertEqual(sorted(df.address), sorted(self.df_labels.address))
+        self.assertEqual(len(label_store.get_missing(self.array_address)), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
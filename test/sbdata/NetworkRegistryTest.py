@@ -0,0 +1,113 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from sbscorer.sbdata.FlipsideApi import FlipsideApi
+from sbscorer.sbdata.NetworkRegistry import NETWORK_REGISTRY, Network, NetworkRegistry
+from sbscorer.sbdata.QueryBackend import SqliteBackend
+
+
+def get_network_transactions(array_address, network, value_column):
+    """return a few transactions of each address on the network"""
+    list_record = []
+    for i, address in enumerate(array_address):
+        for j in range(i % 3):
+            record = {"tx_hash": f"{network}-{address}-{j}",
+                      "block_timestamp": f"2023-01-0{j + 1} 00:00:00.000",
+                      "from_address": address,
+                      "to_address": array_address[(i + 1) % len(array_address)],
+                      "gas_limit": 21000,
+                      "gas_used": 21000,
+                      "tx_fee": 0.001}
+            if value_column is not None:
+                record[value_column] = float(j)
+            list_record.append(record)
+    return pd.DataFrame(list_record)
+
+
+class NetworkRegistryTest(unittest.TestCase):
+    array_address = np.array([f"0x{i:040x}" for i in range(20)])
+    list_network = ["ethereum", "polygon", "gnosis"]
+
+    def get_flipside_api(self, **kwargs):
+        backend = SqliteBackend()
+        for network in self.list_network:
+            backend.load_transactions(network, get_network_transactions(
+                self.array_address, network, NETWORK_REGISTRY.get(network).value_column))
+        return FlipsideApi("fake", backend=backend, **kwargs)
+
+    def test_get_select(self):
+        self.assertEqual(NETWORK_REGISTRY.get("polygon").get_select(["matic_value", "from_address", "tx_hash"]),
+                         ["TX_HASH", "FROM_ADDRESS", "MATIC_VALUE"])
+        self.assertEqual(NETWORK_REGISTRY.get("gnosis").get_select(["tx_hash", "value"]), ["TX_HASH"])
+        self.assertEqual(NETWORK_REGISTRY.get("gnosis").get_select(["tx_hash", "value"], union=True),
+                         ["TX_HASH", "NULL AS VALUE"])
+        # the value column of another network is the value column of the network
+        self.assertEqual(NETWORK_REGISTRY.get("ethereum").get_columns(["matic_value", "tx_hash"]), ["tx_hash", "value"])
+        self.assertEqual(NETWORK_REGISTRY.get("avalanche").get_select(["tx_hash", "eth_value"]),
+                         ["TX_HASH", "AVAX_VALUE"])
+        with self.assertRaises(ValueError):
+            NETWORK_REGISTRY.get("ethereum").get_columns(["block_hash"])
+        with self.assertRaises(ValueError):
+            NETWORK_REGISTRY.get("solana")
+        registry = NetworkRegistry([Network("base", "ETH", "eth_value")])
+        self.assertEqual(registry.get("base").table_name, "base.core.fact_transactions")
+
+    def test_get_transactions_sql_query(self):
+        flipside_api = FlipsideApi("fake")
+        sql = flipside_api.get_eth_transactions_sql_query(self.array_address[:2], limit=5)
+        self.assertEqual(sql, flipside_api.get_transactions_sql_query(self.array_address[:2], "ethereum", limit=5))
+        self.assertIn("ETH_VALUE\n                FROM ethereum.core.fact_transactions", sql)
+        self.assertIn("LIMIT 5;", sql)
+        sql = flipside_api.get_transactions_sql_query(self.array_address[:2], "gnosis",
+                                                      columns=["tx_hash", "from_address", "to_address"])
+        self.assertNotIn("GAS_LIMIT", sql)
+        sql = flipside_api.get_transactions_sql_query(self.array_address[:2], self.list_network)
+        self.assertEqual(sql.count("UNION ALL"), 2)
+        self.assertIn("'gnosis' AS CHAIN", sql)
+
+    def test_get_transactions_union(self):
+        flipside_api = self.get_flipside_api()
+        df = flipside_api.get_transactions(self.array_address, self.list_network, columns=["tx_hash", "value"])
+        self.assertEqual(list(df.columns), ["tx_hash", "value", "chain"])
+        for network in self.list_network:
+            df_network = flipside_api.get_transactions(self.array_address, network)
+            self.assertEqual(sorted(df[df.chain == network].tx_hash), sorted(df_network.tx_hash))
+        self.assertTrue(df[df.chain == "gnosis"].value.isna().all())
+        self.assertEqual(df[df.chain == "polygon"].value.sum(), 6)
+
+    def test_extract_transactions_union(self):
+        with tempfile.TemporaryDirectory() as dir_network, tempfile.TemporaryDirectory() as dir_union:
+            flipside_api = self.get_flipside_api(max_address=5)
+            flipside_api.extract_transactions(dir_network, self.array_address, self.list_network)
+            flipside_api_union = self.get_flipside_api(max_address=5)
+            flipside_api_union.extract_transactions(dir_union, self.array_address, self.list_network, union=True)
+            self.assertEqual(flipside_api_union.sdk.n_queries, flipside_api.sdk.n_queries / 3)
+            for network in self.list_network:
+                list_file = sorted(os.listdir(os.path.join(dir_network, network)))
+                self.assertEqual(list_file, sorted(os.listdir(os.path.join(dir_union, network))))
+                for file in list_file:
+                    pd.testing.assert_frame_equal(pd.read_csv(os.path.join(dir_network, network, file)),
+                                                  pd.read_csv(os.path.join(dir_union, network, file)))
+            with self.assertRaises(ValueError):
+                flipside_api.extract_transactions(dir_union, self.array_address, union=True, incremental=True)
+
+    def test_extract_transactions_columns(self):
+        with tempfile.TemporaryDirectory() as extract_dir:
+            flipside_api = self.get_flipside_api(max_address=5)
+            flipside_api.extract_transactions(extract_dir, self.array_address, ["polygon"], columns=["matic_value"])
+            df = pd.read_csv(os.path.join(extract_dir, "polygon", f"{self.array_address[1]}_tx.csv"))
+            self.assertEqual(list(df.columns), ["tx_hash", "block_timestamp", "from_address", "to_address",
+                                                "matic_value"])
+
+            # the columns of an ethereum extraction are used on polygon
+            flipside_api.extract_transactions(extract_dir, self.array_address, ["polygon"], columns=["eth_value"])
+            df_eth = pd.read_csv(os.path.join(extract_dir, "polygon", f"{self.array_address[1]}_tx.csv"))
+            pd.testing.assert_frame_equal(df_eth, df)
+
+
+if __name__ == '__main__':
+    unittest.main()
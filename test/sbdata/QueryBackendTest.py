@@ -0,0 +1,84 @@
+import glob
+import os
+import tempfile
+import unittest
+
+import pandas as pd
+
+from sbscorer.sbdata.FlipsideApi import FlipsideApi
+from sbscorer.sbdata.QueryBackend import SqliteBackend, quote_table_names
+
+
+class QueryBackendTest(unittest.TestCase):
+    path_to_tx = "../resources/transactions"
+    # the files of the valid addresses of the test resources
+    dict_df = {os.path.basename(file)[:-len("_tx.csv")]: pd.read_csv(file)
+               for file in sorted(glob.glob(os.path.join(path_to_tx, "ethereum", "0x000*_tx.csv")))}
+
+    def get_flipside_api(self, **kwargs):
+        backend = SqliteBackend()
+        backend.load_transactions("ethereum", pd.concat(self.dict_df.values()).drop_duplicates())
+        return FlipsideApi("fake", backend=backend, **kwargs)
+
+    def test_quote_table_names(self):
+        sql = "SELECT * FROM ethereum.core.fact_transactions WHERE BLOCK_TIMESTAMP > 'a.b.c' AND TX_FEE > 0.1"
+        self.assertEqual(quote_table_names(sql),
+                         "SELECT * FROM \"ethereum.core.fact_transactions\" WHERE BLOCK_TIMESTAMP > 'a.b.c' "
+                         "AND TX_FEE > 0.1")
+
+    def test_execute_query(self):
+        # a small page size to query several pages
+        flipside_api = self.get_flipside_api(page_size=5)
+        array_address = list(self.dict_df)
+        df = flipside_api.execute_query(flipside_api.get_eth_transactions_sql_query(array_address))
+        self.assertNotIn("error", df.attrs)
+        self.assertEqual(list(df.columns), list(self.dict_df[array_address[0]].columns))
+        expected = set(pd.concat(self.dict_df.values()).tx_hash)
+        self.assertGreater(len(expected), 5)
+        self.assertEqual(set(df.tx_hash), expected)
+        self.assertEqual(df.shape[0], len(expected))
+
+        df_limit = flipside_api.execute_query(flipside_api.get_eth_transactions_sql_query(array_address, limit=3))
+        self.assertEqual(df_limit.shape[0], 3)
+
+    def test_get_transactions_since(self):
+        flipside_api = self.get_flipside_api()
+        address, df_address = max(self.dict_df.items(), key=lambda item: item[1].shape[0])
+        since = pd.to_datetime(df_address.block_timestamp).sort_values().iloc[0]
+        df = flipside_api.get_transactions([address.upper()], "ethereum", since=since)
+        self.assertEqual(set(df.tx_hash),
+                         set(df_address[pd.to_datetime(df_address.block_timestamp) > since].tx_hash))
+
+    def test_get_transactions_address_values(self):
+        flipside_api = self.get_flipside_api()
+        array_address = [address.upper() for address in self.dict_df] + list(self.dict_df)
+        self.assertEqual(flipside_api.get_string_address(array_address[:2]),
+                         ",".join(f"'{address}'" for address in list(self.dict_df)[:2]))
+        df_inline = flipside_api.get_transactions(array_address, "ethereum")
+        # the addresses are written once in a common table expression
+        flipside_api.MAX_INLINE_ADDRESS = 0
+        sql = flipside_api.get_transactions_sql_query(array_address, ["ethereum", "gnosis"])
+        self.assertEqual(sql.count(list(self.dict_df)[0]), 1)
+        self.assertNotIn("LOWER(", sql)
+        df_values = flipside_api.get_transactions(array_address, "ethereum")
+        self.assertEqual(sorted(df_values.tx_hash), sorted(df_inline.tx_hash))
+        self.assertEqual(sorted(df_values.tx_hash), sorted(set(pd.concat(self.dict_df.values()).tx_hash)))
+
+    def test_extract_transactions(self):
+        flipside_api = self.get_flipside_api(max_address=3, max_workers=2)
+        with tempfile.TemporaryDirectory() as extract_dir:
+            flipside_api.extract_transactions(extract_dir, list(self.dict_df), list_network=["ethereum"])
+            for address, df_address in self.dict_df.items():
+                df = pd.read_csv(os.path.join(extract_dir, "ethereum", f"{address}_tx.csv"))
+                self.assertEqual(sorted(df.tx_hash), sorted(df_address.tx_hash))
+            self.assertEqual(flipside_api.sdk.n_queries, 2)
+
+            # the extraction is loaded again in a new backend
+            backend = SqliteBackend()
+            backend.load_extract_dir(extract_dir)
+            df = FlipsideApi("fake", backend=backend).get_transactions(list(self.dict_df), "ethereum")
+            self.assertEqual(sorted(df.tx_hash), sorted(set(pd.concat(self.dict_df.values()).tx_hash)))
+
+
+if __name__ == '__main__':
+    unittest.main()
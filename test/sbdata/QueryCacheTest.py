@@ -0,0 +1,75 @@
+import os
+import tempfile
+import time
+import unittest
+
+import pandas as pd
+
+from sbscorer.sbdata.QueryCache import QueryCache, normalize_sql
+
+
+class QueryCacheTest(unittest.TestCase):
+    df = pd.DataFrame({"tx_hash": ["0xa", "0xb"], "eth_value": [1.5, None]})
+
+    def test_get_key(self):
+        sql = """
+                SELECT TX_HASH
+                FROM ethereum.core.fact_transactions
+                WHERE FROM_ADDRESS IN ('0xa');
+                """
+        self.assertEqual(normalize_sql(sql),
+                         "SELECT TX_HASH FROM ethereum.core.fact_transactions WHERE FROM_ADDRESS IN ('0xa')")
+        self.assertEqual(QueryCache.get_key(sql), QueryCache.get_key(" ".join(sql.split())))
+        self.assertNotEqual(QueryCache.get_key(sql), QueryCache.get_key(sql.replace("0xa", "0xb")))
+        self.assertNotEqual(QueryCache.get_key(sql), QueryCache.get_key(sql, {"limit": 10}))
+
+    def test_normalize_sql_literal(self):
+        # the whitespaces of the string literals are part of the query
+        sql = "SELECT  *\nFROM t WHERE tag = 'a  b' OR name = 'it''s  ok' ;"
+        self.assertEqual(normalize_sql(sql), "SELECT * FROM t WHERE tag = 'a  b' OR name = 'it''s  ok'")
+        self.assertNotEqual(QueryCache.get_key(sql), QueryCache.get_key(sql.replace("'a  b'", "'a b'")))
+
+    def test_get_put(self):
+        with tempfile.TemporaryDirectory() as path:
+            query_cache = QueryCache(os.path.join(path, "cache"))
+            key = query_cache.get_key("SELECT 1")
+            self.assertIsNone(query_cache.get(key))
+            query_cache.put(key, self.df)
+            pd.testing.assert_frame_equal(query_cache.get(key), self.df)
+            # a new instance reads the same files
+            pd.testing.assert_frame_equal(QueryCache(os.path.join(path, "cache")).get(key), self.df)
+            stats = query_cache.get_stats()
+            self.assertEqual((stats["hits"], stats["misses"], stats["entries"]), (1, 1, 1))
+            self.assertGreater(stats["bytes"], 0)
+            query_cache.clear()
+            self.assertIsNone(query_cache.get(key))
+
+    def test_ttl(self):
+        with tempfile.TemporaryDirectory() as path:
+            query_cache = QueryCache(path, ttl_seconds=60)
+            key = query_cache.get_key("SELECT 1")
+            query_cache.put(key, self.df)
+            self.assertIsNotNone(query_cache.get(key))
+            created_at = time.time() - 120
+            os.utime(query_cache.get_path(key), (created_at, created_at))
+            self.assertIsNone(query_cache.get(key))
+
+    def test_evict(self):
+        with tempfile.TemporaryDirectory() as path:
+            query_cache = QueryCache(path)
+            list_key = [query_cache.get_key(f"SELECT {i}") for i in range(3)]
+            for i, key in enumerate(list_key):
+                query_cache.put(key, self.df)
+                os.utime(query_cache.get_path(key), (1000 + i, 1000 + i))
+            # the first result is used, the second one is the least recently used
+            query_cache.get(list_key[0])
+            query_cache.max_bytes = 2 * os.path.getsize(query_cache.get_path(list_key[0]))
+            query_cache.evict()
+            self.assertIsNone(query_cache.get(list_key[1]))
+            self.assertIsNotNone(query_cache.get(list_key[0]))
+            self.assertIsNotNone(query_cache.get(list_key[2]))
+            self.assertEqual(query_cache.get_stats()["evictions"], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
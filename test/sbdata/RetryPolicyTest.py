@@ -0,0 +1,71 @@
+import time
+import unittest
+
+from flipside.errors import ApiError, QueryRunExecutionError, QueryRunRateLimitError, QueryRunTimeoutError, \
+    ServerError
+
+from sbscorer.sbdata.RetryPolicy import RetryPolicy, TokenBucket, classify_error
+
+
+class RetryPolicyTest(unittest.TestCase):
+
+    @staticmethod
+    def get_function(list_error):
+        """return a function raising the errors of list_error one after the other, then returning ok"""
+        list_error = list(list_error)
+
+        def function(value):
+            if list_error:
+                raise list_error.pop(0)
+            return value
+
+        return function
+
+    def test_classify_error(self):
+        self.assertEqual(classify_error(QueryRunRateLimitError()), "rate_limit")
+        self.assertEqual(classify_error(ApiError("MaxConcurrentQueries", -32171, "too many queries")), "rate_limit")
+        self.assertEqual(classify_error(QueryRunTimeoutError(300)), "timeout")
+        self.assertEqual(classify_error(QueryRunExecutionError("ResultTooLarge", "the result set is too large")),
+                         "row_cap")
+        self.assertEqual(classify_error(QueryRunExecutionError("SqlError", "invalid identifier")), "other")
+        self.assertEqual(classify_error(ConnectionError("connection reset")), "transient")
+        self.assertEqual(classify_error(ServerError(503, "unavailable")), "transient")
+        self.assertEqual(classify_error(ApiError("BadGateway", 502, "bad gateway")), "transient")
+
+    def test_call(self):
+        retry_policy = RetryPolicy(max_retries=3, base_delay=0, seed=0)
+        function = self.get_function([QueryRunRateLimitError(), ConnectionError("reset")])
+        counter = {}
+        self.assertEqual(retry_policy.call(function, "ok", counter=counter), "ok")
+        self.assertEqual(counter, {"retries": 2})
+        # the size errors are not retried
+        with self.assertRaises(QueryRunTimeoutError):
+            retry_policy.call(self.get_function([QueryRunTimeoutError(), QueryRunTimeoutError()]), "ok")
+        with self.assertRaises(QueryRunRateLimitError):
+            retry_policy.call(self.get_function([QueryRunRateLimitError()] * 4), "ok")
+        # neither are the execution errors, an invalid query fails fast
+        with self.assertRaises(QueryRunExecutionError):
+            retry_policy.call(self.get_function([QueryRunExecutionError("SqlError", "invalid identifier")]), "ok")
+        stats = retry_policy.get_stats()
+        self.assertEqual((stats["calls"], stats["successes"], stats["retries"], stats["failures"]), (9, 1, 5, 3))
+        self.assertEqual(stats["errors"], {"timeout": 1, "rate_limit": 5, "row_cap": 0, "transient": 1, "other": 1})
+
+    def test_get_delay(self):
+        retry_policy = RetryPolicy(base_delay=2, max_delay=10, seed=0)
+        for attempt, delay in enumerate([2, 4, 8, 10, 10]):
+            self.assertTrue(delay / 2 <= retry_policy.get_delay(attempt) <= delay)
+
+    def test_token_bucket(self):
+        token_bucket = TokenBucket(rate=50, capacity=2)
+        start_time = time.monotonic()
+        waited = sum(token_bucket.acquire() for _ in range(7))
+        # the 2 first tokens are available, the 5 others are added at 50 per second
+        self.assertGreaterEqual(time.monotonic() - start_time, 0.09)
+        self.assertGreater(waited, 0.09)
+        retry_policy = RetryPolicy(rate_limiter=TokenBucket(rate=1000))
+        retry_policy.call(self.get_function([]), "ok")
+        self.assertGreaterEqual(retry_policy.get_stats()["throttled_seconds"], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
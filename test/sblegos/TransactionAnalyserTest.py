@@ -5,6 +5,8 @@ from pathlib import Path
 import pandas as pd
 
 from sbscorer.sblegos.TransactionAnalyser import TransactionAnalyser
+from sbscorer.sbutils.AddressInterner import AddressInterner
+from sbscorer.sbutils import schema
 from sbscorer.sbutils.LoadData import LoadData
 
 
@@ -113,6 +115,40 @@ class TransactionAnalyserTest(unittest.TestCase):
         df_features = self.tx_analyser.get_df_features(list_features='all')
         self.assertEqual((8, 24), df_features.shape)
 
+    def test_get_address_transactions_backing_store(self):
+        address = "0x000bec82c41837d974899b26b26f9cc8890af9ea"
+        df_tx = self.df_tx[self.df_tx.EOA != address]
+        tx_analyser = TransactionAnalyser(df_tx, df_tx.EOA.unique(),
+                                          backing_store=self.dataLoader.get_backing_store("ethereum"))
+        df = tx_analyser.get_address_transactions(address)
+        self.assertEqual(743, df.shape[0])
+        self.assertTrue(df.block_timestamp.is_monotonic_increasing)
+
+    def test_get_df_features_intern(self):
+        interner = AddressInterner()
+        df_tx = LoadData(self.path_to_tx, intern_addresses=True, interner=interner).create_df_tx("ethereum")
+        tx_analyser = TransactionAnalyser(df_tx, df_tx.EOA.unique(), interner=interner)
+        df_features = tx_analyser.get_df_features().sort_values('EOA').reset_index(drop=True)
+        expected = self.tx_analyser.get_df_features().sort_values('EOA').reset_index(drop=True)
+        self.assertTrue(expected.equals(df_features))
+
+    def test_transaction_similitude_pylcs_intern(self):
+        interner = AddressInterner()
+        df_tx = LoadData(self.path_to_tx, intern_addresses=True, interner=interner).create_df_tx("ethereum")
+        address_lcs = pd.read_csv(os.path.join(self.path_to_test_add, "tx_analyser_address_lcs.csv"))
+        tx_analyser_lcs = TransactionAnalyser(df_tx, interner.intern(address_lcs.address.values), interner=interner)
+        address = interner.get_id("0xlcsad8bc3dfbe42d9a87686f67c69001a2006da4")
+        tx_sim = tx_analyser_lcs.transaction_similitude_pylcs(address=address, algo_type="address_only")
+        self.assertEqual(17, tx_sim.loc['0x000ad8bc3dfbe42d9a87686f67c69001a2006da4', 'lcs'])
+
+    def test_get_df_features_compact(self):
+        df_tx = LoadData(self.path_to_tx, columns=schema.ANALYSER_COLUMNS, compact=True).create_df_tx("ethereum")
+        self.assertNotIn('tx_fee', df_tx.columns)
+        self.assertIn('eth_value', df_tx.columns)
+        tx_analyser = TransactionAnalyser(df_tx, df_tx.EOA.unique())
+        df_features = tx_analyser.get_df_features()
+        self.assertEqual(self.tx_analyser.get_df_features().shape, df_features.shape)
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,80 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from sbscorer.sbutils.AddressIndex import AddressIndex, count_rows
+from sbscorer.sbutils.LoadData import LoadData
+
+
+class AddressIndexTest(unittest.TestCase):
+    path_to_tx = "../resources/transactions"
+    chain = "ethereum"
+    address = "0x000bec82c41837d974899b26b26f9cc8890af9ea"
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        shutil.copytree(os.path.join(self.path_to_tx, self.chain), os.path.join(self.tmp_dir, self.chain))
+        self.dataLoader = LoadData(self.tmp_dir)
+        self.address_index = self.dataLoader.get_address_index(self.chain)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_count_rows(self):
+        full_path = os.path.join(self.tmp_dir, self.chain, f"{self.address}_tx.csv")
+        self.assertEqual(743, count_rows(full_path))
+
+    def test_index(self):
+        self.assertTrue(self.address_index.exists())
+        df_index = AddressIndex(self.tmp_dir, self.chain).load()
+        self.assertEqual(8, df_index.shape[0])
+        self.assertEqual(743, df_index.loc[self.address, 'n_rows'])
+
+    def test_get_files_in_add(self):
+        add_list = ['0x00000bec592ec7c143c73dc85804962075827ecc', '0x000aa644afae99d06c9a0ed0e41b1e61beca958d',
+                    '0x000ad8bc3dfbe42d9a87686f67c69001a2006da4', self.address]
+        files = self.dataLoader.get_files_in_address(self.chain, add_list)
+        self.assertEqual(3, len(files))
+        df = self.dataLoader.create_df_tx(self.chain, address_list=add_list)
+        self.assertEqual(3, df.EOA.nunique())
+
+    def test_estimate(self):
+        estimate = self.address_index.estimate([self.address])
+        self.assertEqual(1, estimate['n_files'])
+        self.assertEqual(743, estimate['n_rows'])
+
+    def test_refresh(self):
+        full_path = os.path.join(self.tmp_dir, self.chain, f"{self.address}_tx.csv")
+        with open(full_path, 'a') as f:
+            f.write(f"0x01,2023-01-01 00:00:00.000,{self.address},{self.address},21000,21000,0.001,0.1\n")
+        os.remove(os.path.join(self.tmp_dir, self.chain, "0x000aa644afae99d06c9a0ed0e41b1e61beca958d_tx.csv"))
+
+        address_index = AddressIndex(self.tmp_dir, self.chain)
+        df_changed = address_index.refresh()
+        self.assertEqual([self.address], df_changed.index.tolist())
+        df_index = address_index.load()
+        self.assertEqual(7, df_index.shape[0])
+        self.assertEqual(744, df_index.loc[self.address, 'n_rows'])
+
+    def test_get_files_in_add_after_extraction(self):
+        path_to_chain = os.path.join(self.tmp_dir, self.chain)
+        new_address = "0x0000000000000000000000000000000000000001"
+        removed_address = "0x000aa644afae99d06c9a0ed0e41b1e61beca958d"
+        shutil.copy(os.path.join(path_to_chain, f"{self.address}_tx.csv"),
+                    os.path.join(path_to_chain, f"{new_address}_tx.csv"))
+        os.remove(os.path.join(path_to_chain, f"{removed_address}_tx.csv"))
+
+        # the persisted index is refreshed with the files added and removed by the extraction
+        add_list = [new_address, removed_address, self.address]
+        self.assertEqual(sorted([f"{new_address}_tx.csv", f"{self.address}_tx.csv"]),
+                         sorted(self.dataLoader.get_files_in_address(self.chain, add_list)))
+        df = self.dataLoader.create_df_tx(self.chain, address_list=add_list)
+        self.assertEqual(sorted([new_address, self.address]), sorted(df.EOA.unique()))
+        df_index = AddressIndex(self.tmp_dir, self.chain).load()
+        self.assertIn(new_address, df_index.index)
+        self.assertNotIn(removed_address, df_index.index)
+
+
+if __name__ == '__main__':
+    unittest.main()
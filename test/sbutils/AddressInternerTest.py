@@ -0,0 +1,63 @@
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from sbscorer.sbutils.AddressInterner import AddressInterner, MISSING_ID
+from sbscorer.sbutils.LoadData import LoadData
+
+
+class AddressInternerTest(unittest.TestCase):
+    path_to_tx = "../resources/transactions"
+    address = "0x000bec82c41837d974899b26b26f9cc8890af9ea"
+
+    def test_intern(self):
+        interner = AddressInterner()
+        ids = interner.intern(np.array(['0xa', '0xb', '0xa', None], dtype=object))
+        self.assertEqual(np.uint32, ids.dtype)
+        self.assertEqual([1, 2, 1, MISSING_ID], ids.tolist())
+        self.assertEqual([3, 1], interner.intern(['0xc', '0xa']).tolist())
+        self.assertEqual(3, len(interner))
+
+    def test_translate(self):
+        interner = AddressInterner()
+        addresses = np.array(['0xa', '0xb', '0xa'], dtype=object)
+        ids = interner.intern(addresses)
+        self.assertEqual(addresses.tolist(), interner.translate(ids).tolist())
+        self.assertEqual('0xb', interner.translate(interner.get_id('0xb')))
+
+    def test_translate_df_missing(self):
+        interner = AddressInterner()
+        df = pd.DataFrame({'address': [float(interner.intern(['0xa'])[0]), np.nan]})
+        self.assertEqual(['0xa', None], interner.translate_df(df, ['address'])['address'].tolist())
+
+    def test_create_df_tx_intern(self):
+        interner = AddressInterner()
+        df = LoadData(self.path_to_tx).create_df_tx("ethereum")
+        df_intern = LoadData(self.path_to_tx, intern_addresses=True, interner=interner).create_df_tx("ethereum")
+        for col in ['EOA', 'from_address', 'to_address']:
+            self.assertEqual(np.uint32, df_intern[col].dtype)
+        self.assertEqual(df['from_address'].tolist(), interner.translate(df_intern['from_address']).tolist())
+
+    def test_create_df_tx_multi_compact_intern(self):
+        interner = AddressInterner()
+        df = LoadData(self.path_to_tx, compact=True, intern_addresses=True,
+                      interner=interner).create_df_tx_multi(["ethereum"])
+        for col in ['EOA', 'from_address', 'to_address']:
+            self.assertEqual(np.uint32, df[col].dtype)
+        self.assertIn(self.address, interner.translate(df['EOA']).tolist())
+
+    def test_backing_store_intern(self):
+        interner = AddressInterner()
+        data_loader = LoadData(self.path_to_tx, intern_addresses=True, interner=interner)
+        df_intern = data_loader.create_df_tx("ethereum", address_list=[self.address])
+        # the analyser gives the ids of the interned dataframe to the backing store
+        address_id = df_intern['EOA'].iloc[0]
+        df = data_loader.get_backing_store("ethereum")(address_id)
+        self.assertEqual(743, df.shape[0])
+        self.assertTrue((df['EOA'] == address_id).all())
+        self.assertIs(df, data_loader.get_address_transactions("ethereum", self.address))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,6 +1,12 @@
+import os
+import shutil
+import tempfile
 import unittest
 
+import pandas as pd
+
 from sbscorer.sbutils.LoadData import LoadData
+from sbscorer.sbutils.schema import ANALYSER_COLUMNS
 
 
 class LoadDataTest(unittest.TestCase):
@@ -48,6 +54,84 @@ class LoadDataTest(unittest.TestCase):
         df = self.dataLoader.create_df_tx(chain, address_list=["0x000bec82c41837d974899b26b26f9cc8890af9ea"])
         self.assertEqual(1, len(df.EOA.unique()))
 
+    def test_create_df_tx_thread(self):
+        chain = "ethereum"
+        df_serial = self.dataLoader.create_df_tx(chain)
+        df_thread = LoadData(self.path_to_tx, n_workers=4).create_df_tx(chain)
+        pd.testing.assert_frame_equal(df_serial, df_thread)
+
+    def test_create_df_tx_process(self):
+        chain = "ethereum"
+        df_serial = self.dataLoader.create_df_tx(chain)
+        df_process = LoadData(self.path_to_tx, n_workers=2, executor="process").create_df_tx(chain)
+        pd.testing.assert_frame_equal(df_serial, df_process)
+
+    def test_create_df_all_transactions(self):
+        chain = "ethereum"
+        files = self.dataLoader.get_files(self.path_to_tx, chain)
+        df = LoadData(self.path_to_tx, n_workers=4).create_df_all_transactions(files, chain, n_files=3)
+        self.assertEqual(3, len(df.EOA.unique()))
+
+    def test_load_df_tx_columns(self):
+        file_name = "0x000bec82c41837d974899b26b26f9cc8890af9ea_tx.csv"
+        data_loader = LoadData(self.path_to_tx, columns=['from_address', 'to_address', 'matic_value'])
+        df = data_loader.load_df_tx(file_name, "ethereum")
+        self.assertEqual(['from_address', 'to_address', 'EOA'], list(df.columns))
+        # value selects the native value column of the chain
+        df = LoadData(self.path_to_tx, columns=['from_address', 'value']).load_df_tx(file_name, "ethereum")
+        self.assertEqual(['from_address', 'eth_value', 'EOA'], list(df.columns))
+
+    def test_create_df_tx_compact(self):
+        chain = "ethereum"
+        df_compact = LoadData(self.path_to_tx, columns=ANALYSER_COLUMNS, compact=True).create_df_tx(chain)
+        self.assertEqual('string', df_compact['from_address'].dtype)
+        self.assertEqual('string', df_compact['EOA'].dtype)
+        self.assertEqual('uint32', df_compact['gas_used'].dtype)
+        self.assertTrue(pd.api.types.is_datetime64_any_dtype(df_compact['block_timestamp']))
+        self.assertFalse('tx_fee' in df_compact.columns)
+
+        df = self.dataLoader.create_df_tx(chain)
+        self.assertEqual(df.shape[0], df_compact.shape[0])
+        self.assertLess(df_compact.memory_usage(deep=True).sum(), df.memory_usage(deep=True).sum())
+
+    def test_iter_batches(self):
+        chain = "ethereum"
+        list_df = list(self.dataLoader.iter_batches(chain, batch_size=3))
+        self.assertEqual([3, 3, 2], [df.EOA.nunique() for df in list_df])
+        df = self.dataLoader.create_df_tx(chain)
+        self.assertEqual(df.shape[0], sum(df_batch.shape[0] for df_batch in list_df))
+
+    def test_iter_batches_add(self):
+        chain = "ethereum"
+        add_list = ["0x000bec82c41837d974899b26b26f9cc8890af9ea", "0x000aa644afae99d06c9a0ed0e41b1e61beca958d"]
+        list_df = list(self.dataLoader.iter_batches(chain, batch_size=1, address_list=add_list))
+        self.assertEqual(2, len(list_df))
+        self.assertEqual(sorted(add_list), sorted(df.EOA.unique()[0] for df in list_df))
+
+    def test_create_df_tx_multi(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            for chain in ["ethereum", "optimism"]:
+                shutil.copytree(os.path.join(self.path_to_tx, "ethereum"), os.path.join(tmp_dir, chain))
+            data_loader = LoadData(tmp_dir, n_workers=2)
+            df = data_loader.create_df_tx_multi(["ethereum", "optimism", "gnosis"])
+            n_tx = self.dataLoader.create_df_tx("ethereum").shape[0]
+            self.assertEqual(2 * n_tx, df.shape[0])
+            self.assertEqual('category', df['chain'].dtype)
+            self.assertEqual(n_tx, (df['chain'] == "optimism").sum())
+            self.assertTrue(pd.api.types.is_datetime64_any_dtype(df['block_timestamp']))
+            self.assertEqual(["ethereum", "optimism"], sorted(data_loader.load_timings.keys()))
+
+    def test_get_address_transactions(self):
+        data_loader = LoadData(self.path_to_tx)
+        address = "0x000bec82c41837d974899b26b26f9cc8890af9ea"
+        df = data_loader.get_address_transactions("ethereum", address)
+        self.assertEqual((743, 9), df.shape)
+        data_loader.get_address_transactions("ethereum", address)
+        self.assertEqual(0, data_loader.get_address_transactions("ethereum", "0x0").shape[0])
+        stats = data_loader.cache.get_stats()
+        self.assertEqual(1, stats['hits'])
+        self.assertEqual(2, stats['misses'])
+
 
 if __name__ == '__main__':
     unittest.main()
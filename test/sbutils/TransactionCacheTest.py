@@ -0,0 +1,40 @@
+import unittest
+
+import pandas as pd
+
+from sbscorer.sbutils.TransactionCache import TransactionCache
+
+
+class TransactionCacheTest(unittest.TestCase):
+    df = pd.DataFrame({'value': range(100)})
+    n_bytes = int(df.memory_usage(deep=True).sum())
+
+    def test_hit_miss(self):
+        cache = TransactionCache()
+        self.assertIsNone(cache.get('a'))
+        cache.put('a', self.df)
+        self.assertIs(self.df, cache.get('a'))
+        stats = cache.get_stats()
+        self.assertEqual(1, stats['hits'])
+        self.assertEqual(1, stats['misses'])
+        self.assertEqual(self.n_bytes, stats['bytes'])
+
+    def test_eviction(self):
+        cache = TransactionCache(max_bytes=2 * self.n_bytes)
+        cache.put('a', self.df)
+        cache.put('b', self.df)
+        cache.get('a')  # b is now the least recently used
+        cache.put('c', self.df)
+        self.assertEqual(2, len(cache))
+        self.assertIsNone(cache.get('b'))
+        self.assertIsNotNone(cache.get('a'))
+        self.assertEqual(1, cache.get_stats()['evictions'])
+
+    def test_too_large(self):
+        cache = TransactionCache(max_bytes=self.n_bytes - 1)
+        cache.put('a', self.df)
+        self.assertEqual(0, len(cache))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,57 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from sbscorer.sbutils.LoadData import LoadData
+from sbscorer.sbutils.TransactionSnapshot import TransactionSnapshot
+
+
+class TransactionSnapshotTest(unittest.TestCase):
+    path_to_tx = "../resources/transactions"
+    chain = "ethereum"
+    address = "0x000bec82c41837d974899b26b26f9cc8890af9ea"
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        shutil.copytree(os.path.join(self.path_to_tx, self.chain), os.path.join(self.tmp_dir, self.chain))
+        self.dataLoader = LoadData(self.tmp_dir, incremental=True)
+        self.df_first = self.dataLoader.create_df_tx(self.chain)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_snapshot(self):
+        snapshot = TransactionSnapshot(self.tmp_dir, self.chain).load()
+        self.assertEqual(self.df_first.shape, snapshot['df'].shape)
+        self.assertEqual(8, snapshot['df_files'].shape[0])
+
+    def test_reload_unchanged(self):
+        path_to_snapshot = TransactionSnapshot(self.tmp_dir, self.chain).path_to_snapshot
+        mtime = os.stat(path_to_snapshot).st_mtime_ns
+        df = self.dataLoader.create_df_tx(self.chain)
+        self.assertTrue(self.df_first.equals(df))
+        # the snapshot is not written again when no file changed
+        self.assertEqual(mtime, os.stat(path_to_snapshot).st_mtime_ns)
+
+    def test_reload_changed(self):
+        full_path = os.path.join(self.tmp_dir, self.chain, f"{self.address}_tx.csv")
+        with open(full_path, 'a') as f:
+            f.write(f"0x01,2023-01-01 00:00:00.000,{self.address},{self.address},21000,21000,0.001,0.1\n")
+        os.remove(os.path.join(self.tmp_dir, self.chain, "0x000aa644afae99d06c9a0ed0e41b1e61beca958d_tx.csv"))
+
+        df = self.dataLoader.create_df_tx(self.chain)
+        df_full = LoadData(self.tmp_dir).create_df_tx(self.chain)
+        self.assertEqual(df_full.shape, df.shape)
+        self.assertEqual(7, df.EOA.nunique())
+        self.assertEqual(744, (df.EOA == self.address).sum())
+
+    def test_reload_filter(self):
+        df = self.dataLoader.create_df_tx(self.chain, address_list=[self.address])
+        self.assertEqual(743, df.shape[0])
+        df = self.dataLoader.create_df_tx(self.chain, n_files=3)
+        self.assertEqual(3, df.EOA.nunique())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,128 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import pandas as pd
+
+from sbscorer.sbutils.LoadData import LoadData
+from sbscorer.sbutils.TransactionStore import TransactionStore, get_bucket
+from sbscorer.sbutils import schema
+from sbscorer.sbutils.schema import set_transaction_dtypes
+
+
+class TransactionStoreTest(unittest.TestCase):
+    path_to_tx = "../resources/transactions"
+    chain = "ethereum"
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        shutil.copytree(os.path.join(self.path_to_tx, self.chain), os.path.join(self.tmp_dir, self.chain))
+        self.dataLoader = LoadData(self.tmp_dir)
+        self.manifest = self.dataLoader.compact(self.chain, n_buckets=4)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    @staticmethod
+    def sort_tx(df):
+        return df.sort_values(['EOA', 'tx_hash']).reset_index(drop=True)
+
+    def test_manifest(self):
+        self.assertEqual(8, len(self.manifest['addresses']))
+        self.assertEqual(8, len(self.manifest['source_files']))
+        self.assertEqual(743, self.manifest['addresses']['0x000bec82c41837d974899b26b26f9cc8890af9ea'])
+        self.assertEqual('datetime64[ns]', self.manifest['columns']['block_timestamp'])
+        self.assertEqual('int64', self.manifest['columns']['gas_used'])
+
+    def test_create_df_tx_store(self):
+        df_store = self.dataLoader.create_df_tx(self.chain)
+        df_csv = set_transaction_dtypes(LoadData(self.tmp_dir, use_store=False).create_df_tx(self.chain))
+        self.assertEqual(self.manifest['n_rows'], df_store.shape[0])
+        self.assertEqual(sorted(df_csv.columns), sorted(df_store.columns))
+        self.assertTrue(self.sort_tx(df_csv).equals(self.sort_tx(df_store[df_csv.columns])))
+
+    def test_create_df_tx_store_add(self):
+        df = self.dataLoader.create_df_tx(self.chain, address_list=["0x000bec82c41837d974899b26b26f9cc8890af9ea",
+                                                                    "0x0000000000000000000000000000000000000000"])
+        self.assertEqual(1, len(df.EOA.unique()))
+        self.assertEqual(743, df.shape[0])
+
+    def test_create_df_tx_store_n(self):
+        df = self.dataLoader.create_df_tx(self.chain, n_files=5)
+        self.assertEqual(5, len(df.EOA.unique()))
+
+    def test_read_columns(self):
+        df = TransactionStore(self.tmp_dir, self.chain).read(columns=['from_address'])
+        self.assertEqual(['from_address', 'EOA'], list(df.columns))
+
+    def test_create_df_tx_store_compact(self):
+        df = LoadData(self.tmp_dir, columns=['from_address', 'gas_used'], compact=True).create_df_tx(self.chain)
+        self.assertEqual(['from_address', 'gas_used', 'EOA'], list(df.columns))
+        self.assertEqual('uint32', df['gas_used'].dtype)
+
+    def test_create_df_tx_store_missing_column(self):
+        # a chain without eth_value
+        os.makedirs(os.path.join(self.tmp_dir, "polygon"))
+        for file in os.listdir(os.path.join(self.tmp_dir, self.chain)):
+            df = pd.read_csv(os.path.join(self.tmp_dir, self.chain, file))
+            df.rename(columns={'eth_value': 'matic_value'}).to_csv(os.path.join(self.tmp_dir, "polygon", file),
+                                                                   index=False)
+        self.dataLoader.compact("polygon", n_buckets=4)
+        data_loader = LoadData(self.tmp_dir, columns=schema.ANALYSER_COLUMNS)
+        df = data_loader.create_df_tx("polygon")
+        self.assertEqual(self.manifest['n_rows'], df.shape[0])
+        self.assertNotIn('eth_value', df.columns)
+        # the value column of the chain is loaded
+        self.assertIn('matic_value', df.columns)
+        address = '0x000bec82c41837d974899b26b26f9cc8890af9ea'
+        self.assertEqual(743, data_loader.create_df_tx("polygon", address_list=[address]).shape[0])
+        self.assertEqual(self.manifest['n_rows'],
+                         sum(df.shape[0] for df in data_loader.iter_batches("polygon", batch_size=3)))
+
+    def test_create_df_tx_store_stale(self):
+        # a new csv extracted after the store was created
+        new_address = "0x0000000000000000000000000000000000000001"
+        path_to_chain = os.path.join(self.tmp_dir, self.chain)
+        shutil.copy(os.path.join(path_to_chain, "0x000bec82c41837d974899b26b26f9cc8890af9ea_tx.csv"),
+                    os.path.join(path_to_chain, f"{new_address}_tx.csv"))
+        self.assertTrue(TransactionStore(self.tmp_dir, self.chain).is_stale())
+        data_loader = LoadData(self.tmp_dir)
+        df = data_loader.create_df_tx(self.chain)
+        self.assertEqual(self.manifest['n_rows'] + 743, df.shape[0])
+        self.assertEqual(743, data_loader.get_address_transactions(self.chain, new_address).shape[0])
+        self.assertIn(new_address, pd.concat(data_loader.iter_batches(self.chain, batch_size=3)).EOA.unique())
+
+        self.manifest = data_loader.compact(self.chain, n_buckets=4)
+        self.assertFalse(TransactionStore(self.tmp_dir, self.chain).is_stale())
+        self.assertEqual(self.manifest['n_rows'], LoadData(self.tmp_dir).create_df_tx(self.chain).shape[0])
+
+    def test_iter_batches_store(self):
+        list_df = list(self.dataLoader.iter_batches(self.chain, batch_size=3))
+        self.assertEqual([3, 3, 2], [df.EOA.nunique() for df in list_df])
+        self.assertEqual(self.manifest['n_rows'], sum(df.shape[0] for df in list_df))
+
+    def test_write_part_consolidate(self):
+        store = TransactionStore(self.tmp_dir, self.chain)
+        df = store.read()
+        address = '0x000bec82c41837d974899b26b26f9cc8890af9ea'
+        bucket = get_bucket(address, self.manifest['n_buckets'])
+        # a second file in the bucket of the address
+        df_address = df[df.EOA == address].head(10).copy()
+        df_address['EOA'] = address
+        store.write_part(bucket, df_address, "part-new")
+        manifest = store.refresh_manifest()
+        self.assertEqual(self.manifest['n_rows'] + 10, manifest['n_rows'])
+        self.assertEqual(743 + 10, manifest['addresses'][address])
+        self.assertEqual(len(self.manifest['files']) + 1, len(manifest['files']))
+        self.assertEqual('datetime64[ns]', manifest['columns']['block_timestamp'])
+        self.assertEqual(753, TransactionStore(self.tmp_dir, self.chain).read([address]).shape[0])
+
+        manifest = store.consolidate()
+        self.assertEqual(len(self.manifest['files']), len(manifest['files']))
+        self.assertEqual(self.manifest['addresses'].keys(), manifest['addresses'].keys())
+        self.assertEqual(753, TransactionStore(self.tmp_dir, self.chain).read([address]).shape[0])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,40 @@
+import unittest
+
+import numpy as np
+
+from sbscorer.sbutils.LoadData import LoadData
+
+
+class TransactionTableTest(unittest.TestCase):
+    path_to_tx = "../resources/transactions"
+    dataLoader = LoadData(path_to_tx)
+    df_tx = dataLoader.create_df_tx("ethereum").reset_index(drop=True)
+    transaction_table = dataLoader.create_transaction_table("ethereum")
+
+    def test_dedup(self):
+        self.assertEqual(self.df_tx.tx_hash.nunique(), self.transaction_table.df_transactions.shape[0])
+        self.assertFalse('EOA' in self.transaction_table.df_transactions.columns)
+
+    def test_index(self):
+        self.assertEqual(8, len(self.transaction_table.addresses))
+        self.assertEqual(self.df_tx.shape[0], self.transaction_table.indptr[-1])
+
+    def test_get_address_transactions(self):
+        address = "0x000bec82c41837d974899b26b26f9cc8890af9ea"
+        df = self.transaction_table.get_address_transactions(address)
+        self.assertEqual(743, df.shape[0])
+        self.assertEqual(sorted(self.df_tx.loc[self.df_tx.EOA == address, 'tx_hash']), sorted(df.tx_hash))
+
+    def test_get_address_transactions_unknown(self):
+        df = self.transaction_table.get_address_transactions("0x0000000000000000000000000000000000000000")
+        self.assertEqual(0, df.shape[0])
+
+    def test_to_eoa_frame(self):
+        df = self.transaction_table.to_eoa_frame()
+        pairs = df.loc[:, ['EOA', 'tx_hash']].sort_values(['EOA', 'tx_hash']).to_numpy()
+        expected = self.df_tx.loc[:, ['EOA', 'tx_hash']].sort_values(['EOA', 'tx_hash']).to_numpy()
+        self.assertTrue(np.array_equal(expected, pairs))
+
+
+if __name__ == '__main__':
+    unittest.main()